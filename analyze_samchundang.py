@@ -1,11 +1,11 @@
 import OpenDartReader
 import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib.font_manager as fm
-import seaborn as sns
 import os
 from dotenv import load_dotenv
 
+from financials import add_yoy
+from chart_renderer import render_financial_chart
+
 # -----------------------------------------------------------------------------
 # 1. 설정 및 초기화
 # -----------------------------------------------------------------------------
@@ -178,66 +178,16 @@ for year in years:
 df['Period'] = df['Year'].astype(str) + "." + df['Quarter'].astype(str) + "Q"
 
 # Shift 4 (4분기 전 데이터와 비교)
-df['Rev_YoY'] = df['Revenue'].pct_change(periods=4) * 100
-df['Op_YoY'] = df['OpIncome'].pct_change(periods=4) * 100
-df['Net_YoY'] = df['NetIncome'].pct_change(periods=4) * 100
+df = add_yoy(df)
 
 # -----------------------------------------------------------------------------
-# 5. 시각화
+# 5. 시각화 (공용 차트 모듈 사용)
 # -----------------------------------------------------------------------------
 print("시각화 생성 중...")
 
-# 한글 폰트 설정 (Windows 기본 폰트)
-plt.rcParams['font.family'] = 'Malgun Gothic'
-plt.rcParams['axes.unicode_minus'] = False
-
-# 캔버스 설정
-fig, axes = plt.subplots(3, 1, figsize=(14, 18))
-plt.subplots_adjust(hspace=0.4)
-
-accounts = [
-    ('Revenue', 'Rev_YoY', '매출액'),
-    ('OpIncome', 'Op_YoY', '영업이익'),
-    ('NetIncome', 'Net_YoY', '당기순이익')
-]
-
-for i, (acc, acc_yoy, title) in enumerate(accounts):
-    ax1 = axes[i]
-    
-    # 막대 그래프 (금액) - 단위: 억 원
-    bars = ax1.bar(df['Period'], df[acc] / 100000000, color='#4e79a7', alpha=0.7, label='금액 (억 원)')
-    ax1.set_ylabel('금액 (억 원)', color='#4e79a7', fontsize=12)
-    ax1.tick_params(axis='y', labelcolor='#4e79a7')
-    ax1.set_title(f"삼천당제약 분기별 {title} 추이 (최근 5년)", fontsize=14, fontweight='bold')
-    
-    # x축 레이블 회전
-    ax1.set_xticklabels(df['Period'], rotation=45)
-    
-    # 막대 위에 값 표시
-    for bar in bars:
-        height = bar.get_height()
-        ax1.text(bar.get_x() + bar.get_width() / 2, height, f'{int(height)}', ha='center', va='bottom', fontsize=9)
-
-    # 선 그래프 (증감율) - 보조축
-    ax2 = ax1.twinx()
-    line = ax2.plot(df['Period'], df[acc_yoy], color='#e15759', marker='o', linewidth=2, label='전년 동기 대비 증감율 (%)')
-    ax2.set_ylabel('증감율 (%)', color='#e15759', fontsize=12)
-    ax2.tick_params(axis='y', labelcolor='#e15759')
-    ax2.axhline(0, color='gray', linestyle='--', linewidth=0.8) # 0% 기준선
-
-    # 증감율 값 표시 (너무 복잡할 수 있으니 주요 포인트만 표시하거나 생략 가능, 여기선 표시)
-    for j, txt in enumerate(df[acc_yoy]):
-        if pd.notna(txt):
-            ax2.text(j, txt, f'{txt:.1f}%', ha='center', va='bottom' if txt > 0 else 'top', color='#e15759', fontsize=9)
-
-    # 범례 (두 축 합치기)
-    lines_1, labels_1 = ax1.get_legend_handles_labels()
-    lines_2, labels_2 = ax2.get_legend_handles_labels()
-    ax1.legend(lines_1 + lines_2, labels_1 + labels_2, loc='upper left')
-
-# 저장 및 표시
+# 저장
 output_file = 'samchundang_financials.png'
-plt.savefig(output_file, dpi=300, bbox_inches='tight')
+render_financial_chart(df, corp_name, output_file, preset='print')
 print(f"그래프 저장 완료: {output_file}")
 
 # 데이터도 CSV로 저장
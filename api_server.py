@@ -0,0 +1,252 @@
+"""
+api_server.py
+읽기 전용 로컬 REST API (기업 코드·재무·주가·공시)
+
+봇·대시보드와 같은 로컬 캐시(DataCache)를 거쳐 데이터를 돌려주므로, 다른 내부 도구가
+DART/FinanceDataReader 조회 로직을 다시 만들 필요 없이 이미 데워진 캐시를 그대로 씁니다.
+
+엔드포인트 (모두 GET)
+    /corp/{name}                 기업명 → corp_code, stock_code
+    /financials/{corp_code}      분기 실적 (?start=2023&end=2025&view=quarterly|cumulative)
+    /prices/{ticker}             일별 시세 (?start=2024-01-01&end=2024-12-31)
+    /disclosures/{corp_code}     최근 1년 공시 목록 (?count=50)
+    /healthz
+
+표 형태 응답은 ?format=json(기본)|csv|arrow|parquet 또는 Accept 헤더로 형식을 고릅니다.
+(arrow/parquet은 pyarrow 필요) 모든 응답에 ETag를 붙여 If-None-Match 조건부 요청에 304로 답하고,
+Accept-Encoding에 gzip이 있으면 압축합니다.
+
+환경변수
+    API_HOST  바인드 주소 (기본 127.0.0.1)
+    API_PORT  포트 (기본 8090)
+"""
+import io
+import os
+import json
+import asyncio
+import hashlib
+import datetime
+
+from aiohttp import web
+from dotenv import load_dotenv
+
+import metrics
+from data_cache import DataCache
+from price_store import load_prices
+
+load_dotenv()
+API_HOST = os.getenv("API_HOST", "127.0.0.1")
+API_PORT = int(os.getenv("API_PORT", "8090"))
+
+# 형식 이름 → Content-Type
+FORMATS = {
+    "json":    "application/json",
+    "csv":     "text/csv",
+    "arrow":   "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# 이보다 작은 응답은 압축하지 않음 (헤더 비용이 더 큼)
+GZIP_MIN_BYTES = 1024
+
+# 응답별 브라우저/프록시 캐시 시간 (초)
+CORP_MAX_AGE       = 24 * 3600
+FINANCIALS_MAX_AGE = 3600
+PRICES_MAX_AGE     = 600
+DISCLOSURE_MAX_AGE = 600
+
+DART_KEY  = web.AppKey("dart", object)
+CACHE_KEY = web.AppKey("cache", DataCache)
+
+
+# ──────────────────────────────────────────────
+# 직렬화·조건부 응답
+# ──────────────────────────────────────────────
+def negotiate_format(request: web.Request) -> str:
+    """?format= 값, 없으면 Accept 헤더에서 응답 형식을 고릅니다. (기본 json)"""
+    fmt = request.query.get("format")
+    if fmt:
+        if fmt not in FORMATS:
+            raise web.HTTPBadRequest(text=f"지원하지 않는 format입니다: {fmt} ({', '.join(FORMATS)})")
+        return fmt
+    accept = request.headers.get("Accept", "")
+    for name, content_type in FORMATS.items():
+        if content_type in accept:
+            return name
+    return "json"
+
+
+def serialize_frame(df, fmt: str) -> bytes:
+    """DataFrame을 형식에 맞는 바이트로 변환합니다. (날짜 인덱스는 컬럼으로 풀어냄)"""
+    if df.index.name is not None:
+        df = df.reset_index()
+    if fmt == "json":
+        return df.to_json(orient="records", force_ascii=False, date_format="iso").encode("utf-8")
+    if fmt == "csv":
+        return df.to_csv(index=False).encode("utf-8")
+
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise web.HTTPNotAcceptable(text="arrow/parquet 응답에는 pyarrow가 필요합니다.")
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = io.BytesIO()
+    if fmt == "arrow":
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    else:
+        import pyarrow.parquet as pq
+        pq.write_table(table, sink, compression="zstd")
+    return sink.getvalue()
+
+
+def etag_matches(request: web.Request, etag: str) -> bool:
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def make_response(request: web.Request, body: bytes, fmt: str, max_age: int) -> web.Response:
+    """ETag·Cache-Control을 붙인 응답. If-None-Match가 일치하면 본문 없이 304를 돌려줍니다."""
+    etag = f'"{hashlib.sha1(body).hexdigest()}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={max_age}",
+        "Vary": "Accept, Accept-Encoding",
+    }
+    if etag_matches(request, etag):
+        return web.Response(status=304, headers=headers)
+
+    response = web.Response(body=body, content_type=FORMATS[fmt], headers=headers,
+                            charset="utf-8" if fmt in ("json", "csv") else None)
+    # parquet은 자체 압축되어 있으므로 제외
+    if fmt != "parquet" and len(body) >= GZIP_MIN_BYTES and "gzip" in request.headers.get("Accept-Encoding", ""):
+        response.enable_compression(web.ContentCoding.gzip)
+    return response
+
+
+def frame_response(request: web.Request, df, max_age: int) -> web.Response:
+    fmt = negotiate_format(request)
+    return make_response(request, serialize_frame(df, fmt), fmt, max_age)
+
+
+def _int_query(request: web.Request, name: str, default: int) -> int:
+    try:
+        return int(request.query.get(name, default))
+    except ValueError:
+        raise web.HTTPBadRequest(text=f"{name}은(는) 정수여야 합니다.")
+
+
+def _date_query(request: web.Request, name: str, default: str = None) -> str:
+    value = request.query.get(name, default)
+    if value is None:
+        return None
+    try:
+        return datetime.date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise web.HTTPBadRequest(text=f"{name}은(는) YYYY-MM-DD 형식이어야 합니다.")
+
+
+# ──────────────────────────────────────────────
+# 엔드포인트
+# ──────────────────────────────────────────────
+async def get_corp(request: web.Request) -> web.Response:
+    dart = request.app[DART_KEY]
+    name = request.match_info["name"]
+    corp_code = await asyncio.to_thread(dart.find_corp_code, name)
+    if not corp_code:
+        raise web.HTTPNotFound(text=f"'{name}'을(를) DART에서 찾을 수 없습니다.")
+    stock_code = await asyncio.to_thread(dart.find_stock_code, corp_code)
+    body = json.dumps({"corp_name": name, "corp_code": corp_code, "stock_code": stock_code}, ensure_ascii=False)
+    return make_response(request, body.encode("utf-8"), "json", CORP_MAX_AGE)
+
+
+async def get_financials(request: web.Request) -> web.Response:
+    from financials import load_cumulative_financials, to_quarterly
+
+    dart = request.app[DART_KEY]
+    current_year = datetime.datetime.now().year
+    start = _int_query(request, "start", current_year - 3)
+    end = _int_query(request, "end", current_year)
+    view = request.query.get("view", "quarterly")
+    if view not in ("quarterly", "cumulative"):
+        raise web.HTTPBadRequest(text="view는 quarterly 또는 cumulative입니다.")
+
+    df = await asyncio.to_thread(load_cumulative_financials, dart, request.match_info["corp_code"], start, end)
+    if view == "quarterly":
+        df = to_quarterly(df)
+    return frame_response(request, df, FINANCIALS_MAX_AGE)
+
+
+async def get_prices(request: web.Request) -> web.Response:
+    start = _date_query(request, "start", f"{datetime.datetime.now().year - 1}-01-01")
+    end = _date_query(request, "end")
+    try:
+        df = await asyncio.to_thread(load_prices, request.match_info["ticker"], start, end,
+                                     request.app[CACHE_KEY])
+    except Exception as e:
+        metrics.record_error("api_upstream", source="prices")
+        raise web.HTTPBadGateway(text=f"주가 조회 실패: {e}")
+    return frame_response(request, df, PRICES_MAX_AGE)
+
+
+async def get_disclosures(request: web.Request) -> web.Response:
+    import pandas as pd
+
+    dart = request.app[DART_KEY]
+    count = _int_query(request, "count", 50)
+    df = await asyncio.to_thread(dart.get_recent_disclosures, request.match_info["corp_code"], count)
+    return frame_response(request, df if df is not None else pd.DataFrame(), DISCLOSURE_MAX_AGE)
+
+
+async def healthz(request: web.Request) -> web.Response:
+    return web.json_response({"status": "ok"})
+
+
+@web.middleware
+async def metrics_middleware(request: web.Request, handler):
+    resource = request.match_info.route.resource
+    route = resource.canonical if resource is not None else "unmatched"
+    with metrics.timer("api_request", route=route):
+        return await handler(request)
+
+
+# ──────────────────────────────────────────────
+# 앱 구성
+# ──────────────────────────────────────────────
+def create_app(dart=None, cache: DataCache = None) -> web.Application:
+    """
+    dart: DartHandler (None이면 시작 시 DART_API_KEY로 생성)
+    cache: DataCache (None이면 기본 경로의 공유 캐시)
+    """
+    app = web.Application(middlewares=[metrics_middleware])
+    app[CACHE_KEY] = cache or DataCache()
+
+    async def on_startup(app):
+        if dart is not None:
+            app[DART_KEY] = dart
+            return
+        from dart_handler import DartHandler
+        # 기업 코드 목록 다운로드가 있어 스레드에서 생성
+        app[DART_KEY] = await asyncio.to_thread(DartHandler, None, app[CACHE_KEY])
+
+    app.on_startup.append(on_startup)
+    app.router.add_get("/corp/{name}", get_corp)
+    app.router.add_get("/financials/{corp_code}", get_financials)
+    app.router.add_get("/prices/{ticker}", get_prices)
+    app.router.add_get("/disclosures/{corp_code}", get_disclosures)
+    app.router.add_get("/healthz", healthz)
+    return app
+
+
+def main():
+    # METRICS_PORT / METRICS_DUMP_PATH 설정 시 계측값 노출
+    metrics.start_from_env()
+    print(f"✅ API 서버 시작: http://{API_HOST}:{API_PORT}")
+    web.run_app(create_app(), host=API_HOST, port=API_PORT, print=None)
+
+
+if __name__ == "__main__":
+    main()
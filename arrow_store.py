@@ -0,0 +1,203 @@
+"""
+arrow_store.py
+프로세스 간 공유 데이터셋 (Arrow IPC 파일 + 읽기 전용 메모리 매핑)
+
+갱신 작업(valuation.py, signal_scanner.py)이 만든 표·시세 배열을 Arrow IPC 파일로 내보내면,
+봇 워커·Streamlit 대시보드는 DataCache에서 pickle을 풀어 각자 복사본을 만드는 대신 같은 파일을 읽기 전용으로
+메모리 매핑합니다. 숫자 컬럼은 매핑된 페이지를 그대로 쓰므로(복사 없음) 프로세스가 여럿이어도 물리 메모리를 공유합니다.
+
+버전 교체는 원자적입니다.
+  1) 새 버전을 임시 파일에 쓰고 {이름}.{버전}.arrow로 이름을 바꾼 뒤
+  2) 현재 버전을 가리키는 {이름}.current 파일을 os.replace로 바꿉니다.
+읽는 쪽은 .current가 바뀐 데이터셋만 다시 매핑하고, 이전 버전을 매핑 중인 프로세스는 그대로 읽을 수 있습니다.
+(오래된 버전 파일은 KEEP_VERSIONS개만 남기고 지움 — Windows에서 매핑 중이라 지우지 못하면 다음 게시 때 다시 시도)
+
+환경변수
+    SHARED_DATA_DIR   공유 파일 디렉터리 (기본: shared_data, 봇·대시보드·갱신 작업이 같은 경로를 써야 함)
+
+사용 예)
+    python arrow_store.py             # 게시된 데이터셋·버전·크기 목록
+"""
+import os
+import sys
+import json
+import time
+import glob
+import threading
+
+import numpy as np
+import pyarrow as pa
+
+SHARED_DATA_DIR = os.getenv("SHARED_DATA_DIR", "shared_data")
+
+# 데이터셋별로 남겨 두는 버전 수 (현재 버전 포함, 이전 버전을 매핑 중인 프로세스를 위해)
+KEEP_VERSIONS = 2
+
+# 스키마 메타데이터 키 (publish_frame에 넘긴 dict, 읽을 때 DataFrame.attrs로 돌려줌)
+META_KEY = b"inv_sky_meta"
+
+
+class ArrowStore:
+    """데이터셋 게시(publish_*)와 메모리 매핑 읽기(read_*). 읽은 결과는 버전이 바뀔 때까지 재사용합니다."""
+
+    def __init__(self, root: str = None):
+        self.root = root or SHARED_DATA_DIR
+        self._mapped = {}           # 이름 → (버전 파일명, 읽은 객체)
+        self._lock = threading.Lock()
+
+    # ── 게시 ──
+    def _pointer(self, name):
+        return os.path.join(self.root, f"{name}.current")
+
+    def _publish(self, name, table) -> str:
+        os.makedirs(self.root, exist_ok=True)
+        version = f"{name}.{time.time_ns()}.arrow"
+        tmp_path = os.path.join(self.root, f".{version}.{os.getpid()}.tmp")
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, os.path.join(self.root, version))
+
+        pointer_tmp = f"{self._pointer(name)}.{os.getpid()}.tmp"
+        with open(pointer_tmp, "w", encoding="utf-8") as f:
+            f.write(version)
+        os.replace(pointer_tmp, self._pointer(name))
+        self._cleanup(name, version)
+        return version
+
+    def _cleanup(self, name, current):
+        versions = sorted(glob.glob(os.path.join(self.root, f"{name}.*.arrow")),
+                          key=lambda p: int(os.path.basename(p).rsplit(".", 2)[1]))
+        for path in versions[:-KEEP_VERSIONS]:
+            if os.path.basename(path) == current:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                pass  # 다른 프로세스가 매핑 중 (Windows)
+
+    @staticmethod
+    def _with_meta(table, meta):
+        metadata = dict(table.schema.metadata or {})
+        metadata[META_KEY] = json.dumps(meta or {}).encode("utf-8")
+        return table.replace_schema_metadata(metadata)
+
+    def publish_frame(self, name: str, df, meta: dict = None) -> str:
+        """
+        DataFrame을 새 버전으로 게시합니다. 실수 컬럼의 NaN은 Arrow null이 아닌 값으로 그대로 저장해
+        읽을 때 복사 없이 매핑됩니다. 반환값: 버전 파일명
+        """
+        table = pa.Table.from_pandas(df)
+        for column in df.columns:
+            if df[column].dtype.kind == "f":
+                i = table.schema.get_field_index(str(column))
+                table = table.set_column(i, table.field(i), pa.array(df[column].to_numpy()))
+        return self._publish(name, self._with_meta(table, meta))
+
+    def publish_matrix(self, name: str, matrix) -> str:
+        """
+        PriceMatrix(거래일 × 종목)를 게시합니다. close/volume은 행 우선으로 펼친 한 컬럼씩 저장해
+        읽을 때 복사 없이 (T, N) 배열로 되돌립니다. 날짜·종목코드는 스키마 메타데이터에 둡니다.
+        """
+        shape = matrix.close.shape if matrix.close is not None else (0, 0)
+        empty = np.empty(0)
+        table = pa.table({
+            "close": np.ascontiguousarray(matrix.close, dtype="float64").ravel() if shape[0] else empty,
+            "volume": np.ascontiguousarray(matrix.volume, dtype="float64").ravel() if shape[0] else empty,
+        })
+        layout = {
+            "shape": list(shape),
+            "dates": np.asarray(matrix.dates).astype("datetime64[ns]").astype("int64").tolist(),
+            "tickers": [str(t) for t in matrix.tickers],
+        }
+        return self._publish(name, table.replace_schema_metadata({b"price_matrix": json.dumps(layout).encode("utf-8")}))
+
+    # ── 읽기 ──
+    def current_version(self, name: str):
+        """현재 버전 파일명 (게시된 적이 없으면 None)"""
+        try:
+            with open(self._pointer(name), encoding="utf-8") as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def open_table(self, name: str):
+        """현재 버전을 읽기 전용으로 메모리 매핑한 (버전, pyarrow.Table). 없으면 (None, None)."""
+        version = self.current_version(name)
+        if version is None:
+            return None, None
+        try:
+            source = pa.memory_map(os.path.join(self.root, version), "r")
+        except FileNotFoundError:
+            return None, None  # 포인터를 읽은 사이 새 버전이 나오고 파일이 정리됨 — 다음 확인 때 다시
+        return version, pa.ipc.open_file(source).read_all()
+
+    def _read(self, name, convert):
+        version = self.current_version(name)
+        if version is None:
+            return None
+        cached = self._mapped.get(name)
+        if cached and cached[0] == version:
+            return cached[1]
+        with self._lock:
+            cached = self._mapped.get(name)
+            if cached and cached[0] == version:
+                return cached[1]
+            version, table = self.open_table(name)
+            if table is None:
+                return cached[1] if cached else None
+            value = convert(table)
+            self._mapped[name] = (version, value)
+            return value
+
+    @staticmethod
+    def _meta(table):
+        raw = (table.schema.metadata or {}).get(META_KEY)
+        return json.loads(raw) if raw else {}
+
+    def read_frame(self, name: str):
+        """
+        게시된 DataFrame (게시 때의 meta는 .attrs). 버전이 그대로면 같은 객체를 돌려줍니다. 없으면 None.
+        null 없는 숫자 컬럼은 매핑된 파일 페이지를 그대로 가리킵니다. (읽기 전용)
+        """
+        def convert(table):
+            df = table.to_pandas(split_blocks=True, self_destruct=False)
+            df.attrs.update(self._meta(table))
+            return df
+        return self._read(name, convert)
+
+    def read_matrix(self, name: str):
+        """게시된 PriceMatrix (close/volume은 매핑된 파일을 가리키는 읽기 전용 배열). 없으면 None."""
+        def convert(table):
+            from price_store import PriceMatrix
+            layout = json.loads(table.schema.metadata[b"price_matrix"])
+            shape = tuple(layout["shape"])
+            close = table.column("close").chunk(0).to_numpy(zero_copy_only=True).reshape(shape) if shape[0] else None
+            volume = table.column("volume").chunk(0).to_numpy(zero_copy_only=True).reshape(shape) if shape[0] else None
+            return PriceMatrix(np.array(layout["dates"], dtype="datetime64[ns]"), layout["tickers"], close, volume)
+        return self._read(name, convert)
+
+    def datasets(self) -> dict:
+        """게시된 데이터셋 {이름: (현재 버전 파일명, 크기(바이트))}"""
+        result = {}
+        for pointer in sorted(glob.glob(os.path.join(self.root, "*.current"))):
+            name = os.path.basename(pointer)[:-len(".current")]
+            version = self.current_version(name)
+            path = os.path.join(self.root, version) if version else None
+            result[name] = (version, os.path.getsize(path) if path and os.path.exists(path) else 0)
+        return result
+
+
+def main(argv=None):
+    store = ArrowStore()
+    datasets = store.datasets()
+    if not datasets:
+        print(f"{store.root}에 게시된 데이터셋이 없습니다.")
+        return 1
+    for name, (version, size) in datasets.items():
+        print(f"{name:<20} {version:<45} {size / 1e6:,.1f}MB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
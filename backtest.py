@@ -0,0 +1,358 @@
+"""
+backtest.py
+재무 + 주가 조건 전략 백테스트 (전 종목 · 파라미터 그리드)
+
+분기 실적 패널(financials)의 각 분기 값은 그 보고서의 최초 접수일(rcept_dt, filing_index) 다음 거래일부터만
+쓸 수 있도록 (거래일 × 종목) 배열에 배치하므로, 아직 공시되지 않은 실적으로 매매하는 미래 참조가 없습니다.
+(접수일을 모르는 분기는 법정 제출기한 — 분기·반기 45일, 사업보고서 90일 — 을 접수일로 봅니다)
+
+전략은 (거래일 × 종목) bool 배열(보유 조건)을 만드는 함수이고, 포트폴리오는 조건을 만족한 종목 동일 비중,
+rebalance 거래일마다 재조정, 회전율만큼 거래비용(cost_bps)을 뺍니다. 모든 계산은 종목 축으로 벡터화되어 있고,
+파라미터 그리드는 프로세스 풀에서 병렬로 평가합니다. 결과는 (데이터 지문, 전략, 파라미터)별로 DataCache에 저장합니다.
+
+사용 예)
+    python backtest.py --strategy opm_turnaround --start 2021-01-01 \\
+        --grid opm_yoy_min=0,0.01,0.03 --grid ma_window=0,60,120 --workers 4
+"""
+import sys
+import json
+import time
+import hashlib
+import argparse
+import datetime
+import itertools
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import metrics
+from financials import QUARTER_CODES, load_quarterly_financials
+from signal_scanner import ffill, rolling_mean
+
+TRADING_DAYS = 252
+
+# 결과 캐시 유효기간 (데이터 지문이 키에 들어가므로 길게)
+RESULT_TTL = 30 * 24 * 3600
+
+# 접수일을 모를 때 쓰는 법정 제출기한 (분기 말일로부터 일수)
+FILING_DEADLINE_DAYS = {1: 45, 2: 45, 3: 45, 4: 90}
+
+# 전략 함수가 아니라 포트폴리오 평가에 쓰이는 파라미터
+EVAL_PARAMS = ("rebalance", "cost_bps")
+DEFAULT_REBALANCE = 20
+DEFAULT_COST_BPS = 15
+
+
+# ──────────────────────────────────────────────
+# 데이터 (분기 패널 + 시세 → 거래일 축 정렬)
+# ──────────────────────────────────────────────
+class BacktestData:
+    """
+    거래일(dates) × 종목(tickers) 축에 맞춘 종가(close, 결측은 직전 값)와 재무 피처 배열(features).
+    fingerprint는 결과 캐시 키에 쓰는 데이터 지문입니다.
+    """
+    __slots__ = ("dates", "tickers", "close", "features", "fingerprint")
+
+    def __init__(self, dates, tickers, close, features):
+        self.dates = dates
+        self.tickers = list(tickers)
+        self.close = close
+        self.features = features
+        digest = hashlib.sha1()
+        digest.update(np.asarray(dates).astype("datetime64[D]").tobytes())
+        digest.update("\n".join(self.tickers).encode("utf-8"))
+        digest.update(np.ascontiguousarray(close).tobytes())
+        for name in sorted(features):
+            digest.update(name.encode("utf-8"))
+            digest.update(np.ascontiguousarray(features[name]).tobytes())
+        self.fingerprint = digest.hexdigest()[:16]
+
+    def __repr__(self):
+        return f"BacktestData({len(self.dates)} days x {len(self.tickers)} tickers, features={sorted(self.features)})"
+
+
+def _quarter_end(year: int, quarter: int) -> datetime.date:
+    month = quarter * 3
+    next_month = datetime.date(year + (month == 12), month % 12 + 1, 1)
+    return next_month - datetime.timedelta(days=1)
+
+
+def company_panel(handler, corp_code: str, start_year: int, end_year: int):
+    """
+    기업 한 곳의 분기 실적(Revenue/OpIncome/NetIncome)에 공시 접수일(available_date)을 붙여 반환합니다.
+    12월 결산 기준이며, 분기 실적이 없으면 빈 DataFrame.
+    """
+    df = load_quarterly_financials(handler, corp_code, start_year, end_year)
+    if df.empty:
+        return df
+    index = handler.get_filing_index(corp_code, start_year) or {}
+    codes = {quarter: code for code, quarter in QUARTER_CODES.items()}
+
+    available = []
+    for year, quarter in zip(df["Year"].astype(int), df["Quarter"].astype(int)):
+        rcept_dt = index.get((year, codes[quarter]))
+        if rcept_dt:
+            available.append(pd.Timestamp(rcept_dt))
+        else:
+            deadline = _quarter_end(year, quarter) + datetime.timedelta(days=FILING_DEADLINE_DAYS[quarter])
+            available.append(pd.Timestamp(deadline))
+
+    panel = df[["Year", "Quarter", "Revenue", "OpIncome", "NetIncome"]].copy()
+    panel["available_date"] = available
+    return panel
+
+
+def load_fundamental_panel(handler, tickers_by_corp: dict, start_year: int, end_year: int, workers: int = 4):
+    """{기업 코드: 종목코드}의 분기 패널을 모아 ticker 컬럼을 붙인 긴 표로 반환합니다. (DART 캐시 사용)"""
+    def load(item):
+        corp_code, ticker = item
+        try:
+            panel = company_panel(handler, corp_code, start_year, end_year)
+        except Exception as e:
+            print(f"Error loading panel for {corp_code}: {e}")
+            return None
+        if panel.empty:
+            return None
+        panel.insert(0, "ticker", ticker)
+        return panel
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        frames = [p for p in pool.map(load, tickers_by_corp.items()) if p is not None]
+    if not frames:
+        return pd.DataFrame(columns=["ticker", "Year", "Quarter", "Revenue", "OpIncome", "NetIncome", "available_date"])
+    return pd.concat(frames, ignore_index=True)
+
+
+def panel_features(panel):
+    """분기 패널에 영업이익률(opm), 전년 동기 대비 이익률 변화(opm_yoy), 매출 증가율(revenue_yoy)을 더합니다."""
+    panel = panel.copy()
+    revenue = panel["Revenue"].astype("float64")
+    panel["opm"] = np.where(revenue > 0, panel["OpIncome"] / revenue.where(revenue > 0), np.nan)
+    last_year = panel[["ticker", "Year", "Quarter", "opm", "Revenue"]].assign(Year=panel["Year"] + 1)
+    merged = panel.merge(last_year, on=["ticker", "Year", "Quarter"], how="left", suffixes=("", "_ly"))
+    panel["opm_yoy"] = (merged["opm"] - merged["opm_ly"]).to_numpy()
+    prev_revenue = merged["Revenue_ly"].astype("float64")
+    panel["revenue_yoy"] = np.where(prev_revenue > 0, merged["Revenue"] / prev_revenue.where(prev_revenue > 0) - 1, np.nan)
+    return panel
+
+
+FEATURES = ("opm", "opm_yoy", "revenue_yoy")
+
+
+def align_features(panel, dates, tickers) -> dict:
+    """
+    분기별 피처 값을 접수일 다음 거래일부터 다음 보고서 전까지 유지되는 (거래일 × 종목) 배열로 만듭니다.
+    접수일 당일 장 마감 후 공시될 수 있으므로 당일에는 쓰지 않습니다.
+    """
+    dates = np.asarray(dates).astype("datetime64[ns]")
+    column = {t: i for i, t in enumerate(tickers)}
+    panel = panel[panel["ticker"].isin(column)].sort_values(["Year", "Quarter"])
+    rows = np.searchsorted(dates, panel["available_date"].to_numpy().astype("datetime64[ns]"), side="right")
+    panel = panel.assign(row=rows, col=panel["ticker"].map(column).to_numpy())
+    # 범위 밖(데이터 마지막 날 이후 공시)은 버리고, 같은 날 여러 분기가 쓸 수 있게 되면 최신 분기만 남김
+    panel = panel[panel["row"] < len(dates)].drop_duplicates(["row", "col"], keep="last")
+    rows, cols = panel["row"].to_numpy(), panel["col"].to_numpy()
+
+    aligned = {}
+    for name in FEATURES:
+        values = np.full((len(dates), len(tickers)), np.nan)
+        values[rows, cols] = panel[name].to_numpy(dtype="float64")
+        aligned[name] = _ffill_events(values, rows, cols)
+    return aligned
+
+
+def _ffill_events(values, rows, cols):
+    """공시가 있던 칸(값이 NaN이어도)을 기준으로 다음 공시 전까지 값을 유지합니다."""
+    events = np.zeros(values.shape, dtype=bool)
+    events[rows, cols] = True
+    index = np.where(events, np.arange(values.shape[0])[:, None], 0)
+    np.maximum.accumulate(index, axis=0, out=index)
+    filled = values[index, np.arange(values.shape[1])]
+    filled[~np.maximum.accumulate(events, axis=0)] = np.nan
+    return filled
+
+
+def build_backtest_data(panel, matrix) -> BacktestData:
+    """분기 패널과 PriceMatrix로 BacktestData를 만듭니다."""
+    features = align_features(panel_features(panel), matrix.dates, matrix.tickers)
+    return BacktestData(matrix.dates, matrix.tickers, ffill(matrix.close), features)
+
+
+def load_backtest_data(handler, tickers_by_corp: dict, start: str, end: str = None, cache=None,
+                       workers: int = 8) -> BacktestData:
+    """시세(price_store)와 분기 패널(DART, 전년 동기 비교를 위해 1년 앞부터)을 불러 BacktestData를 만듭니다."""
+    from price_store import load_price_matrix
+    end_year = int((end or datetime.date.today().isoformat())[:4])
+    matrix = load_price_matrix(list(tickers_by_corp.values()), start, end, cache, workers=workers)
+    panel = load_fundamental_panel(handler, tickers_by_corp, int(start[:4]) - 1, end_year, workers=workers)
+    return build_backtest_data(panel, matrix)
+
+
+# ──────────────────────────────────────────────
+# 전략 (보유 조건 배열)
+# ──────────────────────────────────────────────
+def _above_ma(close, window: int):
+    if not window:
+        return np.ones(close.shape, dtype=bool)
+    return close > rolling_mean(close, window)
+
+
+def opm_turnaround(data, opm_yoy_min: float = 0.0, ma_window: int = 0):
+    """분기 영업이익률이 전년 동기보다 opm_yoy_min(%p/100) 넘게 개선된 종목 (선택: 종가가 ma_window일선 위)"""
+    return (data.features["opm_yoy"] > opm_yoy_min) & _above_ma(data.close, ma_window)
+
+
+def revenue_growth(data, revenue_yoy_min: float = 0.2, opm_min: float = 0.0, ma_window: int = 0):
+    """매출이 전년 동기 대비 revenue_yoy_min 이상 늘고 영업이익률이 opm_min 이상인 종목"""
+    f = data.features
+    return (f["revenue_yoy"] >= revenue_yoy_min) & (f["opm"] >= opm_min) & _above_ma(data.close, ma_window)
+
+
+STRATEGIES = {
+    "opm_turnaround": opm_turnaround,
+    "revenue_growth": revenue_growth,
+}
+
+
+# ──────────────────────────────────────────────
+# 평가
+# ──────────────────────────────────────────────
+def evaluate(data, holdings, rebalance: int = DEFAULT_REBALANCE, cost_bps: float = DEFAULT_COST_BPS) -> dict:
+    """
+    보유 조건 배열로 동일 비중 포트폴리오를 평가합니다.
+    t일 종가에 정한 비중으로 t+1일 수익률을 얻고, rebalance 거래일마다 비중을 다시 정합니다.
+    """
+    close = data.close
+    holdings = holdings & ~np.isnan(close)
+    count = holdings.sum(axis=1)
+    weights = np.where(count[:, None] > 0, holdings / np.maximum(count, 1)[:, None], 0.0)
+    if rebalance > 1:
+        weights = weights[(np.arange(len(weights)) // rebalance) * rebalance]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        returns = np.nan_to_num(close[1:] / close[:-1] - 1, nan=0.0, posinf=0.0, neginf=0.0)
+    turnover = np.abs(np.diff(weights, axis=0, prepend=0.0)).sum(axis=1)[:-1]
+    daily = (weights[:-1] * returns).sum(axis=1) - turnover * cost_bps / 1e4
+
+    equity = np.cumprod(1 + daily)
+    years = len(daily) / TRADING_DAYS
+    std = daily.std()
+    return {
+        "total_return": float(equity[-1] - 1) if len(equity) else 0.0,
+        "cagr": float(equity[-1] ** (1 / years) - 1) if years > 0 and equity[-1] > 0 else float("nan"),
+        "volatility": float(std * np.sqrt(TRADING_DAYS)),
+        "sharpe": float(daily.mean() / std * np.sqrt(TRADING_DAYS)) if std > 0 else float("nan"),
+        "max_drawdown": float((equity / np.maximum.accumulate(equity) - 1).min()) if len(equity) else 0.0,
+        "avg_holdings": float(count.mean()),
+        "annual_turnover": float(turnover.sum() / years) if years > 0 else 0.0,
+    }
+
+
+def backtest(data, strategy: str, params: dict) -> dict:
+    """전략 하나·파라미터 한 세트를 평가합니다. params에는 전략 인자와 rebalance/cost_bps를 함께 넣을 수 있습니다."""
+    if strategy not in STRATEGIES:
+        raise ValueError(f"지원하지 않는 전략입니다: {strategy}")
+    rule_params = {k: v for k, v in params.items() if k not in EVAL_PARAMS}
+    eval_params = {k: v for k, v in params.items() if k in EVAL_PARAMS}
+    return evaluate(data, STRATEGIES[strategy](data, **rule_params), **eval_params)
+
+
+def param_grid(grid: dict) -> list:
+    """{"a": [1, 2], "b": [3]} → [{"a": 1, "b": 3}, {"a": 2, "b": 3}]"""
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def _result_key(data, strategy: str, params: dict) -> str:
+    digest = hashlib.sha1(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+    return f"backtest:{data.fingerprint}:{strategy}:{digest}"
+
+
+# 프로세스 풀 워커마다 한 번만 받는 데이터 (작업마다 배열을 다시 보내지 않음)
+_worker_data = None
+
+
+def _init_worker(data):
+    global _worker_data
+    _worker_data = data
+
+
+def _run_in_worker(task):
+    strategy, params = task
+    return backtest(_worker_data, strategy, params)
+
+
+def run_grid(data, strategy: str, grid: dict, workers: int = 1, cache=None) -> pd.DataFrame:
+    """
+    파라미터 그리드의 모든 조합을 평가해 (파라미터 + 성과 지표) 표를 샤프 지수 순으로 반환합니다.
+    cache(DataCache)에 같은 데이터·전략·파라미터 결과가 있으면 다시 계산하지 않습니다.
+    """
+    param_sets = param_grid(grid)
+    results = [None] * len(param_sets)
+    if cache is not None:
+        for i, params in enumerate(param_sets):
+            results[i] = cache.get(_result_key(data, strategy, params))
+            metrics.record_cache(hit=results[i] is not None, cache="backtest")
+    pending = [i for i, r in enumerate(results) if r is None]
+
+    started = time.perf_counter()
+    if workers > 1 and len(pending) > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(data,)) as pool:
+            computed = list(pool.map(_run_in_worker, [(strategy, param_sets[i]) for i in pending]))
+    else:
+        computed = [backtest(data, strategy, param_sets[i]) for i in pending]
+    metrics.registry.observe("backtest_grid_seconds", time.perf_counter() - started, strategy=strategy)
+
+    for i, result in zip(pending, computed):
+        results[i] = result
+        if cache is not None:
+            cache.set(_result_key(data, strategy, param_sets[i]), result, RESULT_TTL)
+
+    table = pd.DataFrame([{**p, **r} for p, r in zip(param_sets, results)])
+    return table.sort_values("sharpe", ascending=False, na_position="last").reset_index(drop=True)
+
+
+def _parse_grid(items) -> dict:
+    grid = {}
+    for item in items or []:
+        name, _, values = item.partition("=")
+        grid[name.strip()] = [json.loads(v) for v in values.split(",")]
+    return grid
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="재무 + 주가 조건 전략을 전 종목에 대해 백테스트합니다.")
+    parser.add_argument("--strategy", choices=sorted(STRATEGIES), default="opm_turnaround")
+    parser.add_argument("--start", default=f"{datetime.date.today().year - 4}-01-01", help="시작일 (YYYY-MM-DD)")
+    parser.add_argument("--end", default=None, help="종료일 (기본: 오늘)")
+    parser.add_argument("--grid", action="append", metavar="NAME=V1,V2",
+                        help="파라미터 그리드 (여러 번 지정, 값은 JSON 숫자)")
+    parser.add_argument("--top", type=int, default=None, help="시가총액 상위 N개 종목만 (기본: 전 종목)")
+    parser.add_argument("--workers", type=int, default=1, help="그리드 평가 프로세스 수")
+    args = parser.parse_args(argv)
+
+    from data_cache import DataCache
+    from dart_handler import DartHandler
+    from price_store import load_market_snapshot
+
+    cache = DataCache()
+    snapshot = load_market_snapshot(cache)
+    if args.top:
+        snapshot = snapshot.nlargest(args.top, "Marcap")
+    handler = DartHandler(cache=cache)
+    tickers_by_corp = handler.listed_corp_codes(snapshot.index).to_dict()
+
+    started = time.perf_counter()
+    data = load_backtest_data(handler, tickers_by_corp, args.start, args.end, cache)
+    print(f"{data} 준비 {time.perf_counter() - started:.1f}초")
+
+    started = time.perf_counter()
+    table = run_grid(data, args.strategy, _parse_grid(args.grid), workers=args.workers, cache=cache)
+    print(table.to_string(index=False, float_format=lambda v: f"{v:,.3f}"))
+    print(f"=== {len(table)}개 조합 {time.perf_counter() - started:.1f}초 ===")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
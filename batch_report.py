@@ -0,0 +1,245 @@
+"""
+batch_report.py
+여러 기업의 재무 리포트(CSV + 차트 + 선택적 Gemini 요약)를 일괄 생성하는 CLI
+
+- DART 조회·CSV 저장·Gemini 호출(I/O)은 스레드 풀, 차트 렌더링(CPU)은 프로세스 풀에서 실행합니다.
+- 완료된 기업은 체크포인트 파일에 기록되므로, 중단 후 다시 실행하면 남은 기업부터 이어서 처리합니다.
+
+사용 예)
+    python batch_report.py 삼성전자 SK하이닉스
+    python batch_report.py --file companies.txt --gemini
+    python batch_report.py --market KOSDAQ --start-year 2021 --io-workers 8
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import datetime
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import dart_http
+from dart_handler import DartHandler
+from data_cache import DataCache
+from financials import load_quarterly_financials, add_yoy
+from chart_renderer import render_financial_chart, FORMATS, PRESETS
+
+DEFAULT_OUT_DIR = "reports"
+
+# 다시 실행해도 건너뛰는 체크포인트 상태 (no_data는 DART가 "데이터 없음"으로 답한 경우만 기록)
+DONE_STATUSES = ("ok", "no_data")
+
+
+def load_company_names(args) -> list:
+    """명령행 인자 / 파일 / 시장 구분에서 처리할 기업명 목록을 만듭니다."""
+    names = list(args.companies)
+    if args.file:
+        with open(args.file, encoding="utf-8") as f:
+            names += [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    if args.market:
+        import FinanceDataReader as fdr
+        listing = fdr.StockListing(args.market)
+        names += listing["Name"].dropna().tolist()
+    # 순서를 유지한 채 중복 제거
+    return list(dict.fromkeys(names))
+
+
+def safe_filename(name: str) -> str:
+    return re.sub(r'[\\/:*?"<>|\s]+', "_", name).strip("_")
+
+
+def read_checkpoint(path) -> set:
+    """
+    체크포인트 파일에서 이미 끝난 기업명 집합을 읽습니다.
+    기업별 마지막 기록이 ok 또는 no_data인 기업만 끝난 것으로 보고, 오류(error:*)로 끝난 기업은 다시 처리합니다.
+    """
+    last = {}
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+                last[record["corp_name"]] = record.get("status")
+            except (ValueError, KeyError):
+                continue  # 중단 시 마지막 줄이 잘렸을 수 있음
+    return {name for name, status in last.items() if status in DONE_STATUSES}
+
+
+def append_checkpoint(path, record: dict):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+# ──────────────────────────────────────────────
+# 단계별 작업
+# ──────────────────────────────────────────────
+def fetch_company(handler, corp_name, start_year, end_year, out_dir):
+    """
+    (I/O) DART 조회 → 분기 실적 가공 → CSV 저장. 데이터가 없으면 None.
+    DART 요청이 하나라도 실패하면 예외를 내 error:fetch로 기록합니다. (다시 실행할 때 재시도)
+    한 분기만 빠져도 다음 분기가 누적값 그대로 분기 실적이 되므로, 일부만 받은 표는 저장하지 않습니다.
+    """
+    corp_code = handler.find_corp_code(corp_name)
+    if not corp_code:
+        return None
+    failures = dart_http.failed_requests()
+    df = load_quarterly_financials(handler, corp_code, start_year, end_year)
+    if dart_http.failed_requests() > failures:
+        raise RuntimeError("DART 요청 실패로 일부 재무 데이터를 받지 못했습니다.")
+    if df.empty:
+        return None
+    df = add_yoy(df)
+    csv_file = os.path.join(out_dir, f"{safe_filename(corp_name)}_financials.csv")
+    df.to_csv(csv_file, index=False, encoding="utf-8-sig")
+    return corp_code, df
+
+
+def summarize_company(gemini, handler, corp_name, corp_code, df, out_dir):
+    """(I/O) 피처 시트 기반 Gemini 요약을 마크다운으로 저장합니다. 할당량 초과 등 오류 응답이면 예외(error:summary)."""
+    from context_builder import build_feature_sheet
+    from gemini_handler import is_error_reply
+
+    try:
+        disclosures = handler.get_recent_disclosures(corp_code, count=10)
+    except Exception:
+        disclosures = None
+    sheet = build_feature_sheet(corp_name, df, disclosures)
+    summary = gemini.analyze_stock(corp_name, {}, context=sheet)
+    if is_error_reply(summary):
+        raise RuntimeError(summary.splitlines()[0] if summary else "Gemini 응답 없음")
+    md_file = os.path.join(out_dir, f"{safe_filename(corp_name)}_summary.md")
+    with open(md_file, "w", encoding="utf-8") as f:
+        f.write(f"# {corp_name}\n\n{summary}\n")
+    return md_file
+
+
+# ──────────────────────────────────────────────
+# 배치 실행
+# ──────────────────────────────────────────────
+def run_batch(names, out_dir, start_year, end_year, io_workers=4, render_workers=None,
+              checkpoint=None, use_gemini=False, fmt="png", preset="telegram"):
+    os.makedirs(out_dir, exist_ok=True)
+    checkpoint = checkpoint or os.path.join(out_dir, "checkpoint.jsonl")
+
+    done = read_checkpoint(checkpoint)
+    todo = [n for n in names if n not in done]
+    print(f"전체 {len(names)}개 중 {len(done & set(names))}개 완료됨, {len(todo)}개 처리 시작")
+
+    cache = DataCache()
+    handler = DartHandler(cache=cache)
+    gemini = None
+    if use_gemini:
+        from gemini_handler import GeminiHandler
+        gemini = GeminiHandler(cache=cache)
+
+    started = time.perf_counter()
+    completed = 0
+    pending = {}        # future → (stage, corp_name)
+    remaining = {}      # corp_name → 남은 단계 수
+    queue = iter(todo)
+
+    def finish(corp_name, status):
+        nonlocal completed
+        completed += 1
+        append_checkpoint(checkpoint, {
+            "corp_name": corp_name,
+            "status": status,
+            "finished_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        })
+        elapsed_min = (time.perf_counter() - started) / 60
+        rate = completed / elapsed_min if elapsed_min else 0.0
+        print(f"[{completed}/{len(todo)}] {corp_name}: {status} ({rate:.1f}개/분)")
+
+    with ThreadPoolExecutor(max_workers=io_workers) as io_pool, \
+         ProcessPoolExecutor(max_workers=render_workers) as render_pool:
+
+        def submit_next():
+            corp_name = next(queue, None)
+            if corp_name is None:
+                return
+            fut = io_pool.submit(fetch_company, handler, corp_name, start_year, end_year, out_dir)
+            pending[fut] = ("fetch", corp_name)
+
+        # 조회 단계는 I/O 워커 수의 2배까지만 미리 넣어 메모리 사용량을 제한
+        for _ in range(io_workers * 2):
+            submit_next()
+
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                stage, corp_name = pending.pop(fut)
+                try:
+                    result = fut.result()
+                except Exception as e:
+                    print(f"{corp_name} {stage} 단계 오류: {e}")
+                    remaining.pop(corp_name, None)
+                    finish(corp_name, f"error:{stage}")
+                    if stage == "fetch":
+                        submit_next()
+                    continue
+
+                if stage == "fetch":
+                    submit_next()
+                    if result is None:
+                        finish(corp_name, "no_data")
+                        continue
+                    corp_code, df = result
+                    chart_file = os.path.join(out_dir, f"{safe_filename(corp_name)}_financials.{fmt}")
+                    fut = render_pool.submit(render_financial_chart, df, corp_name, chart_file, fmt, preset)
+                    pending[fut] = ("render", corp_name)
+                    remaining[corp_name] = 1
+                    if gemini is not None:
+                        pending[io_pool.submit(summarize_company, gemini, handler, corp_name, corp_code, df, out_dir)] = ("summary", corp_name)
+                        remaining[corp_name] += 1
+                    continue
+
+                if corp_name in remaining:
+                    remaining[corp_name] -= 1
+                    if remaining[corp_name] == 0:
+                        del remaining[corp_name]
+                        finish(corp_name, "ok")
+
+    elapsed = time.perf_counter() - started
+    rate = completed / (elapsed / 60) if elapsed else 0.0
+    print(f"=== 완료: {completed}개 / {elapsed:.1f}초 — 처리량 {rate:.1f}개/분 ===")
+    return completed, elapsed
+
+
+def main(argv=None):
+    current_year = datetime.datetime.now().year
+    parser = argparse.ArgumentParser(description="여러 기업의 재무 리포트를 일괄 생성합니다.")
+    parser.add_argument("companies", nargs="*", help="기업명 (예: 삼성전자)")
+    parser.add_argument("--file", help="기업명 목록 파일 (한 줄에 하나)")
+    parser.add_argument("--market", help="시장 전체 (KOSPI, KOSDAQ, KONEX 등 FinanceDataReader 구분)")
+    parser.add_argument("--start-year", type=int, default=current_year - 4)
+    parser.add_argument("--end-year", type=int, default=current_year)
+    parser.add_argument("--out", default=DEFAULT_OUT_DIR, help="출력 폴더")
+    parser.add_argument("--io-workers", type=int, default=4, help="DART/Gemini 호출 스레드 수")
+    parser.add_argument("--render-workers", type=int, default=None, help="차트 렌더링 프로세스 수 (기본: CPU 수)")
+    parser.add_argument("--checkpoint", help="체크포인트 파일 (기본: <out>/checkpoint.jsonl)")
+    parser.add_argument("--gemini", action="store_true", help="Gemini 요약 리포트도 생성")
+    parser.add_argument("--format", choices=sorted(FORMATS), default="png", help="차트 이미지 형식")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="telegram", help="차트 크기 프리셋")
+    args = parser.parse_args(argv)
+
+    names = load_company_names(args)
+    if not names:
+        parser.error("기업명, --file 또는 --market 중 하나는 지정해야 합니다.")
+
+    run_batch(
+        names, args.out, args.start_year, args.end_year,
+        io_workers=args.io_workers,
+        render_workers=args.render_workers,
+        checkpoint=args.checkpoint,
+        use_gemini=args.gemini,
+        fmt=args.format,
+        preset=args.preset,
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
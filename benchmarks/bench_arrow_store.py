@@ -0,0 +1,86 @@
+"""
+bench_arrow_store.py
+프로세스 간 공유 데이터셋 (arrow_store.py)
+
+시장 전체 규모 시세 배열(BENCH_SCAN_TICKERS × BENCH_SCAN_DAYS)을 게시한 뒤, 새 ArrowStore로 메모리 매핑해 읽는 시간과
+DataCache(pickle)에서 복사본을 푸는 시간을 비교하고, 버전 교체 중에도 이전 버전을 읽던 쪽이 깨지지 않는지 확인합니다.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from arrow_store import ArrowStore, KEEP_VERSIONS
+from bench_valuation import _seed_market
+from data_cache import DataCache
+from price_store import PriceMatrix
+from valuation import ValuationEngine, SHARED_TABLE
+
+TICKERS = int(os.getenv("BENCH_SCAN_TICKERS", "2500"))
+DAYS = int(os.getenv("BENCH_SCAN_DAYS", "500"))
+
+
+@pytest.fixture(scope="module")
+def matrix():
+    rng = np.random.default_rng(0)
+    close = 10_000 * np.exp(np.cumsum(rng.normal(0, 0.02, (DAYS, TICKERS)), axis=0))
+    close[:100, -50:] = np.nan
+    dates = pd.bdate_range("2024-01-01", periods=DAYS).to_numpy()
+    return PriceMatrix(dates, [f"{i:06d}" for i in range(TICKERS)], close, np.ones_like(close))
+
+
+def bench_read_matrix_mmap(benchmark, matrix, tmp_path):
+    """새 프로세스가 처음 읽는 상황 (매번 새 ArrowStore) — 배열 복사 없이 매핑"""
+    ArrowStore(str(tmp_path)).publish_matrix("prices", matrix)
+
+    def read():
+        before = pa.total_allocated_bytes()
+        mapped = ArrowStore(str(tmp_path)).read_matrix("prices")
+        return mapped, pa.total_allocated_bytes() - before
+
+    mapped, allocated = benchmark(read)
+    benchmark.extra_info.update(megabytes=matrix.close.nbytes * 2 / 1e6, arrow_allocated=allocated)
+    assert allocated == 0 and not mapped.close.flags.writeable
+    assert np.array_equal(mapped.close, matrix.close, equal_nan=True) and mapped.tickers == matrix.tickers
+
+
+def bench_read_matrix_pickle_baseline(benchmark, matrix, tmp_path):
+    """비교용: DataCache(pickle)에서 프로세스마다 복사본을 푸는 기존 방식"""
+    cache = DataCache(str(tmp_path / "cache.db"))
+    cache.set("prices", matrix)
+    loaded = benchmark(cache.get, "prices")
+    assert loaded.close.flags.writeable  # 프로세스마다 별도 복사본
+
+
+def bench_version_swap(benchmark, tmp_path):
+    """새 버전 게시 후 바뀐 데이터셋만 다시 매핑, 이전 버전을 읽던 객체는 그대로 유효"""
+    writer, reader = ArrowStore(str(tmp_path)), ArrowStore(str(tmp_path))
+    frame = pd.DataFrame({"per": [1.0, np.nan], "sector": pd.Categorical(["a", "b"])},
+                         index=pd.Index(["000001", "000002"], name="stock_code"))
+    writer.publish_frame("table", frame, {"refreshed_at": 1.0})
+    old = reader.read_frame("table")
+    assert reader.read_frame("table") is old and old.attrs["refreshed_at"] == 1.0
+
+    def publish_and_read():
+        writer.publish_frame("table", frame.assign(per=frame["per"] * 2), {"refreshed_at": 2.0})
+        return reader.read_frame("table")
+
+    new = benchmark.pedantic(publish_and_read, rounds=KEEP_VERSIONS + 3)
+    assert new is not old and new.attrs["refreshed_at"] == 2.0 and new.loc["000001", "per"] == 2.0
+    assert old.loc["000001", "per"] == 1.0 and np.isnan(new.loc["000002", "per"])
+    assert len([f for f in os.listdir(tmp_path) if f.endswith(".arrow")]) == KEEP_VERSIONS
+
+
+def bench_valuation_lookup_from_shared(benchmark, cached_dart_handler, tmp_path):
+    """봇 워커는 DataCache에 표가 없어도 게시된 공유 표를 매핑해 답함"""
+    shared = ArrowStore(str(tmp_path / "shared"))
+    _seed_market(cached_dart_handler.cache, cached_dart_handler.dart.corp_codes)
+    ValuationEngine(cached_dart_handler.cache, shared=shared).refresh(cached_dart_handler)
+    assert shared.current_version(SHARED_TABLE)
+
+    worker = ValuationEngine(DataCache(str(tmp_path / "empty.db")), shared=ArrowStore(shared.root))
+    found = benchmark(worker.lookup, "005930")
+    assert found["corp_code"] == "00126380" and found["pbr"] > 0
+    assert worker.rank(found["sector"], "pbr", 3)
@@ -0,0 +1,127 @@
+"""
+bench_backtest.py
+재무 + 주가 조건 전략 백테스트 (backtest.py)
+
+무작위 보행 시세와 무작위 분기 실적(접수일은 분기 말 + 30~45일)으로 만든 시장 전체 규모 데이터
+(BENCH_BACKTEST_TICKERS × BENCH_BACKTEST_DAYS)에서 정렬·전략·그리드 평가를 측정하고,
+공시 접수일 전에 실적을 쓰는 미래 참조가 없는지 확인합니다.
+"""
+import os
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest import (BacktestData, build_backtest_data, align_features, panel_features, company_panel,
+                      evaluate, backtest, run_grid, FEATURES)
+from data_cache import DataCache
+from price_store import PriceMatrix
+
+TICKERS = int(os.getenv("BENCH_BACKTEST_TICKERS", "2000"))
+DAYS = int(os.getenv("BENCH_BACKTEST_DAYS", "750"))
+SAMSUNG = "00126380"
+
+GRID = {"opm_yoy_min": [0.0, 0.01, 0.03], "ma_window": [0, 60], "rebalance": [5, 20]}
+
+
+def _synthetic_panel(tickers, dates, rng):
+    """분기마다 종목별 매출·영업이익 (접수일: 분기 말 + 30~45일)"""
+    quarters = [(y, q) for y in range(dates[0].year - 1, dates[-1].year + 1) for q in range(1, 5)]
+    rows = len(tickers) * len(quarters)
+    years = np.repeat([y for y, _ in quarters], len(tickers))
+    qs = np.repeat([q for _, q in quarters], len(tickers))
+    quarter_end = pd.to_datetime({"year": years, "month": qs * 3, "day": 1}) + pd.offsets.MonthEnd(0)
+    revenue = rng.integers(10**9, 10**12, rows)
+    return pd.DataFrame({
+        "ticker": np.tile(tickers, len(quarters)), "Year": years, "Quarter": qs,
+        "Revenue": revenue, "OpIncome": (revenue * rng.normal(0.05, 0.08, rows)).astype("int64"),
+        "NetIncome": (revenue * rng.normal(0.03, 0.08, rows)).astype("int64"),
+        "available_date": quarter_end + pd.to_timedelta(rng.integers(30, 46, rows), unit="D"),
+    })
+
+
+@pytest.fixture(scope="module")
+def market():
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range("2023-01-02", periods=DAYS)
+    tickers = [f"{i:06d}" for i in range(TICKERS)]
+    close = 10_000 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, (DAYS, TICKERS)), axis=0))
+    close[:120, -50:] = np.nan  # 신규 상장
+    matrix = PriceMatrix(dates.to_numpy(), tickers, close, np.ones_like(close))
+    return _synthetic_panel(tickers, dates, rng), matrix
+
+
+@pytest.fixture(scope="module")
+def data(market):
+    return build_backtest_data(*market)
+
+
+def bench_build_backtest_data(benchmark, market):
+    """분기 패널 → (거래일 × 종목) 피처 배열 정렬"""
+    result = benchmark.pedantic(build_backtest_data, args=market, rounds=3)
+    benchmark.extra_info.update(days=DAYS, tickers=TICKERS, quarters=len(market[0]))
+    assert set(result.features) == set(FEATURES)
+    assert result.features["opm"].shape == (DAYS, TICKERS)
+
+
+def bench_no_lookahead(benchmark):
+    """접수일 당일 주가가 뛰어도 전략은 다음 거래일부터만 보유하므로 그 상승을 얻지 못함"""
+    dates = pd.bdate_range("2024-01-01", periods=120)
+    filed = dates[60]
+    close = np.full((len(dates), 1), 10_000.0)
+    close[60:] = 15_000.0  # 접수일 종가에 +50%
+    panel = pd.DataFrame({
+        "ticker": ["000001"] * 2, "Year": [2023, 2024], "Quarter": [1, 1],
+        "Revenue": [100, 100], "OpIncome": [1, 20], "NetIncome": [1, 1],
+        "available_date": [pd.Timestamp("2023-05-15"), filed],
+    })
+    matrix = PriceMatrix(dates.to_numpy(), ["000001"], close, np.ones_like(close))
+    data = build_backtest_data(panel, matrix)
+    assert np.isnan(data.features["opm_yoy"][60, 0]) and data.features["opm_yoy"][61, 0] > 0
+
+    result = benchmark(backtest, data, "opm_turnaround", {"rebalance": 1, "cost_bps": 0})
+    assert result["total_return"] == pytest.approx(0.0)
+
+    # 같은 조건을 하루 앞당겨(미래 참조) 보유하면 상승을 그대로 얻는 것과 대조
+    peeked = np.roll(data.features["opm_yoy"] > 0, -2, axis=0)
+    assert evaluate(data, peeked, rebalance=1, cost_bps=0)["total_return"] == pytest.approx(0.5)
+
+
+def bench_backtest_single(benchmark, data):
+    """전 종목 전략 한 번 (조건 배열 + 포트폴리오 평가)"""
+    result = benchmark(backtest, data, "revenue_growth", {"revenue_yoy_min": 0.2, "ma_window": 60})
+    benchmark.extra_info.update(result)
+    assert result["avg_holdings"] > 0 and result["max_drawdown"] <= 0
+
+
+def bench_run_grid_process_pool(benchmark, data):
+    table = benchmark.pedantic(run_grid, args=(data, "opm_turnaround", GRID), kwargs={"workers": 2}, rounds=1)
+    assert len(table) == 12
+    serial = run_grid(data, "opm_turnaround", GRID)
+    assert table.sort_values(list(GRID)).reset_index(drop=True).equals(
+        serial.sort_values(list(GRID)).reset_index(drop=True))
+
+
+def bench_run_grid_cached(benchmark, data, tmp_path):
+    """같은 데이터 지문·파라미터는 캐시에서 (재실행)"""
+    cache = DataCache(str(tmp_path / "cache.db"))
+    first = run_grid(data, "opm_turnaround", GRID, cache=cache)
+    table = benchmark(run_grid, data, "opm_turnaround", GRID, cache=cache)
+    assert table.equals(first)
+
+    changed = BacktestData(data.dates, data.tickers, data.close * 1.01, data.features)
+    assert changed.fingerprint != data.fingerprint
+
+
+def bench_company_panel_filing_dates(benchmark, cached_dart_handler):
+    """Fake DART 분기 실적 + 공시 목록 접수일 (캐시 적중 후)"""
+    company_panel(cached_dart_handler, SAMSUNG, 2023, 2025)
+    panel = benchmark(company_panel, cached_dart_handler, SAMSUNG, 2023, 2025)
+    assert not panel.empty
+    quarter_end = pd.to_datetime({"year": panel["Year"], "month": panel["Quarter"] * 3, "day": 1})
+    assert (panel["available_date"] > quarter_end).all()
+
+    features = align_features(panel_features(panel.assign(ticker="005930")),
+                              pd.bdate_range("2023-01-02", datetime.date(2025, 12, 31)).to_numpy(), ["005930"])
+    assert not np.isnan(features["opm"][-1, 0])
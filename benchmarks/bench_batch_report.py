@@ -0,0 +1,41 @@
+"""
+bench_batch_report.py
+일괄 리포트 조회 단계 (batch_report.py)
+
+분기 보고서 하나만 DART 오류(HTTP 429)로 빠져도 일부만 받은 표를 저장하지 않고 error:fetch로 남겨
+다시 실행할 때 재시도되는지 확인합니다. (빠진 분기 다음 분기는 누적값이 분기 실적으로 잘못 저장되므로)
+"""
+import os
+
+import pytest
+
+from batch_report import fetch_company
+
+
+def bench_fetch_company(benchmark, dart_handler, tmp_path):
+    corp_code, df = benchmark(fetch_company, dart_handler, "삼성전자", 2023, 2025, str(tmp_path))
+    assert corp_code == "00126380" and len(df) == 12
+    assert os.path.exists(tmp_path / "삼성전자_financials.csv")
+
+
+def bench_fetch_company_partial_failure(benchmark, dart_handler, fake_dart, monkeypatch, tmp_path):
+    original = fake_dart.respond
+    failed = []
+
+    def respond(endpoint, params):
+        # 2024년 반기보고서 한 번만 한도 초과
+        if endpoint == "fnlttSinglAcnt.json" and params.get("bsns_year") == "2024" \
+                and params.get("reprt_code") == "11012" and not failed:
+            failed.append(params)
+            return 429, "application/json", b'{"status": "020", "message": "rate limit"}'
+        return original(endpoint, params)
+
+    monkeypatch.setattr(fake_dart, "respond", respond)
+
+    def fetch():
+        failed.clear()
+        with pytest.raises(RuntimeError):
+            fetch_company(dart_handler, "삼성전자", 2023, 2025, str(tmp_path))
+
+    benchmark.pedantic(fetch, rounds=3)
+    assert failed and not os.path.exists(tmp_path / "삼성전자_financials.csv")
@@ -0,0 +1,52 @@
+"""
+bench_bot.py
+텔레그램 명령 핸들러 종단 간 지연 (Fake DART + Gemini 스텁)
+"""
+from conftest import make_update, run
+
+
+def bench_cmd_stock(benchmark, bot):
+    def call():
+        update, context, sent = make_update("/stock 삼성전자")
+        run(bot.cmd_stock(update, context))
+        return sent
+
+    sent = benchmark(call)
+    assert any("분석 리포트 —" in msg for msg in sent)
+
+
+def bench_cmd_stock_precomputed(benchmark, bot, monkeypatch):
+    """야간 작업(precompute_reports.py)이 만든 리포트로 바로 응답하는 경로"""
+    from precompute_reports import run_precompute
+
+    update, context, _ = make_update("/stock 삼성전자")
+    run(bot.cmd_stock(update, context))  # 요청 빈도 기록
+    run_precompute(top_n=10, reports=bot.reports, dart=bot._dart, gemini=bot._gemini)
+    monkeypatch.setattr(bot, "REPORT_MAX_AGE", 36 * 3600)
+
+    def call():
+        update, context, sent = make_update("/stock 삼성전자")
+        run(bot.cmd_stock(update, context))
+        return sent
+
+    sent = benchmark(call)
+    assert any("기준 분석 리포트입니다" in msg for msg in sent)
+
+
+def bench_cmd_stock_not_found(benchmark, bot):
+    def call():
+        update, context, sent = make_update("/stock 없는회사")
+        run(bot.cmd_stock(update, context))
+        return sent
+
+    sent = benchmark(call)
+    assert "찾을 수 없습니다" in sent[-1]
+
+
+def bench_handle_message(benchmark, bot):
+    def call():
+        update, context, sent = make_update("PER이 뭐야?")
+        run(bot.handle_message(update, context))
+        return sent
+
+    assert benchmark(call)
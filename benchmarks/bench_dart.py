@@ -0,0 +1,39 @@
+"""
+bench_dart.py
+DartHandler 호출 경로 (Fake DART 서버 대상)
+"""
+from fake_dart_server import FakeDartServer
+
+import dart_http
+
+SAMSUNG = "00126380"
+
+
+def bench_find_corp_code(benchmark, dart_handler):
+    assert benchmark(dart_handler.find_corp_code, "삼성전자") == SAMSUNG
+
+
+def bench_get_financial_data_uncached(benchmark, dart_handler):
+    data = benchmark(dart_handler.get_financial_data, SAMSUNG, 2025, "11011")
+    assert data and data.revenue > 0
+
+
+def bench_get_financial_data_cached(benchmark, cached_dart_handler):
+    cached_dart_handler.get_financial_data(SAMSUNG, 2025, "11011")
+    data = benchmark(cached_dart_handler.get_financial_data, SAMSUNG, 2025, "11011")
+    assert data and data.revenue > 0
+
+
+def bench_get_recent_disclosures(benchmark, dart_handler):
+    benchmark(dart_handler.get_recent_disclosures, SAMSUNG)
+
+
+def bench_get_financial_data_with_429(benchmark, dart_handler, fake_dart):
+    """요청의 30%가 HTTP 429(status 020)로 끝나는 상황 — 실패 경로의 비용 확인"""
+    with FakeDartServer(latency=fake_dart.latency, error_rate=0.3, seed=1) as flaky:
+        dart_http.install(flaky.base_url)
+        try:
+            benchmark(dart_handler.get_financial_data, SAMSUNG, 2025, "11011")
+        finally:
+            dart_http.install(fake_dart.base_url)
+    assert flaky.requests["fnlttSinglAcnt.json"] > 0
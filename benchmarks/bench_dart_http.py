@@ -0,0 +1,36 @@
+"""
+bench_dart_http.py
+DART 요청 커넥션 풀 효과 (요청마다 새 연결 vs 공유 keep-alive 세션)
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import dart_http
+
+SAMSUNG = "00126380"
+PERIODS = [(year, code) for year in (2023, 2024, 2025) for code in ("11013", "11012", "11014", "11011")]
+
+
+@pytest.fixture(params=[False, True], ids=["new_connection", "pooled"])
+def pooled(request, fake_dart):
+    dart_http.install(fake_dart.base_url, pooled=request.param)
+    yield request.param
+    dart_http.install(fake_dart.base_url)
+
+
+def bench_bulk_finstate_sequential(benchmark, dart_handler, pooled):
+    """한 기업 3년치 12개 보고서를 차례로 조회 (대시보드 로딩 경로)"""
+    def fetch():
+        return [dart_handler.get_financial_data(SAMSUNG, year, code) for year, code in PERIODS]
+
+    assert all(benchmark(fetch))
+
+
+def bench_bulk_finstate_threads(benchmark, dart_handler, pooled):
+    """8개 스레드가 동시에 조회 (batch_report 경로)"""
+    def fetch():
+        with ThreadPoolExecutor(8) as pool:
+            return list(pool.map(lambda p: dart_handler.get_financial_data(SAMSUNG, *p), PERIODS * 4))
+
+    assert all(benchmark(fetch))
@@ -0,0 +1,53 @@
+"""
+bench_financials.py
+대시보드 load_all_financials에 해당하는 다년도 재무 로딩 (financials.py)
+"""
+from financials import load_cumulative_financials, load_quarterly_financials, to_quarterly, add_yoy
+from context_builder import build_stock_context, build_feature_sheet
+
+SAMSUNG = "00126380"
+
+
+def bench_load_cumulative_financials(benchmark, dart_handler):
+    df = benchmark(load_cumulative_financials, dart_handler, SAMSUNG, 2023, 2025)
+    assert len(df) == 12
+
+
+def bench_load_quarterly_financials_cached(benchmark, cached_dart_handler):
+    load_quarterly_financials(cached_dart_handler, SAMSUNG, 2023, 2025)
+    df = benchmark(load_quarterly_financials, cached_dart_handler, SAMSUNG, 2023, 2025)
+    assert len(df) == 12
+
+
+def bench_to_quarterly(benchmark, dart_handler):
+    raw = load_cumulative_financials(dart_handler, SAMSUNG, 2022, 2026)
+    benchmark(to_quarterly, raw)
+
+
+def bench_build_stock_context(benchmark, dart_handler):
+    sheet = benchmark(build_stock_context, dart_handler, SAMSUNG, "삼성전자")
+    assert "[기업]" in sheet
+
+
+def bench_add_yoy_missing_quarter(benchmark, dart_handler):
+    """중간 분기 하나가 빠져도 YoY는 같은 분기의 전년 값과 비교 (전년 동기가 없으면 NaN)"""
+    df = load_quarterly_financials(dart_handler, SAMSUNG, 2023, 2025)
+    gapped = df[~((df['Year'] == 2024) & (df['Quarter'] == 2))].reset_index(drop=True)
+    result = benchmark(add_yoy, gapped).set_index(['Year', 'Quarter'])
+    expected = add_yoy(df).set_index(['Year', 'Quarter'])
+
+    assert result.loc[(2024, 3), 'Rev_YoY'] == expected.loc[(2024, 3), 'Rev_YoY']
+    assert result.loc[(2025, 1), 'Rev_YoY'] == expected.loc[(2025, 1), 'Rev_YoY']
+    assert result['Rev_YoY'].isna().sum() == 5  # 2023년 4개 분기 + 전년 동기가 빠진 2025년 2분기
+
+
+def bench_feature_sheet_missing_quarter(benchmark, dart_handler):
+    """피처 시트의 분기 매출YoY도 빠진 분기 뒤에서 어긋나지 않음"""
+    df = load_quarterly_financials(dart_handler, SAMSUNG, 2023, 2025)
+    gapped = df[~((df['Year'] == 2024) & (df['Quarter'] == 2))].reset_index(drop=True)
+    full = build_feature_sheet("삼성전자", df, token_budget=10_000).splitlines()
+    sheet = benchmark(build_feature_sheet, "삼성전자", gapped, token_budget=10_000).splitlines()
+
+    period = df.loc[(df['Year'] == 2024) & (df['Quarter'] == 3), 'Period'].iloc[0]
+    assert [l for l in sheet if l.startswith(f"{period}|")] == [l for l in full if l.startswith(f"{period}|")]
+    assert not any(l.startswith(f"{period}|") and l.endswith("|-") for l in sheet)
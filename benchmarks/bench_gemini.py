@@ -0,0 +1,94 @@
+"""
+bench_gemini.py
+GeminiHandler 호출 경로 (스텁 클라이언트 대상)
+"""
+import time
+import asyncio
+
+import pytest
+
+from stubs import StubGeminiClient
+
+from gemini_handler import GeminiHandler, GEMINI_MODEL, is_error_reply
+from data_cache import DataCache
+
+FEATURE_SHEET = "[기업] 삼성전자\n[단위] 억원\n[연간]\n연도|매출|영업이익|순이익\n2025|3,000,000|450,000|360,000"
+FINANCIALS = {"year": 2025, "revenue": 3e14, "op_income": 4.5e13, "net_income": 3.6e13}
+
+
+def bench_chat(benchmark, gemini_handler):
+    reply = benchmark(gemini_handler.chat, 1, "금리 인상이 주식에 미치는 영향이 뭐야?")
+    assert reply
+
+
+def bench_analyze_stock_context_uncached(benchmark, gemini_handler):
+    report = benchmark(gemini_handler.analyze_stock, "삼성전자", FINANCIALS, context=FEATURE_SHEET)
+    assert report
+
+
+def bench_analyze_stock_context_cached(benchmark, stub_client, tmp_path):
+    handler = GeminiHandler(client=stub_client, cache=DataCache(str(tmp_path / "cache.db")))
+    handler.analyze_stock("삼성전자", FINANCIALS, context=FEATURE_SHEET)
+    benchmark(handler.analyze_stock, "삼성전자", FINANCIALS, context=FEATURE_SHEET)
+    assert stub_client.calls == 1
+
+
+def bench_analyze_stock_quota_exhausted(benchmark):
+    handler = GeminiHandler(client=StubGeminiClient(fail_rate=1.0))
+    report = benchmark(handler.analyze_stock, "삼성전자", FINANCIALS)
+    assert "한도" in report
+
+
+def bench_analyze_stock_fallback_model(benchmark):
+    """기본 모델 할당량 소진 → 대체 모델 응답 (소진된 모델은 QUOTA_COOLDOWN 동안 건너뜀)"""
+    stub = StubGeminiClient(fail_models={GEMINI_MODEL})
+    handler = GeminiHandler(client=stub, fallback_models=["gemini-2.0-flash-lite"])
+    report = benchmark(handler.analyze_stock, "삼성전자", FINANCIALS, context=FEATURE_SHEET)
+    assert not is_error_reply(report)
+    assert report.model == "gemini-2.0-flash-lite"
+    assert stub.calls_by_model[GEMINI_MODEL] == 1
+
+
+def _async_batch(handler, requests: int) -> list:
+    """achat을 동시에 requests건 보내고 건별 지연(초)을 반환합니다."""
+    async def one(i):
+        started = time.perf_counter()
+        reply = await handler.achat(i, "금리 인상이 주식에 미치는 영향이 뭐야?")
+        assert not is_error_reply(reply)
+        return time.perf_counter() - started
+
+    async def run():
+        return await asyncio.gather(*(one(i) for i in range(requests)))
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("hedge_after", [0, 0.05])
+def bench_achat_tail_latency(benchmark, hedge_after):
+    """꼬리 지연(10% 호출이 0.5초) 상황에서 헤지 요청 유무에 따른 배치 완료 시간과 p95 지연"""
+    stub = StubGeminiClient(latency=0.01, slow_rate=0.1, slow_latency=0.5, seed=7)
+    handler = GeminiHandler(client=stub, hedge_after=hedge_after)
+    latencies = benchmark.pedantic(_async_batch, args=(handler, 50), rounds=3)
+    p95 = sorted(latencies)[int(len(latencies) * 0.95)]
+    benchmark.extra_info.update(p95_ms=round(p95 * 1000, 1), max_ms=round(max(latencies) * 1000, 1), calls=stub.calls)
+    if hedge_after:
+        # 원 요청과 헤지 요청이 모두 늦는 경우(약 1%)만 0.5초 꼬리에 남음
+        assert p95 < 0.25
+
+
+def bench_achat_timeout_fallback(benchmark):
+    """기본 모델이 제한 시간을 넘기면 대체 모델로 응답"""
+    stub = StubGeminiClient(latency=0.01, slow_rate=1.0, slow_latency=0.3)
+    handler = GeminiHandler(client=stub, timeout=0.05, fallback_models=[])
+    reply = asyncio.run(handler.achat(1, "안녕"))
+    assert "지연" in reply
+
+    class PrimarySlow(StubGeminiClient):
+        def _before_call(self, model):
+            delay = super()._before_call(model)
+            return delay if model == GEMINI_MODEL else self.latency
+
+    stub = PrimarySlow(latency=0.01, slow_rate=1.0, slow_latency=0.3)
+    handler = GeminiHandler(client=stub, timeout=0.05, fallback_models=["gemini-2.0-flash-lite"])
+    reply = benchmark(lambda: asyncio.run(handler.achat(1, "안녕")))
+    assert reply.model == "gemini-2.0-flash-lite"
@@ -0,0 +1,108 @@
+"""
+bench_memory.py
+전 종목·다년도 패널의 메모리 사용량 (DART 원본 문자열 표 vs schema.py 압축 스키마)
+
+픽스처의 재무제표 행을 기업 코드·연도만 바꿔 복제해 시장 전체 규모의 패널을 만듭니다.
+결과의 extra_info에 원본/압축 크기(MB)와 비율이 기록됩니다.
+
+환경변수
+    BENCH_PANEL_CORPS   패널 기업 수 (기본 500)
+    BENCH_PANEL_YEARS   연도 수 (기본 5)
+"""
+import os
+import json
+import tracemalloc
+
+import pandas as pd
+import pytest
+
+from fake_dart_server import FIXTURES_DIR
+from schema import FinancialRecord, compact_finstate, compact_disclosures, compact_panel
+
+PANEL_CORPS = int(os.getenv("BENCH_PANEL_CORPS", "500"))
+PANEL_YEARS = int(os.getenv("BENCH_PANEL_YEARS", "5"))
+REPRT_CODES = ["11013", "11012", "11014", "11011"]
+
+
+def _mb(df) -> float:
+    return df.memory_usage(deep=True).sum() / 1024 / 1024
+
+
+@pytest.fixture(scope="module")
+def template_rows():
+    with open(os.path.join(FIXTURES_DIR, "fnlttSinglAcnt.json"), encoding="utf-8") as f:
+        responses = json.load(f)
+    return next(r["list"] for r in responses.values() if r.get("status") == "000")
+
+
+@pytest.fixture(scope="module")
+def raw_finstate_panel(template_rows):
+    """OpenDartReader.finstate 결과를 이어 붙인 것과 같은 형태의 원본(문자열) 패널"""
+    rows = []
+    for i in range(PANEL_CORPS):
+        corp_code = f"{i:08d}"
+        for year in range(2026 - PANEL_YEARS, 2026):
+            for reprt_code in REPRT_CODES:
+                for row in template_rows:
+                    rows.append({**row, "corp_code": corp_code, "stock_code": f"{i:06d}", "bsns_year": str(year),
+                                 "reprt_code": reprt_code, "rcept_no": f"{year}0315{i:06d}"})
+    return pd.DataFrame(rows)
+
+
+def bench_compact_finstate_panel(benchmark, raw_finstate_panel):
+    """재무제표 패널 압축 (금액 int64, 코드·계정명 category)"""
+    compact = benchmark.pedantic(compact_finstate, args=(raw_finstate_panel,), rounds=3)
+    raw_mb, compact_mb = _mb(raw_finstate_panel), _mb(compact)
+    benchmark.extra_info.update(rows=len(compact), raw_mb=round(raw_mb, 1), compact_mb=round(compact_mb, 1),
+                                ratio=round(raw_mb / compact_mb, 1))
+    assert compact_mb < raw_mb / 2
+
+
+def bench_compact_disclosure_table(benchmark):
+    """공시 목록 압축 (rcept_dt datetime64, 반복 문자열 category)"""
+    with open(os.path.join(FIXTURES_DIR, "list.json"), encoding="utf-8") as f:
+        listing = [row for rows in json.load(f).values() for row in rows]
+    raw = pd.DataFrame(listing * max(1, PANEL_CORPS * PANEL_YEARS * 20 // len(listing)))
+    compact = benchmark(compact_disclosures, raw)
+    benchmark.extra_info.update(rows=len(compact), raw_mb=round(_mb(raw), 1), compact_mb=round(_mb(compact), 1))
+    assert _mb(compact) < _mb(raw)
+
+
+def bench_quarterly_panel(benchmark):
+    """분기 실적 패널 (financials.load_cumulative_financials 결과 형태)"""
+    raw = pd.DataFrame([
+        {"corp_code": f"{i:08d}", "Year": year, "Quarter": q, "Revenue_Acc": 1.0e12 * q,
+         "OpIncome_Acc": 1.0e11 * q, "NetIncome_Acc": 8.0e10 * q, "Period": f"{year}.{q}Q"}
+        for i in range(PANEL_CORPS * 4) for year in range(2026 - PANEL_YEARS, 2026) for q in range(1, 5)
+    ])
+    compact = benchmark(compact_panel, raw)
+    benchmark.extra_info.update(rows=len(compact), raw_mb=round(_mb(raw), 1), compact_mb=round(_mb(compact), 1))
+    assert _mb(compact) < _mb(raw)
+
+
+def _allocated(build) -> int:
+    tracemalloc.start()
+    try:
+        objects = build()
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del objects
+    return size
+
+
+def bench_financial_records(benchmark):
+    """보고서별 결과 객체: dict vs __slots__ 레코드 (객체 수 = 기업 × 연도 × 4개 보고서)"""
+    count = PANEL_CORPS * PANEL_YEARS * len(REPRT_CODES)
+
+    def as_dicts():
+        return [{"revenue": i, "op_income": i, "net_income": i, "details": None} for i in range(count)]
+
+    def as_records():
+        return [FinancialRecord("00126380", 2025, "11011", i, i, i) for i in range(count)]
+
+    dict_bytes = _allocated(as_dicts)
+    records_bytes = benchmark.pedantic(_allocated, args=(as_records,), rounds=3)
+    benchmark.extra_info.update(records=count, dict_mb=round(dict_bytes / 1024 / 1024, 2),
+                                slots_mb=round(records_bytes / 1024 / 1024, 2))
+    assert records_bytes < dict_bytes
@@ -0,0 +1,68 @@
+"""
+bench_sectors.py
+기업 메타데이터 · 업종별 집계 (sectors.py)
+
+기업개황은 Fake DART(company.json)에서, 업종 집계는 bench_valuation의 시장 전체 규모 표로 측정합니다.
+"""
+import asyncio
+
+import numpy as np
+import pandas as pd
+
+from bench_valuation import _seed_market, universe  # noqa: F401 (픽스처)
+from conftest import make_update
+from sectors import refresh_company_meta, sector_map, sector_rollups, load_company_meta
+from valuation import ValuationEngine, compute_valuations
+
+
+def bench_refresh_company_meta_incremental(benchmark, cached_dart_handler):
+    """첫 갱신은 기업개황 조회, 다음 갱신은 저장된 메타 표만 사용"""
+    cache = cached_dart_handler.cache
+    corp_codes = cached_dart_handler.listed_corp_codes(["005930", "000660", "990001", "990002"]).index
+    first = refresh_company_meta(cached_dart_handler, cache, corp_codes)
+    assert first.loc["00126380", "induty_code"] == "264" and first.loc["00126380", "market"] == "KOSPI"
+
+    fetched = []
+    original = cached_dart_handler.get_company_info
+    cached_dart_handler.get_company_info = lambda corp_code: fetched.append(corp_code) or original(corp_code)
+    meta = benchmark(refresh_company_meta, cached_dart_handler, cache, corp_codes)
+    assert not fetched and meta.equals(first)
+    assert len(load_company_meta(cache)) == 4
+
+
+def bench_sector_map_labels(benchmark, cached_dart_handler):
+    """같은 업종코드 기업들이 가장 많이 쓰는 KRX 업종명을 업종 이름으로"""
+    corp_codes = cached_dart_handler.listed_corp_codes(cached_dart_handler.dart.corp_codes["stock_code"]).index
+    meta = refresh_company_meta(cached_dart_handler, cached_dart_handler.cache, corp_codes)
+    krx = pd.Series({"005930": "통신 및 방송 장비 제조업", "990002": "통신 및 방송 장비 제조업",
+                     "990006": "전자부품 제조업", "000660": "반도체 제조업"})
+    sectors = benchmark(sector_map, meta, krx)
+    assert sectors["990006"] == "통신 및 방송 장비 제조업"      # 업종코드 264
+    assert sectors["990005"] == "산업분류 581"                   # KRX 업종명 없음
+
+
+def bench_sector_rollups_universe(benchmark, universe):  # noqa: F811
+    table = compute_valuations(*universe)
+    rollups = benchmark(sector_rollups, table)
+    benchmark.extra_info.update(sectors=len(rollups))
+    assert rollups["companies"].sum() == len(table)
+    assert np.isclose(rollups.loc[table["sector"].iloc[0], "opm"],
+                      table.loc[table["sector"] == table["sector"].iloc[0], "opm"].median())
+
+
+def bench_cmd_value_sector_comparison(benchmark, bot, cached_dart_handler, monkeypatch):
+    """/value 응답의 업종 비교는 미리 계산된 집계만 사용 (요청마다 동종 기업 조회 없음)"""
+    _seed_market(cached_dart_handler.cache, cached_dart_handler.dart.corp_codes)
+    engine = ValuationEngine(cached_dart_handler.cache)
+    engine.refresh(cached_dart_handler)
+    monkeypatch.setattr(bot, "_valuation", engine)
+    monkeypatch.setattr(cached_dart_handler, "get_company_info", None)  # 호출되면 실패
+
+    def handle():
+        update, context, sent = make_update("/value 삼성전자")
+        asyncio.run(bot.cmd_value(update, context))
+        return sent
+
+    sent = benchmark(handle)
+    assert "영업이익률" in sent[-1] and "매출 증가율" in sent[-1]
+    assert engine.sector(engine.lookup("005930")["sector"])["companies"] >= 1
@@ -0,0 +1,113 @@
+"""
+bench_signals.py
+전 종목 기술적 신호 스캔 (signal_scanner.py)
+
+무작위 보행 시세로 만든 시장 전체 규모 PriceMatrix(BENCH_SCAN_TICKERS × BENCH_SCAN_DAYS)를 스캔합니다.
+첫 종목은 마지막 날 골든크로스·거래량 급증이 나도록 만들어 신호 검출도 함께 확인합니다.
+"""
+import os
+import asyncio
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import make_update
+from price_store import PriceMatrix
+from signal_scanner import scan, compute_signals, build_digest, rsi, SIGNAL_TOPIC, MA_LONG
+from state_store import MemoryStateStore
+
+SCAN_TICKERS = int(os.getenv("BENCH_SCAN_TICKERS", "2500"))
+SCAN_DAYS = int(os.getenv("BENCH_SCAN_DAYS", "500"))
+
+
+@pytest.fixture(scope="module")
+def market():
+    rng = np.random.default_rng(0)
+    returns = rng.normal(0, 0.02, (SCAN_DAYS, SCAN_TICKERS))
+    close = 10_000 * np.exp(np.cumsum(returns, axis=0))
+    volume = rng.integers(10_000, 100_000, (SCAN_DAYS, SCAN_TICKERS)).astype("float64")
+    # 상장 전 구간·거래정지일 (NaN)
+    close[:100, -50:] = np.nan
+    close[rng.integers(0, SCAN_DAYS, 500), rng.integers(0, SCAN_TICKERS, 500)] = np.nan
+
+    # 첫 종목: 긴 하락 뒤 마지막 날 급등 + 거래량 10배 → 골든크로스·거래량 급증
+    close[:, 0] = np.r_[np.linspace(20_000, 10_000, SCAN_DAYS - MA_LONG), np.full(MA_LONG - 1, 10_000.0), 40_000.0]
+    volume[-1, 0] = 1_000_000
+    dates = pd.bdate_range("2024-01-01", periods=SCAN_DAYS).to_numpy()
+    return PriceMatrix(dates, [f"{i:06d}" for i in range(SCAN_TICKERS)], close, volume)
+
+
+def bench_scan_single_core(benchmark, market):
+    signals = benchmark(scan, market)
+    benchmark.extra_info.update(tickers=SCAN_TICKERS, days=SCAN_DAYS, signals=len(signals))
+    first = set(signals.loc[signals["ticker"] == "000000", "signal"])
+    assert {"golden_cross", "volume_breakout"} <= first
+
+
+def bench_scan_process_pool(benchmark, market):
+    signals = benchmark.pedantic(scan, args=(market,), kwargs={"workers": 2}, rounds=3)
+    assert signals.sort_values(["signal", "ticker"]).reset_index(drop=True).equals(
+        scan(market).sort_values(["signal", "ticker"]).reset_index(drop=True))
+
+
+def bench_rsi_matches_pandas(benchmark, market):
+    """배열 RSI가 pandas ewm(Wilder) 계산과 같은지 (종목 하나 기준)"""
+    values = benchmark(rsi, market.close[:, :200])
+    series = pd.Series(market.close[:, 1]).ffill()
+    delta = series.diff()
+    gain = delta.clip(lower=0).ewm(alpha=1 / 14, adjust=False).mean()
+    loss = (-delta.clip(upper=0)).ewm(alpha=1 / 14, adjust=False).mean()
+    expected = 100 - 100 / (1 + gain / loss)
+    ours = rsi(pd.DataFrame(market.close[:, :2]).ffill().to_numpy())[:, 1]
+    assert np.allclose(ours[-50:], expected.to_numpy()[-50:])
+    assert values.shape == (SCAN_DAYS, 200)
+
+
+def bench_build_digest(benchmark, market):
+    signals = scan(market)
+    names = {t: f"기업{t}" for t in market.tickers}
+    text = benchmark(build_digest, signals, names, ["000000"])
+    assert text.startswith("📡") and "관심종목" in text
+
+
+def bench_compute_signals_short_history(benchmark):
+    """상장 직후처럼 거래일이 지표 창보다 짧아도 신호 없이 끝나는지"""
+    close = np.full((10, 3), 1_000.0)
+    result = benchmark(compute_signals, close, np.ones((10, 3)))
+    assert not result["golden_cross"].any()
+
+
+def bench_scan_empty_matrix(benchmark, monkeypatch):
+    """시세를 하나도 못 받은 날: 빈 신호 표, 공유 시세 게시·알림 없이 정상 종료"""
+    import price_store
+    import signal_scanner
+    from arrow_store import ArrowStore
+
+    empty = PriceMatrix([], [], None, None)
+    signals = benchmark(scan, empty)
+    assert signals.empty and list(signals.columns) == signal_scanner.SIGNAL_COLUMNS
+
+    monkeypatch.setattr(price_store, "load_market_snapshot", lambda cache: pd.DataFrame({"Name": []}))
+    monkeypatch.setattr(price_store, "load_price_matrix", lambda *args, **kwargs: empty)
+    monkeypatch.setattr(ArrowStore, "publish_matrix", None)  # 호출되면 실패
+    assert signal_scanner.main(["--send"]) == 0
+
+
+def bench_cmd_subscribe(benchmark, bot, monkeypatch):
+    store = MemoryStateStore()
+    monkeypatch.setattr(bot, "state", store)
+
+    def toggle():
+        sent = []
+        for text in ("/subscribe", "/subscribe", "/unsubscribe", "/subscribe"):
+            update, context, replies = make_update(text)
+            handler = bot.cmd_unsubscribe if text == "/unsubscribe" else bot.cmd_subscribe
+            asyncio.run(handler(update, context))
+            sent += replies
+        store.unsubscribe(1, SIGNAL_TOPIC)
+        return sent
+
+    sent = benchmark(toggle)
+    assert "이미" in sent[1] and "해지" in sent[2]
+    assert SIGNAL_TOPIC == bot.SIGNAL_TOPIC
@@ -0,0 +1,106 @@
+"""
+bench_similarity.py
+유사 기업 색인 (similarity.py)
+
+bench_valuation의 시장 전체 규모 표(BENCH_UNIVERSE)를 캐시에 넣고, 시세는 무작위 보행 PriceMatrix를 돌려주는
+price_loader로 대신합니다. 첫 종목을 살짝 바꾼 복제 종목이 가장 가까운 이웃으로 나오는지 함께 확인합니다.
+"""
+import asyncio
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from bench_valuation import _seed_market, universe  # noqa: F401 (픽스처)
+from conftest import make_update
+from data_cache import DataCache
+from price_store import PriceMatrix
+from similarity import SimilarityIndex, build_features, normalize
+from valuation import ValuationEngine, compute_valuations, TABLE_KEY, FUNDAMENTALS_KEY
+
+
+class RandomPrices:
+    """요청한 종목의 무작위 보행 시세 (종목코드로 시드 — 복제 종목 999999는 000000과 같은 시세, 불러온 종목을 기록)"""
+
+    def __init__(self):
+        self.loaded = []
+
+    def __call__(self, tickers, start):
+        self.loaded.extend(tickers)
+        returns = []
+        for ticker in tickers:
+            rng = np.random.default_rng(int(ticker) % 999_999)
+            returns.append(rng.normal(0, rng.uniform(0.005, 0.04), 130))
+        close = 10_000 * np.exp(np.cumsum(np.array(returns).T, axis=0))
+        dates = pd.bdate_range("2026-01-01", periods=130).to_numpy()
+        return PriceMatrix(dates, list(tickers), close, np.ones_like(close))
+
+
+@pytest.fixture
+def seeded(universe, tmp_path):  # noqa: F811
+    """시장 전체 규모 밸류에이션 표 + 첫 종목을 1% 바꾼 복제 종목"""
+    quotes, fundamentals, sectors = universe
+    twin = fundamentals.iloc[[0]].assign(corp_code="99999999", stock_code="999999")
+    for column in ("ttm_revenue", "ttm_op_income", "ttm_net_income", "equity", "liabilities"):
+        twin[column] = (twin[column] * 1.01).astype("int64")
+    fundamentals = pd.concat([fundamentals, twin], ignore_index=True)
+    fundamentals["prev_ttm_revenue"] = (fundamentals["ttm_revenue"] * 0.9).astype("int64")
+    quotes = pd.concat([quotes, quotes.iloc[[0]].rename(index={quotes.index[0]: "999999"})])
+    sectors = pd.concat([sectors, pd.Series([sectors.iloc[0]], index=["999999"])])
+
+    cache = DataCache(str(tmp_path / "cache.db"))
+    cache.set(TABLE_KEY, compute_valuations(quotes, fundamentals, sectors))
+    cache.set(FUNDAMENTALS_KEY, fundamentals.set_index("corp_code"))
+    return cache
+
+
+def bench_refresh_incremental(benchmark, seeded):
+    """첫 갱신은 전 종목 시세, 다음 갱신은 새 분기 실적이 들어온 종목만"""
+    prices = RandomPrices()
+    index = SimilarityIndex(seeded)
+    first = index.refresh(price_loader=prices)
+    assert first["volatility_updated"] == first["companies"] == len(prices.loaded)
+
+    table = seeded.get(TABLE_KEY)
+    table["period"] = table["period"].cat.add_categories("2026.1Q")
+    table.loc["000001", "period"] = "2026.1Q"
+    seeded.set(TABLE_KEY, table)
+    prices.loaded.clear()
+    result = benchmark.pedantic(index.refresh, kwargs={"price_loader": prices}, rounds=3)
+    benchmark.extra_info.update(first=first, incremental=result)
+    assert prices.loaded == ["000001"]
+
+
+def bench_similar_query(benchmark, seeded):
+    """전 종목과의 거리 계산 한 번 (메모리 색인)"""
+    index = SimilarityIndex(seeded)
+    index.refresh(price_loader=RandomPrices())
+    reader = SimilarityIndex(DataCache(seeded.db_path))
+    peers = benchmark(reader.similar, "000000")
+    assert peers[0]["stock_code"] == "999999"
+    assert [p["distance"] for p in peers] == sorted(p["distance"] for p in peers)
+    same = reader.similar("000000", k=3, same_sector=True)
+    assert {p["sector"] for p in same} == {reader.profile("000000")["sector"]}
+
+
+def bench_normalize_universe(benchmark, seeded):
+    features = build_features(seeded.get(TABLE_KEY), seeded.get(FUNDAMENTALS_KEY))
+    vectors = benchmark(normalize, features)
+    assert vectors.shape == features.shape and np.isfinite(vectors).all()
+    assert (vectors[:, list(features.columns).index("volatility")] == 0).all()   # 변동성 없음 → 중앙값
+
+
+def bench_cmd_similar(benchmark, bot, cached_dart_handler, monkeypatch):
+    _seed_market(cached_dart_handler.cache, cached_dart_handler.dart.corp_codes)
+    ValuationEngine(cached_dart_handler.cache).refresh(cached_dart_handler)
+    index = SimilarityIndex(cached_dart_handler.cache)
+    index.refresh(price_loader=RandomPrices())
+    monkeypatch.setattr(bot, "_similarity", index)
+
+    def handle():
+        update, context, sent = make_update("/similar 삼성전자")
+        asyncio.run(bot.cmd_similar(update, context))
+        return sent
+
+    sent = benchmark(handle)
+    assert "비슷한 기업" in sent[-1] and "1. **" in sent[-1]
@@ -0,0 +1,48 @@
+"""
+bench_startup.py
+봇 프로세스 기동 시간 (새 인터프리터에서 import telegram_bot → Application 초기화 → 첫 /start 응답)
+"""
+import os
+import sys
+import subprocess
+
+from import_time import profile_import, heavy_modules_loaded, _env
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 가짜 Bot API로 Application을 초기화하고 /start 하나를 처리한 뒤 종료
+STARTUP_SCRIPT = f"""
+import sys, asyncio
+sys.path.insert(0, {BENCH_DIR!r})
+import telegram_bot
+from telegram import Update
+from telegram.ext import ApplicationBuilder
+from load_bot import FakeBotRequest, make_update_dict
+
+async def main():
+    request = FakeBotRequest()
+    app = telegram_bot.build_application(ApplicationBuilder().token(telegram_bot.TELEGRAM_TOKEN).request(request))
+    await app.initialize()
+    await app.process_update(Update.de_json(make_update_dict(1, 1, "/start"), app.bot))
+    await app.shutdown()
+    assert request.calls["sendMessage"] == 1
+
+asyncio.run(main())
+"""
+
+
+def _start_bot():
+    subprocess.run([sys.executable, "-c", STARTUP_SCRIPT], env=_env(), check=True, capture_output=True)
+
+
+def bench_bot_restart_to_first_reply(benchmark):
+    """재시작 후 첫 /start 응답까지 (import + Application 초기화 + 처리)"""
+    benchmark.pedantic(_start_bot, rounds=5, warmup_rounds=1)
+
+
+def bench_import_telegram_bot(benchmark):
+    """import telegram_bot 단독 (-X importtime 합계)"""
+    report = benchmark.pedantic(profile_import, args=("telegram_bot",), rounds=5, warmup_rounds=1)
+    benchmark.extra_info["import_ms"] = round(report["total_ms"], 1)
+    # /start·/help가 기다리지 않도록 무거운 의존성은 처음 쓸 때 불러와야 함
+    assert heavy_modules_loaded(report["loaded"]) == []
@@ -0,0 +1,136 @@
+"""
+bench_task_queue.py
+무거운 명령 작업 큐 (task_queue.py)
+
+같은 기업 /stock 요청이 몰릴 때 작업 하나로 합쳐 DART·Gemini를 한 번만 호출하는지,
+전체·사용자별 동시 실행 한도를 지키는지, 진행 메시지 하나가 단계 순서대로 고쳐지는지 확인합니다.
+"""
+import asyncio
+
+import pytest
+
+from conftest import make_update, run
+from task_queue import TaskQueue, QueueFull
+
+
+def bench_cmd_stock_merged(benchmark, bot, stub_client, fake_dart):
+    """10명이 동시에 같은 기업을 요청 → 작업 하나, Gemini 한 번, 모두 리포트 수신"""
+    fake_dart.reset_counts()
+    update, context, _ = make_update("/stock 삼성전자")
+    run(bot.cmd_stock(update, context))
+    single = sum(fake_dart.requests.values())
+
+    def burst(users=range(1, 11)):
+        stub_client.calls = 0
+        fake_dart.reset_counts()
+        calls = [make_update("/stock 삼성전자", user_id) for user_id in users]
+
+        async def main():
+            await asyncio.gather(*(bot.cmd_stock(update, context) for update, context, _ in calls))
+        run(main())
+        return [sent for _, _, sent in calls]
+
+    sent_by_user = benchmark(burst)
+    assert stub_client.calls == 1
+    assert all(any("분석 리포트 —" in msg for msg in sent) for sent in sent_by_user)
+    assert sum(fake_dart.requests.values()) == single  # DART 조회도 요청 하나 분량
+
+
+def bench_cmd_stock_progress(benchmark, bot):
+    """진행 메시지는 단계 순서대로 고쳐지고 마지막에 연간 실적 요약이 됨"""
+    def call():
+        update, context, sent = make_update("/stock 삼성전자")
+        run(bot.cmd_stock(update, context))
+        return sent
+
+    sent = benchmark(call)
+    stages = [next(i for i, msg in enumerate(sent) if f"🔄 {stage}" in msg) for stage in bot.STOCK_STAGES]
+    assert stages == sorted(stages)
+    assert "연간 실적" in sent[-2] and "분석 리포트 —" in sent[-1]
+
+
+def bench_queue_limits(benchmark):
+    """전체 workers개, 사용자별 per_user개까지만 동시 실행, 대기 포함 한도를 넘으면 거절"""
+    def scenario():
+        queue = TaskQueue(workers=3, per_user=1, max_user_jobs=2)
+        running, peak, peak_by_user = set(), [0], {}
+
+        def make_work(user_id):
+            async def work(job):
+                running.add(job.key)
+                peak[0] = max(peak[0], len(running))
+                mine = sum(key[1] == user_id for key in running)
+                peak_by_user[user_id] = max(peak_by_user.get(user_id, 0), mine)
+                await asyncio.sleep(0.002)
+                running.discard(job.key)
+                return job.key
+            return work
+
+        async def notify(job):
+            pass
+
+        async def main():
+            rejected = 0
+            for user_id in range(5):
+                for n in range(3):
+                    try:
+                        queue.submit(("job", user_id, n), user_id, make_work(user_id), user_id, notify)
+                    except QueueFull:
+                        rejected += 1
+            await queue.join()
+            return rejected
+        return asyncio.run(main()), peak[0], peak_by_user
+
+    rejected, peak, peak_by_user = benchmark(scenario)
+    assert rejected == 5 and peak == 3 and max(peak_by_user.values()) == 1
+
+
+def bench_queue_failure_notifies(benchmark):
+    """작업이 실패해도 구독자는 끝 상태를 받고 큐 자리가 풀림"""
+    def scenario():
+        queue = TaskQueue(workers=1)
+        seen = []
+
+        async def broken(job):
+            raise RuntimeError("boom")
+
+        async def ok(job):
+            return "ok"
+
+        async def notify(job):
+            seen.append(job.state)
+
+        async def main():
+            first = queue.submit(("job", 1), 1, broken, "a", notify)
+            second = queue.submit(("job", 2), 2, ok, "b", notify)
+            await queue.join()
+            return first, second
+        return asyncio.run(main()), seen, queue
+
+    (first, second), seen, queue = benchmark(scenario)
+    assert first.state == "failed" and isinstance(first.error, RuntimeError)
+    assert second.result == "ok" and seen[-1] == "done"
+    assert queue.stats() == {"pending": 0, "running": 0} and queue.get(("job", 1)) is None
+
+
+@pytest.mark.parametrize("users", [1, 4])
+def bench_queue_merge_same_user(benchmark, users):
+    """같은 사용자가 같은 작업을 다시 보내면 구독자가 늘지 않음"""
+    def scenario():
+        queue = TaskQueue()
+
+        async def work(job):
+            await asyncio.sleep(0)
+            return 1
+
+        async def notify(job):
+            pass
+
+        async def main():
+            jobs = [queue.submit(("job",), user_id % users, work, user_id % users, notify) for user_id in range(8)]
+            await queue.join()
+            return jobs
+        return asyncio.run(main())
+
+    jobs = benchmark(scenario)
+    assert len({id(job) for job in jobs}) == 1 and len(jobs[0].watchers) == users
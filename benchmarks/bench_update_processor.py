@@ -0,0 +1,69 @@
+"""
+bench_update_processor.py
+Update 동시 처리기의 워커 간 순서 (update_processor.py)
+
+웹훅을 나눠 받는 워커 두 개(처리기 두 개가 같은 SQLite 상태 저장소를 공유)에 한 사용자의 Update가
+번갈아, 일부는 update_id 역순으로 도착해도 update_id 순서대로 하나씩 처리되는지,
+처리 중 죽은 워커의 대기열 항목이 turn_ttl 뒤에는 다음 Update를 막지 않는지 확인합니다.
+"""
+import time
+import asyncio
+from types import SimpleNamespace
+
+from state_store import SQLiteStateStore, MemoryStateStore
+from update_processor import PerUserUpdateProcessor
+
+
+def _update(update_id, user_id=1):
+    return SimpleNamespace(update_id=update_id, effective_user=SimpleNamespace(id=user_id), effective_chat=None)
+
+
+def bench_shared_ordering_across_workers(benchmark, tmp_path):
+    """워커 A: 1, 3(2보다 먼저 도착), 5 / 워커 B: 2, 4 → 처리 순서 1~5, 겹침 없음"""
+    store = SQLiteStateStore(str(tmp_path / "state.db"))
+    # (도착 시각 ms, 워커, update_id) — 3은 1이 처리되는 동안 2보다 먼저 도착
+    arrivals = [(0, 0, 1), (5, 0, 3), (8, 1, 2), (40, 1, 4), (45, 0, 5)]
+
+    def scenario():
+        workers = [PerUserUpdateProcessor(4, store=store, poll_interval=0.002) for _ in range(2)]
+        order, running, overlaps = [], set(), [0]
+
+        async def handle(update_id):
+            overlaps[0] = max(overlaps[0], len(running))
+            running.add(update_id)
+            order.append(update_id)
+            await asyncio.sleep(0.02)
+            running.discard(update_id)
+
+        async def deliver(delay_ms, worker, update_id):
+            await asyncio.sleep(delay_ms / 1000)
+            await workers[worker].do_process_update(_update(update_id), handle(update_id))
+
+        async def main():
+            await asyncio.gather(*(deliver(*arrival) for arrival in arrivals))
+        asyncio.run(main())
+        return order, overlaps[0]
+
+    order, overlaps = benchmark.pedantic(scenario, rounds=3)
+    assert order == [1, 2, 3, 4, 5] and overlaps == 0
+
+
+def bench_shared_ordering_dead_worker(benchmark):
+    """처리 중 죽은 워커가 남긴 항목(update_id 1)은 turn_ttl이 지나면 건너뜀"""
+    store = MemoryStateStore()
+
+    def scenario():
+        store.enqueue_turn("user:1", 1)
+        processor = PerUserUpdateProcessor(4, store=store, turn_ttl=0.05, poll_interval=0.005)
+        done = []
+
+        async def handle():
+            done.append(time.monotonic())
+
+        started = time.monotonic()
+        asyncio.run(processor.do_process_update(_update(2), handle()))
+        return done[0] - started
+
+    waited = benchmark.pedantic(scenario, rounds=3)
+    assert 0.05 <= waited < 1
+    assert store.check_turn("user:1", 3, 60)  # 대기열이 비워짐
@@ -0,0 +1,105 @@
+"""
+bench_valuation.py
+전 종목 밸류에이션 엔진 (valuation.py)
+
+시장 시세표·업종표는 price_store가 쓰는 캐시 키에 미리 넣어 FinanceDataReader 없이 실행합니다.
+배수 계산은 픽스처 기업을 종목코드만 바꿔 복제한 시장 전체 규모(BENCH_UNIVERSE, 기본 2500) 표로 측정합니다.
+"""
+import os
+import asyncio
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import make_update
+from data_cache import DataCache
+from valuation import ValuationEngine, compute_valuations, company_fundamentals
+
+UNIVERSE = int(os.getenv("BENCH_UNIVERSE", "2500"))
+SAMSUNG = "00126380"
+
+
+def _seed_market(cache, corp_codes):
+    """상장 기업 목록으로 시세표·업종표 캐시를 채웁니다. (종가 10,000원, 상장주식수 1억 주)"""
+    listed = corp_codes[corp_codes["stock_code"].str.strip() != ""]
+    quotes = pd.DataFrame({
+        "Name": listed["corp_name"].to_numpy(), "Market": "KOSPI", "Close": 10_000,
+        "Marcap": 10_000 * 100_000_000, "Stocks": 100_000_000,
+    }, index=pd.Index(listed["stock_code"].to_numpy(), name="Code"))
+    sectors = pd.Series(["전자부품", "화학"] * (len(quotes) // 2) + ["전자부품"] * (len(quotes) % 2), index=quotes.index)
+    cache.set(f"market:krx:{datetime.date.today().isoformat()}", quotes)
+    cache.set("market:sectors", sectors)
+    return quotes
+
+
+@pytest.fixture
+def engine(cached_dart_handler):
+    _seed_market(cached_dart_handler.cache, cached_dart_handler.dart.corp_codes)
+    return ValuationEngine(cached_dart_handler.cache)
+
+
+@pytest.fixture(scope="module")
+def universe():
+    """시장 전체 규모 시세표·재무표 (무작위 값, 일부 적자·자본잠식 포함)"""
+    rng = np.random.default_rng(0)
+    codes = [f"{i:06d}" for i in range(UNIVERSE)]
+    quotes = pd.DataFrame({
+        "Name": [f"기업{i}" for i in range(UNIVERSE)], "Market": rng.choice(["KOSPI", "KOSDAQ"], UNIVERSE),
+        "Close": rng.integers(1_000, 500_000, UNIVERSE), "Marcap": rng.integers(10**10, 10**14, UNIVERSE),
+        "Stocks": rng.integers(10**6, 10**9, UNIVERSE),
+    }, index=pd.Index(codes, name="Code"))
+    fundamentals = pd.DataFrame({
+        "corp_code": [f"{i:08d}" for i in range(UNIVERSE)], "stock_code": codes, "period": "2025.3Q",
+        "ttm_revenue": rng.integers(10**9, 10**14, UNIVERSE), "ttm_op_income": rng.integers(-10**12, 10**13, UNIVERSE),
+        "ttm_net_income": rng.integers(-10**12, 10**13, UNIVERSE), "equity": rng.integers(-10**10, 10**14, UNIVERSE),
+        "liabilities": rng.integers(0, 10**14, UNIVERSE), "current_assets": rng.integers(0, 10**14, UNIVERSE),
+    })
+    sectors = pd.Series(rng.choice([f"업종{i}" for i in range(150)], UNIVERSE), index=quotes.index)
+    return quotes, fundamentals, sectors
+
+
+def bench_company_fundamentals(benchmark, cached_dart_handler):
+    """기업 한 곳의 TTM 실적·재무상태표 (캐시 적중 후)"""
+    company_fundamentals(cached_dart_handler, SAMSUNG)
+    row = benchmark(company_fundamentals, cached_dart_handler, SAMSUNG)
+    assert row["equity"] > 0 and row["ttm_revenue"] > 0
+
+
+def bench_compute_valuations_universe(benchmark, universe):
+    """전 종목 배수·업종 내 순위 (벡터 연산)"""
+    table = benchmark(compute_valuations, *universe)
+    benchmark.extra_info.update(companies=len(table), sectors=table["sector"].nunique())
+    assert len(table) == UNIVERSE
+    assert table["per"].isna().any() and (table["per_rank"].dropna() >= 1).all()
+
+
+def bench_refresh_full_then_incremental(benchmark, engine, cached_dart_handler):
+    """첫 갱신은 상장 기업 전체, 다음 갱신은 바뀐 기업만 DART 재무를 다시 조회"""
+    first = engine.refresh(cached_dart_handler)
+    assert first["companies"] > 0 and first["updated"] == first["companies"]
+    result = benchmark.pedantic(engine.refresh, args=(cached_dart_handler,), rounds=3)
+    benchmark.extra_info.update(first=first, incremental=result)
+    assert result["companies"] == first["companies"]
+
+
+def bench_lookup_from_memory(benchmark, engine, cached_dart_handler):
+    engine.refresh(cached_dart_handler)
+    reader = ValuationEngine(DataCache(cached_dart_handler.cache.db_path))
+    found = benchmark(reader.lookup, "005930")
+    assert found["corp_code"] == SAMSUNG and found["pbr"] > 0
+    assert reader.rank(found["sector"], "pbr", 3)
+
+
+def bench_cmd_value(benchmark, bot, engine, cached_dart_handler, monkeypatch):
+    engine.refresh(cached_dart_handler)
+    monkeypatch.setattr(bot, "_valuation", engine)
+
+    def handle():
+        update, context, sent = make_update("/value 삼성전자")
+        asyncio.run(bot.cmd_value(update, context))
+        return sent
+
+    sent = benchmark(handle)
+    assert "PBR" in sent[-1]
@@ -0,0 +1,68 @@
+"""
+bench_warmup.py
+배포·재시작 직후 캐시 예열 (warmup.py)
+
+최근 요청 기록이 있는 Fake DART 기업들로 빈 캐시를 예열한 뒤 층별 예열 범위를 확인하고,
+예열이 끝난 다음의 첫 /stock 요청이 DART를 한 번도 호출하지 않는지(= 평소 지연과 같은지) 측정합니다.
+"""
+import pandas as pd
+
+from conftest import make_update, run
+from report_store import ReportStore
+from warmup import run_warmup
+
+COMPANIES = ["삼성전자", "SK하이닉스", "벤치마크기업01"]
+
+
+def _stub_prices(ticker, start, end=None, cache=None):
+    """FinanceDataReader 대신 (대시보드와 같은 prices: 키로 캐시)"""
+    return cache.get_or_set(f"prices:{ticker}:{start}:{end}",
+                            lambda: pd.DataFrame({"Close": [1.0]}, index=pd.to_datetime(["2024-01-02"])))
+
+
+def _requested(dart, tmp_path):
+    reports = ReportStore(str(tmp_path / "reports.db"))
+    for name in COMPANIES:
+        reports.record_request(dart.find_corp_code(name), name)
+    return reports
+
+
+def bench_warmup_coverage(benchmark, cached_dart_handler, tmp_path):
+    """빈 캐시: 이미 있음 0% → 예열 후 100%, 두 번째 예열(재시작)은 모두 이미 있음"""
+    reports = _requested(cached_dart_handler, tmp_path)
+    cold = run_warmup(10, 60, dart=cached_dart_handler, reports=reports, price_loader=_stub_prices)
+    assert cold["companies"] == len(COMPANIES)
+    for layer in ("financials", "prices"):
+        assert cold["coverage"][layer]["already"] == 0 and cold["coverage"][layer]["after"] == 1
+    assert cold["coverage"]["report"]["after"] == 0  # 리포트는 만들지 않고 범위만 보고
+
+    warm = benchmark(run_warmup, 10, 60, dart=cached_dart_handler, reports=reports, price_loader=_stub_prices)
+    benchmark.extra_info.update(cold_seconds=round(cold["seconds"], 3))
+    assert warm["coverage"]["financials"]["already"] == 1 and warm["coverage"]["prices"]["already"] == 1
+    assert cached_dart_handler.cache.__class__.__name__ == "DataCache"  # 핸들러 캐시 원복
+
+
+def bench_warmup_budget_exhausted(benchmark, cached_dart_handler, tmp_path):
+    """시간 예산이 없으면 기업별 조회를 건너뛰고 건너뛴 수를 보고"""
+    reports = _requested(cached_dart_handler, tmp_path)
+    result = benchmark.pedantic(run_warmup, args=(10, 0), rounds=3,
+                                kwargs=dict(dart=cached_dart_handler, reports=reports, price_loader=_stub_prices))
+    assert result["coverage"]["financials"]["skipped"] == len(COMPANIES)
+
+
+def bench_cmd_stock_after_warmup(benchmark, bot, cached_dart_handler, fake_dart, monkeypatch):
+    """예열 후 첫 /stock 요청은 DART를 호출하지 않음 (재시작 직후에도 평소 지연)"""
+    monkeypatch.setattr(bot, "_dart", cached_dart_handler)
+    for name in COMPANIES:
+        bot.reports.record_request(cached_dart_handler.find_corp_code(name), name)
+    run_warmup(10, 60, dart=cached_dart_handler, reports=bot.reports, price_loader=_stub_prices)
+    fake_dart.reset_counts()
+
+    def call():
+        update, context, sent = make_update("/stock 삼성전자")
+        run(bot.cmd_stock(update, context))
+        return sent
+
+    sent = benchmark(call)
+    assert any("분석 리포트 —" in msg for msg in sent)
+    assert sum(fake_dart.requests.values()) == 0, dict(fake_dart.requests)
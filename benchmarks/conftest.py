@@ -0,0 +1,133 @@
+"""
+conftest.py
+벤치마크 공통 설정
+
+세션 시작 시 로컬 Fake DART 서버를 띄우고 DART_BASE_URL을 그쪽으로 돌린 뒤,
+임시 작업 디렉터리(docs_cache/, data_cache.db 등)에서 실행합니다. 실제 API 키·네트워크가 필요 없습니다.
+
+환경변수
+    BENCH_DART_LATENCY      Fake DART 응답 지연 (초, 기본 0.005)
+    BENCH_DART_HANDSHAKE    Fake DART 새 연결당 지연 (초, 기본 0.03 — TLS 핸드셰이크 흉내)
+    BENCH_GEMINI_LATENCY    Gemini 스텁 응답 지연 (초, 기본 0.05)
+"""
+import os
+import sys
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+sys.path[:0] = [REPO_ROOT, BENCH_DIR]
+
+from fake_dart_server import start_offline_env  # noqa: E402
+from stubs import StubGeminiClient  # noqa: E402
+
+DART_LATENCY   = float(os.getenv("BENCH_DART_LATENCY", "0.005"))
+DART_HANDSHAKE = float(os.getenv("BENCH_DART_HANDSHAKE", "0.03"))
+GEMINI_LATENCY = float(os.getenv("BENCH_GEMINI_LATENCY", "0.05"))
+
+_server = None
+
+
+def pytest_configure(config):
+    """벤치 모듈 import(봇 모듈의 전역 핸들러 생성) 전에 서버·환경변수를 준비합니다."""
+    global _server
+    _server = start_offline_env(latency=DART_LATENCY, handshake_latency=DART_HANDSHAKE)
+
+
+def pytest_unconfigure(config):
+    if _server is not None:
+        _server.stop()
+
+
+# ──────────────────────────────────────────────
+# 픽스처
+# ──────────────────────────────────────────────
+@pytest.fixture(scope="session")
+def fake_dart():
+    return _server
+
+
+@pytest.fixture(scope="session")
+def dart_handler(fake_dart):
+    """캐시 없이 매번 Fake DART를 호출하는 핸들러"""
+    from dart_handler import DartHandler
+    return DartHandler()
+
+
+@pytest.fixture
+def cached_dart_handler(fake_dart, tmp_path):
+    """테스트마다 빈 DataCache를 쓰는 핸들러"""
+    from dart_handler import DartHandler
+    from data_cache import DataCache
+    return DartHandler(cache=DataCache(str(tmp_path / "cache.db")))
+
+
+@pytest.fixture
+def stub_client():
+    return StubGeminiClient(latency=GEMINI_LATENCY)
+
+
+@pytest.fixture
+def gemini_handler(stub_client):
+    from gemini_handler import GeminiHandler
+    return GeminiHandler(client=stub_client)
+
+
+@pytest.fixture
+def bot(gemini_handler, dart_handler, monkeypatch, tmp_path):
+    """
+    Gemini 스텁·캐시 없는 DART 핸들러로 바꾼 telegram_bot 모듈
+    미리 생성된 리포트는 쓰지 않도록(REPORT_MAX_AGE=0) 해 매번 실시간 경로를 측정합니다.
+    """
+    import telegram_bot
+    from report_store import ReportStore
+    monkeypatch.setattr(telegram_bot, "_gemini", gemini_handler)
+    monkeypatch.setattr(telegram_bot, "_dart", dart_handler)
+    monkeypatch.setattr(telegram_bot, "reports", ReportStore(str(tmp_path / "reports.db")))
+    monkeypatch.setattr(telegram_bot, "REPORT_MAX_AGE", 0)
+    return telegram_bot
+
+
+def make_update(text: str, user_id: int = 1):
+    """명령 핸들러가 쓰는 속성만 갖춘 가짜 Update/Context (보낸 메시지와 진행 메시지 수정 내용은 sent에 차례로)"""
+    sent = []
+
+    async def edit_text(text, **kwargs):
+        sent.append(text)
+
+    async def reply_text(text, **kwargs):
+        sent.append(text)
+        return SimpleNamespace(edit_text=edit_text)
+
+    async def reply_photo(photo, **kwargs):
+        sent.append(photo)
+
+    async def send_chat_action(**kwargs):
+        pass
+
+    update = SimpleNamespace(
+        effective_user=SimpleNamespace(id=user_id, first_name="bench"),
+        effective_chat=SimpleNamespace(id=user_id),
+        message=SimpleNamespace(text=text, reply_text=reply_text, reply_photo=reply_photo),
+    )
+    context = SimpleNamespace(
+        args=text.split()[1:] if text.startswith("/") else [],
+        bot=SimpleNamespace(send_chat_action=send_chat_action),
+        # 백그라운드 공시 인덱싱은 측정 대상이 아니므로 실행하지 않음
+        application=SimpleNamespace(create_task=lambda coro: coro.close()),
+    )
+    return update, context, sent
+
+
+def run(coro):
+    """핸들러를 실행하고, 봇 작업 큐에 넣은 작업(/stock 실시간 분석 등)이 끝날 때까지 기다립니다."""
+    async def main():
+        result = await coro
+        bot = sys.modules.get("telegram_bot")
+        if bot is not None:
+            await bot.tasks.join()
+        return result
+    return asyncio.run(main())
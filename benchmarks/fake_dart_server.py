@@ -0,0 +1,249 @@
+"""
+fake_dart_server.py
+로컬 Open DART 스탠드인 서버 (벤치마크/오프라인 재현용)
+
+benchmarks/fixtures 의 기록된 응답을 그대로 돌려줍니다.
+    corpCode.xml       → CORPCODE.xml 을 zip으로 묶어 응답
+    fnlttSinglAcnt.json → "corp_code:bsns_year:reprt_code" 키로 조회, 없으면 status 013
+    list.json          → corp_code 키로 조회, 없으면 전체 기업 (bgn_de/end_de 기간 필터, 페이지 나눔)
+    company.json       → corp_code 키로 조회
+    document.xml       → rcept_no 키로 조회한 원문을 zip으로 묶어 응답
+
+응답 지연(latency), 새 연결마다 붙는 핸드셰이크 지연(handshake_latency, TCP+TLS 왕복 흉내),
+HTTP 429 주입 비율(error_rate)을 설정할 수 있습니다.
+
+사용 예)
+    python benchmarks/fake_dart_server.py --port 8765 --latency 0.05
+    DART_BASE_URL=http://127.0.0.1:8765 python telegram_bot.py
+"""
+import io
+import os
+import json
+import time
+import random
+import zipfile
+import tempfile
+import argparse
+import threading
+from collections import Counter
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+NO_DATA    = {"status": "013", "message": "조회된 데이타가 없습니다."}
+RATE_LIMIT = {"status": "020", "message": "요청 제한을 초과하였습니다."}
+
+
+def load_fixtures(fixtures_dir: str = FIXTURES_DIR) -> dict:
+    def read_json(name):
+        path = os.path.join(fixtures_dir, name)
+        if not os.path.exists(path):
+            return {}
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    with open(os.path.join(fixtures_dir, "CORPCODE.xml"), "rb") as f:
+        corp_xml = f.read()
+
+    return {
+        "corpCode": _zip_bytes("CORPCODE.xml", corp_xml),
+        "fnlttSinglAcnt": read_json("fnlttSinglAcnt.json"),
+        "list": read_json("list.json"),
+        "company": read_json("company.json"),
+        "document": read_json("document.json"),
+    }
+
+
+def _zip_bytes(name: str, data: bytes) -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr(name, data)
+    return buf.getvalue()
+
+
+class FakeDartServer:
+    """
+    백그라운드 스레드로 뜨는 스탠드인 서버.
+    with FakeDartServer(latency=0.02) as server:
+        os.environ["DART_BASE_URL"] = server.base_url
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, error_rate=0.0,
+                 seed=0, fixtures_dir=FIXTURES_DIR, handshake_latency=0.0):
+        self.latency = latency
+        self.handshake_latency = handshake_latency
+        self.error_rate = error_rate
+        self.fixtures = load_fixtures(fixtures_dir)
+        self._report_names = {
+            r["rcept_no"]: r["report_nm"] for rows in self.fixtures["list"].values() for r in rows
+        }
+        self.requests = Counter()       # 엔드포인트별 요청 수
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="fake-dart", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def reset_counts(self):
+        with self._lock:
+            self.requests.clear()
+
+    # ──────────────────────────────────────────────
+    # 응답 생성
+    # ──────────────────────────────────────────────
+    def _should_fail(self) -> bool:
+        with self._lock:
+            return self.error_rate > 0 and self._rng.random() < self.error_rate
+
+    def respond(self, endpoint: str, params: dict):
+        """(status_code, content_type, body) 반환"""
+        with self._lock:
+            self.requests[endpoint] += 1
+
+        if self.latency:
+            time.sleep(self.latency)
+        if self._should_fail():
+            return 429, "application/json", json.dumps(RATE_LIMIT).encode("utf-8")
+
+        if endpoint == "corpCode.xml":
+            return 200, "application/zip", self.fixtures["corpCode"]
+
+        if endpoint == "fnlttSinglAcnt.json":
+            key = f"{params.get('corp_code')}:{params.get('bsns_year')}:{params.get('reprt_code')}"
+            return self._json(self.fixtures["fnlttSinglAcnt"].get(key, NO_DATA))
+
+        if endpoint == "list.json":
+            return self._json(self._list(params))
+
+        if endpoint == "company.json":
+            return self._json(self.fixtures["company"].get(params.get("corp_code"), NO_DATA))
+
+        if endpoint == "document.xml":
+            rcept_no = params.get("rcept_no")
+            text = self.fixtures["document"].get(rcept_no)
+            if text is None and rcept_no in self._report_names:
+                # 원문을 기록하지 않은 공시는 제목만 담은 문서로 대신함
+                text = f"<DOCUMENT><TITLE>{self._report_names[rcept_no]}</TITLE></DOCUMENT>"
+            if text is None:
+                return self._json(NO_DATA)
+            return 200, "application/zip", _zip_bytes(f"{params.get('rcept_no')}.xml", text.encode("utf-8"))
+
+        return 404, "application/json", json.dumps({"status": "100", "message": "unknown endpoint"}).encode()
+
+    def _list(self, params: dict) -> dict:
+        corp_code = params.get("corp_code")
+        if corp_code:
+            rows = self.fixtures["list"].get(corp_code, [])
+        else:
+            rows = sorted((r for rows in self.fixtures["list"].values() for r in rows),
+                          key=lambda r: r["rcept_no"], reverse=True)
+        bgn, end = params.get("bgn_de", "00000000"), params.get("end_de", "99999999")
+        kind = params.get("pblntf_ty")
+        rows = [r for r in rows if bgn <= r["rcept_dt"] <= end and (not kind or r.get("pblntf_ty", "A") == kind)]
+        if not rows:
+            return NO_DATA
+
+        page_no, page_count = int(params.get("page_no", 1)), int(params.get("page_count", 100))
+        total_page = (len(rows) + page_count - 1) // page_count
+        page = rows[(page_no - 1) * page_count: page_no * page_count]
+        return {
+            "status": "000", "message": "정상",
+            "page_no": page_no, "page_count": page_count,
+            "total_count": len(rows), "total_page": total_page,
+            "list": [{k: v for k, v in r.items() if k != "pblntf_ty"} for r in page],
+        }
+
+    @staticmethod
+    def _json(obj):
+        return 200, "application/json;charset=UTF-8", json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive 지원 (연결 재사용 효과 측정용)
+            # 헤더와 본문을 따로 쓰므로, Nagle + 지연 ACK로 keep-alive 연결에 40ms씩 붙지 않도록
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with server._lock:
+                    server.requests["(connection)"] += 1
+                if server.handshake_latency:
+                    time.sleep(server.handshake_latency)
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                endpoint = parsed.path.rsplit("/", 1)[-1]
+                params = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+                status, content_type, body = server.respond(endpoint, params)
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def start_offline_env(latency: float = 0.0, error_rate: float = 0.0, workdir: str = None,
+                      handshake_latency: float = 0.0) -> FakeDartServer:
+    """
+    스탠드인 서버를 띄우고, 봇/대시보드 모듈이 실제 키·네트워크 없이 import 되도록 환경을 맞춥니다.
+    (DART_BASE_URL, 더미 API 키 설정 후 docs_cache·캐시 DB가 생기는 임시 작업 디렉터리로 이동)
+    """
+    server = FakeDartServer(latency=latency, error_rate=error_rate, handshake_latency=handshake_latency).start()
+    os.environ["DART_BASE_URL"] = server.base_url
+    os.environ.setdefault("DART_API_KEY", "bench-dart-key")
+    os.environ.setdefault("GEMINI_API_KEY", "bench-gemini-key")
+    os.environ.setdefault("TELEGRAM_BOT_TOKEN", "123456:bench-token")
+    # 같은 사용자로 반복 호출하므로 봇의 사용자별 요청 한도는 사실상 끔
+    os.environ.setdefault("USER_RATE_LIMIT", "1000000/60")
+    os.chdir(workdir or tempfile.mkdtemp(prefix="invsky-bench-"))
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 Open DART 스탠드인 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="요청당 지연 (초)")
+    parser.add_argument("--handshake-latency", type=float, default=0.0, help="새 연결당 지연 (초)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="HTTP 429 응답 비율 (0~1)")
+    args = parser.parse_args()
+
+    server = FakeDartServer(args.host, args.port, args.latency, args.error_rate,
+                            handshake_latency=args.handshake_latency)
+    print(f"Fake DART 서버 실행 중: {server.base_url} (Ctrl+C로 종료)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+import_time.py
+모듈 import 시간 리포트 (python -X importtime)
+
+새 파이썬 프로세스에서 모듈을 import 하며 -X importtime 출력을 모아, 전체 시간과
+누적 시간이 큰 모듈 순위를 보여줍니다. 봇 재시작 후 응답 가능해질 때까지의 시간 대부분이 여기서 나옵니다.
+더미 키·임시 작업 디렉터리에서 실행하므로 실제 API 키가 필요 없습니다.
+
+사용 예)
+    python benchmarks/import_time.py                         # telegram_bot, dart_handler, gemini_handler
+    python benchmarks/import_time.py telegram_bot --top 30
+    python benchmarks/import_time.py telegram_bot --json import_time.json
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MODULES = ["telegram_bot", "dart_handler", "gemini_handler"]
+
+# 봇 기동 경로에서 지연 로딩해야 하는 무거운 의존성 (bench_startup.py에서 회귀 확인)
+HEAVY_MODULES = ["google.genai", "OpenDartReader", "pandas", "matplotlib", "plotly", "FinanceDataReader"]
+
+DUMMY_ENV = {
+    "DART_API_KEY": "import-time-dart-key",
+    "GEMINI_API_KEY": "import-time-gemini-key",
+    "TELEGRAM_BOT_TOKEN": "123456:import-time-token",
+}
+
+
+def _env() -> dict:
+    env = {**DUMMY_ENV, **os.environ}
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [REPO_ROOT, env.get("PYTHONPATH")]))
+    return env
+
+
+def profile_import(module: str, cwd: str = None) -> dict:
+    """
+    새 프로세스에서 module을 import 하고 결과를 반환합니다.
+    {"module", "total_ms", "entries": [{"name", "self_ms", "cumulative_ms", "depth"}], "loaded": [모듈명]}
+    """
+    code = f"import sys, json; import {module}; print(json.dumps(sorted(sys.modules)))"
+    with tempfile.TemporaryDirectory(prefix="invsky-import-") as tmp:
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            cwd=cwd or tmp, env=_env(), capture_output=True, text=True, check=True,
+        )
+
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        entries.append({
+            "name": name.strip(),
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+            "depth": (len(name) - len(name.lstrip())) // 2,
+        })
+
+    # 최상위(depth 0) 항목의 누적 시간 합 = 전체 import 시간
+    total_ms = sum(e["cumulative_ms"] for e in entries if e["depth"] == 0)
+    return {"module": module, "total_ms": total_ms, "entries": entries,
+            "loaded": json.loads(result.stdout.splitlines()[-1])}
+
+
+def heavy_modules_loaded(loaded: list) -> list:
+    """loaded 모듈 목록 중 HEAVY_MODULES에 해당하는 최상위 이름"""
+    names = set(loaded)
+    return [m for m in HEAVY_MODULES if m in names]
+
+
+def print_report(report: dict, top: int = 15):
+    print(f"\n■ import {report['module']} — {report['total_ms']:.0f} ms")
+    heavy = heavy_modules_loaded(report["loaded"])
+    print(f"  무거운 의존성 로딩: {', '.join(heavy) if heavy else '없음'}")
+    print(f"  {'누적(ms)':>9} {'자체(ms)':>9}  모듈")
+    for e in sorted(report["entries"], key=lambda e: e["cumulative_ms"], reverse=True)[:top]:
+        print(f"  {e['cumulative_ms']:>9.1f} {e['self_ms']:>9.1f}  {e['name']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="모듈 import 시간 리포트")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--top", type=int, default=15, help="표시할 상위 모듈 수")
+    parser.add_argument("--json", help="결과를 JSON 파일로 저장")
+    args = parser.parse_args()
+
+    reports = [profile_import(m) for m in args.modules]
+    for report in reports:
+        print_report(report, args.top)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump([{k: v for k, v in r.items() if k != "loaded"} for r in reports], f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
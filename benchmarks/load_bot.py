@@ -0,0 +1,322 @@
+"""
+load_bot.py
+텔레그램 봇 부하 발생기 (프로세스 내 Update 재생)
+
+telegram_bot.build_application()으로 만든 실제 Application에 합성하거나 기록해 둔 Update 스트림을
+지정한 속도로 넣고, 핸들러 지연(p50/p95/p99), 처리량, 이벤트 루프 지연(lag)을 보고합니다.
+Bot API 호출은 가짜 요청 객체가, DART는 fake_dart_server가, Gemini는 스텁 클라이언트가 대신합니다.
+
+사용 예)
+    python benchmarks/load_bot.py --rate 20 --duration 30 --users 50
+    python benchmarks/load_bot.py --mix stock=0.3,chat=0.6,reset=0.1 --concurrent 8
+    python benchmarks/load_bot.py --save updates.jsonl       # 합성 스트림 저장
+    python benchmarks/load_bot.py --replay updates.jsonl     # 저장/기록된 스트림 재생
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import itertools
+import xml.etree.ElementTree as ET
+from collections import Counter, defaultdict
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.dirname(BENCH_DIR), BENCH_DIR]
+
+from telegram.request import BaseRequest  # noqa: E402
+
+from fake_dart_server import start_offline_env, FIXTURES_DIR  # noqa: E402
+from stubs import StubGeminiClient  # noqa: E402
+
+BOT_USER = {"id": 123456, "is_bot": True, "first_name": "InvSkyBench", "username": "invsky_bench_bot",
+            "can_join_groups": True, "can_read_all_group_messages": False, "supports_inline_queries": False}
+
+CHAT_TEXTS = [
+    "금리 인상이 주식에 미치는 영향이 뭐야?",
+    "PER이랑 PBR 차이 알려줘",
+    "배당주 투자할 때 주의할 점은?",
+    "환율이 오르면 수출주는 어떻게 돼?",
+]
+
+DEFAULT_MIX = "stock=0.2,chat=0.7,reset=0.1"
+
+
+# ──────────────────────────────────────────────
+# 가짜 Bot API
+# ──────────────────────────────────────────────
+class FakeBotRequest(BaseRequest):
+    """
+    Bot API 요청에 성공 응답을 돌려주는 요청 객체. ApplicationBuilder().request(...)에 넣어 사용합니다.
+    latency로 Telegram 서버 왕복 시간을 흉내 냅니다.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = Counter()
+        self._message_ids = itertools.count(1)
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    @property
+    def read_timeout(self):
+        return None
+
+    async def do_request(self, url, method, request_data=None, read_timeout=None,
+                         write_timeout=None, connect_timeout=None, pool_timeout=None):
+        api_method = url.rsplit("/", 1)[-1]
+        self.calls[api_method] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        params = request_data.parameters if request_data else {}
+        if api_method == "getMe":
+            result = BOT_USER
+        elif api_method.startswith("send") and api_method != "sendChatAction":
+            result = {
+                "message_id": next(self._message_ids), "date": int(time.time()),
+                "chat": {"id": params.get("chat_id", 0), "type": "private"},
+                "from": BOT_USER, "text": params.get("text", ""),
+            }
+        else:
+            result = True
+        return 200, json.dumps({"ok": True, "result": result}).encode("utf-8")
+
+
+# ──────────────────────────────────────────────
+# Update 스트림
+# ──────────────────────────────────────────────
+def parse_mix(mix: str) -> dict:
+    weights = {}
+    for part in mix.split(","):
+        kind, _, weight = part.partition("=")
+        if kind.strip() not in ("stock", "chat", "reset"):
+            raise ValueError(f"알 수 없는 요청 종류: {kind}")
+        weights[kind.strip()] = float(weight)
+    return weights
+
+
+def make_update_dict(update_id: int, user_id: int, text: str) -> dict:
+    message = {
+        "message_id": update_id, "date": int(time.time()), "text": text,
+        "chat": {"id": user_id, "type": "private"},
+        "from": {"id": user_id, "is_bot": False, "first_name": f"user{user_id}"},
+    }
+    if text.startswith("/"):
+        message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+    return {"update_id": update_id, "message": message}
+
+
+def synthesize_updates(count: int, users: int, mix: dict, corp_names: list, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    kinds, weights = zip(*mix.items())
+    updates = []
+    for update_id in range(1, count + 1):
+        kind = rng.choices(kinds, weights)[0]
+        if kind == "stock":
+            text = f"/stock {rng.choice(corp_names)}"
+        elif kind == "reset":
+            text = "/reset"
+        else:
+            text = rng.choice(CHAT_TEXTS)
+        updates.append(make_update_dict(update_id, rng.randint(1, users), text))
+    return updates
+
+
+def read_updates(path: str) -> list:
+    """JSONL(줄마다 Bot API Update 객체) 파일을 읽습니다. getUpdates 응답을 그대로 기록해 둔 파일도 됩니다."""
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def update_kind(update_dict: dict) -> str:
+    text = (update_dict.get("message") or {}).get("text", "")
+    return text.split()[0].lstrip("/").split("@")[0] if text.startswith("/") else "chat"
+
+
+# ──────────────────────────────────────────────
+# 부하 실행
+# ──────────────────────────────────────────────
+def percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+    return ordered[idx]
+
+
+def summarize(latencies: list) -> dict:
+    return {
+        "count": len(latencies),
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": max(latencies, default=0.0) * 1000,
+    }
+
+
+async def _monitor_loop_lag(samples: list, interval: float, stop: asyncio.Event):
+    """interval마다 깨어나 예정보다 늦어진 시간을 기록 (동기 호출이 루프를 막은 정도)"""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        started = loop.time()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, loop.time() - started - interval))
+
+
+async def run_load(update_dicts: list, rate: float, concurrent=None, poisson: bool = True,
+                   telegram_latency: float = 0.0, drain_timeout: float = 120.0, seed: int = 0) -> dict:
+    """
+    update_dicts를 초당 rate개 속도(개방형 부하)로 Application 큐에 넣고 결과 통계를 반환합니다.
+    concurrent: 동시 처리 Update 수 (None이면 봇 기본값 BOT_CONCURRENCY, 1이면 순차 처리)
+    """
+    from telegram import Update
+    from telegram.ext import ApplicationBuilder, TypeHandler
+    import telegram_bot
+
+    request = FakeBotRequest(latency=telegram_latency)
+    builder = ApplicationBuilder().token(os.environ["TELEGRAM_BOT_TOKEN"]).request(request).updater(None)
+    app = telegram_bot.build_application(builder, concurrency=concurrent)
+
+    enqueued, latencies = {}, defaultdict(list)
+    errors = Counter()
+    last_done = {}          # 사용자별 마지막으로 끝난 update_id (순서 보장 확인용)
+    order_violations = 0
+    done = asyncio.Event()
+    total = len(update_dicts)
+
+    async def record_done(update, context):
+        # 모든 그룹의 핸들러가 끝난 뒤 마지막 그룹에서 호출됨
+        nonlocal order_violations
+        user_id = update.effective_user.id if update.effective_user else None
+        if last_done.get(user_id, -1) > update.update_id:
+            order_violations += 1
+        last_done[user_id] = max(last_done.get(user_id, -1), update.update_id)
+        latencies[update_kind(update.to_dict())].append(time.perf_counter() - enqueued[update.update_id])
+        if sum(len(v) for v in latencies.values()) >= total:
+            done.set()
+
+    async def record_error(update, context):
+        if isinstance(update, Update):
+            errors[update_kind(update.to_dict())] += 1
+
+    app.add_handler(TypeHandler(Update, record_done), group=99)
+    app.add_error_handler(record_error)
+
+    rng = random.Random(seed)
+    lag_samples, stop_monitor = [], asyncio.Event()
+
+    async with app:
+        await app.start()
+        monitor = asyncio.create_task(_monitor_loop_lag(lag_samples, 0.01, stop_monitor))
+        started = time.perf_counter()
+        next_at = started
+        for data in update_dicts:
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            update = Update.de_json(data, app.bot)
+            enqueued[update.update_id] = time.perf_counter()
+            await app.update_queue.put(update)
+            next_at += rng.expovariate(rate) if poisson else 1.0 / rate
+        offered_elapsed = time.perf_counter() - started
+
+        try:
+            await asyncio.wait_for(done.wait(), timeout=drain_timeout)
+        except asyncio.TimeoutError:
+            print(f"⚠️ {drain_timeout:.0f}초 안에 모든 Update를 처리하지 못했습니다.")
+        # /stock 실시간 분석은 작업 큐에서 끝남 (Update 지연은 큐에 들어가기까지, 처리량은 작업 완료까지)
+        try:
+            await asyncio.wait_for(telegram_bot.tasks.join(), timeout=drain_timeout)
+        except asyncio.TimeoutError:
+            print(f"⚠️ {drain_timeout:.0f}초 안에 작업 큐를 비우지 못했습니다.")
+        elapsed = time.perf_counter() - started
+        stop_monitor.set()
+        await monitor
+        await app.stop()
+
+    all_latencies = [v for values in latencies.values() for v in values]
+    return {
+        "updates": total,
+        "completed": len(all_latencies),
+        "errors": dict(errors),
+        "order_violations": order_violations,
+        "offered_rate": total / offered_elapsed if offered_elapsed else 0.0,
+        "throughput": len(all_latencies) / elapsed if elapsed else 0.0,
+        "elapsed_s": elapsed,
+        "latency": summarize(all_latencies),
+        "by_command": {kind: summarize(values) for kind, values in sorted(latencies.items())},
+        "loop_lag": summarize(lag_samples),
+        "bot_api_calls": dict(request.calls),
+    }
+
+
+def print_report(report: dict):
+    print(f"\n📦 Update {report['updates']}건 / 처리 {report['completed']}건 / 오류 {sum(report['errors'].values())}건")
+    print(f"   사용자별 순서 위반 {report['order_violations']}건")
+    print(f"   투입 속도 {report['offered_rate']:.1f}/s, 처리량 {report['throughput']:.1f}/s, 소요 {report['elapsed_s']:.1f}s\n")
+    header = f"{'구분':<10}{'건수':>7}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}  (ms)"
+    print(header)
+    print("─" * len(header))
+    rows = [("전체", report["latency"])] + list(report["by_command"].items()) + [("loop lag", report["loop_lag"])]
+    for name, s in rows:
+        print(f"{name:<10}{s['count']:>7}{s['p50_ms']:>10.1f}{s['p95_ms']:>10.1f}{s['p99_ms']:>10.1f}{s['max_ms']:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="텔레그램 봇 Update 재생 부하 테스트")
+    parser.add_argument("--rate", type=float, default=10.0, help="초당 투입 Update 수")
+    parser.add_argument("--duration", type=float, default=20.0, help="합성 시 투입 시간 (초)")
+    parser.add_argument("--users", type=int, default=20, help="합성 시 사용자 수")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="합성 시 요청 비율 (stock/chat/reset)")
+    parser.add_argument("--replay", help="재생할 Update JSONL 파일")
+    parser.add_argument("--save", help="합성한 Update 스트림을 JSONL로 저장")
+    parser.add_argument("--concurrent", type=int, help="동시 처리 Update 수 (미지정 시 봇 기본 설정)")
+    parser.add_argument("--fixed-interval", action="store_true", help="포아송 대신 고정 간격으로 투입")
+    parser.add_argument("--dart-latency", type=float, default=0.05, help="Fake DART 응답 지연 (초)")
+    parser.add_argument("--gemini-latency", type=float, default=1.5, help="Gemini 스텁 응답 지연 (초)")
+    parser.add_argument("--telegram-latency", type=float, default=0.05, help="Bot API 왕복 지연 (초)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="결과를 JSON 파일로 저장")
+    args = parser.parse_args()
+    # 오프라인 환경은 임시 디렉터리로 이동하므로 경로는 미리 절대경로로
+    json_path = os.path.abspath(args.json) if args.json else None
+
+    if args.replay:
+        updates = read_updates(args.replay)
+    else:
+        corp_xml = ET.parse(os.path.join(FIXTURES_DIR, "CORPCODE.xml"))
+        corp_names = [item.findtext("corp_name") for item in corp_xml.iter("list")]
+        count = max(1, int(args.rate * args.duration))
+        updates = synthesize_updates(count, args.users, parse_mix(args.mix), corp_names, args.seed)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(u, ensure_ascii=False) + "\n" for u in updates)
+
+    server = start_offline_env(latency=args.dart_latency, handshake_latency=0.03)
+    try:
+        import telegram_bot
+        from gemini_handler import GeminiHandler
+        telegram_bot._gemini = GeminiHandler(client=StubGeminiClient(latency=args.gemini_latency),
+                                             cache=telegram_bot.cache, store=telegram_bot.state)
+
+        report = asyncio.run(run_load(updates, args.rate, args.concurrent, not args.fixed_interval,
+                                      args.telegram_latency, seed=args.seed))
+    finally:
+        server.stop()
+
+    print_report(report)
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+record_fixtures.py
+fake_dart_server.py가 돌려줄 응답 픽스처를 만듭니다.
+
+- 기본(live): 실제 Open DART API(DART_API_KEY 필요)의 응답을 그대로 기록합니다.
+- --synthetic: 네트워크 없이 같은 스키마의 합성 응답을 생성합니다. (저장소에 포함된 픽스처)
+
+사용 예)
+    python benchmarks/record_fixtures.py 00126380 00164779 --years 2022 2023 2024 2025
+    python benchmarks/record_fixtures.py --synthetic
+"""
+import os
+import sys
+import json
+import random
+import argparse
+import xml.etree.ElementTree as ET
+
+import requests
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+DART_API = "https://opendart.fss.or.kr/api"
+
+REPRT_CODES = ["11013", "11012", "11014", "11011"]  # 1Q, 반기, 3Q, 사업보고서
+PERIOD_SUFFIX = {"11013": ("분기보고서", "03", "0515"), "11012": ("반기보고서", "06", "0814"),
+                 "11014": ("분기보고서", "09", "1114"), "11011": ("사업보고서", "12", "0312")}
+
+# (corp_code, corp_name, stock_code, induty_code, 연매출(억원))
+SYNTHETIC_CORPS = [
+    ("00126380", "삼성전자", "005930", "264", 3_000_000),
+    ("00164779", "SK하이닉스", "000660", "261", 600_000),
+] + [
+    (f"99{n:06d}", f"벤치마크기업{n:02d}", f"99{n:04d}", random.Random(n).choice(["264", "212", "581", "303"]),
+     random.Random(n).randint(500, 50_000))
+    for n in range(1, 9)
+]
+
+BS_ACCOUNTS = ["유동자산", "비유동자산", "자산총계", "유동부채", "비유동부채", "부채총계", "자본금", "이익잉여금", "자본총계"]
+IS_ACCOUNTS = ["매출액", "영업이익", "법인세차감전 순이익", "당기순이익"]
+
+
+def write_json(name, obj):
+    with open(os.path.join(FIXTURES_DIR, name), "w", encoding="utf-8") as f:
+        json.dump(obj, f, ensure_ascii=False, separators=(",", ":"))
+
+
+# ──────────────────────────────────────────────
+# 합성 픽스처
+# ──────────────────────────────────────────────
+def _finstate_rows(corp_code, stock_code, year, reprt_code, annual_eok, rng):
+    quarter = REPRT_CODES.index(reprt_code) + 1
+    growth = 1 + 0.05 * (year - 2022)
+    revenue = annual_eok * 1e8 * growth * quarter / 4 * rng.uniform(0.9, 1.1)
+    op = revenue * rng.uniform(-0.05, 0.2)
+    values = {
+        "매출액": revenue, "영업이익": op, "법인세차감전 순이익": op * 1.05, "당기순이익": op * 0.8,
+        "자산총계": annual_eok * 1e8 * 1.5, "부채총계": annual_eok * 1e8 * 0.5, "자본총계": annual_eok * 1e8,
+        "유동자산": annual_eok * 1e8 * 0.7, "비유동자산": annual_eok * 1e8 * 0.8,
+        "유동부채": annual_eok * 1e8 * 0.3, "비유동부채": annual_eok * 1e8 * 0.2,
+        "자본금": annual_eok * 1e6, "이익잉여금": annual_eok * 1e8 * 0.9,
+    }
+    rows = []
+    for fs_div, fs_nm, scale in [("CFS", "연결재무제표", 1.0), ("OFS", "재무제표", 0.8)]:
+        for ord_no, account in enumerate(BS_ACCOUNTS + IS_ACCOUNTS, start=1):
+            sj_div, sj_nm = ("BS", "재무상태표") if account in BS_ACCOUNTS else ("IS", "손익계산서")
+            rows.append({
+                "rcept_no": f"{year + (reprt_code == '11011')}{PERIOD_SUFFIX[reprt_code][2]}{int(corp_code) % 1000000:06d}",
+                "reprt_code": reprt_code, "bsns_year": str(year), "corp_code": corp_code, "stock_code": stock_code,
+                "fs_div": fs_div, "fs_nm": fs_nm, "sj_div": sj_div, "sj_nm": sj_nm, "account_nm": account,
+                "thstrm_nm": f"제 {year - 1969} 기", "thstrm_amount": f"{int(values[account] * scale):,}",
+                "frmtrm_nm": f"제 {year - 1970} 기", "frmtrm_amount": f"{int(values[account] * scale * 0.95):,}",
+                "ord": str(ord_no), "currency": "KRW",
+            })
+    return rows
+
+
+def make_synthetic(last_year=2026, last_year_quarters=2):
+    rng = random.Random(42)
+    corp_list = ET.Element("result")
+    finstate, listing, company, document = {}, {}, {}, {}
+
+    for corp_code, corp_name, stock_code, induty_code, annual_eok in SYNTHETIC_CORPS:
+        item = ET.SubElement(corp_list, "list")
+        for tag, text in [("corp_code", corp_code), ("corp_name", corp_name), ("stock_code", stock_code),
+                          ("modify_date", "20250101")]:
+            ET.SubElement(item, tag).text = text
+
+        company[corp_code] = {
+            "status": "000", "message": "정상", "corp_code": corp_code, "corp_name": corp_name,
+            "stock_name": corp_name, "stock_code": stock_code, "corp_cls": "Y" if annual_eok > 10_000 else "K",
+            "induty_code": induty_code, "acc_mt": "12", "est_dt": "19690113",
+        }
+
+        rows = []
+        for year in range(2022, last_year + 1):
+            codes = REPRT_CODES if year < last_year else REPRT_CODES[:last_year_quarters]
+            for reprt_code in codes:
+                key = f"{corp_code}:{year}:{reprt_code}"
+                fs = _finstate_rows(corp_code, stock_code, year, reprt_code, annual_eok, rng)
+                finstate[key] = {"status": "000", "message": "정상", "list": fs}
+                name, month, filed = PERIOD_SUFFIX[reprt_code]
+                filed_year = year + 1 if reprt_code == "11011" else year
+                rows.append({
+                    "corp_code": corp_code, "corp_name": corp_name, "stock_code": stock_code,
+                    "corp_cls": company[corp_code]["corp_cls"], "report_nm": f"{name} ({year}.{month})",
+                    "rcept_no": fs[0]["rcept_no"], "flr_nm": corp_name, "rcept_dt": f"{filed_year}{filed}",
+                    "rm": "", "pblntf_ty": "A",
+                })
+            rcept_no = f"{year}0620{int(corp_code) % 1000000:06d}"
+            rows.append({
+                "corp_code": corp_code, "corp_name": corp_name, "stock_code": stock_code,
+                "corp_cls": company[corp_code]["corp_cls"], "report_nm": "주요사항보고서(유상증자결정)",
+                "rcept_no": rcept_no, "flr_nm": corp_name, "rcept_dt": f"{year}0620", "rm": "", "pblntf_ty": "B",
+            })
+            document[rcept_no] = (
+                f"<DOCUMENT><TITLE>주요사항보고서(유상증자결정)</TITLE><BODY><P>{corp_name} 제3자배정 유상증자 결정"
+                f" — 신주 {rng.randint(1, 50) * 100000:,}주, 자금조달 목적: 시설자금 및 운영자금</P></BODY></DOCUMENT>"
+            )
+        listing[corp_code] = sorted(rows, key=lambda r: r["rcept_dt"], reverse=True)
+
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    ET.ElementTree(corp_list).write(os.path.join(FIXTURES_DIR, "CORPCODE.xml"), encoding="utf-8", xml_declaration=True)
+    write_json("fnlttSinglAcnt.json", finstate)
+    write_json("list.json", listing)
+    write_json("company.json", company)
+    write_json("document.json", document)
+
+
+# ──────────────────────────────────────────────
+# 실제 API 기록
+# ──────────────────────────────────────────────
+def record_live(api_key, corp_codes, years):
+    session = requests.Session()
+    finstate, listing, company = {}, {}, {}
+    for corp_code in corp_codes:
+        for year in years:
+            for reprt_code in REPRT_CODES:
+                r = session.get(f"{DART_API}/fnlttSinglAcnt.json", params={
+                    "crtfc_key": api_key, "corp_code": corp_code, "bsns_year": year, "reprt_code": reprt_code})
+                jo = r.json()
+                if jo.get("status") == "000":
+                    finstate[f"{corp_code}:{year}:{reprt_code}"] = jo
+        r = session.get(f"{DART_API}/list.json", params={
+            "crtfc_key": api_key, "corp_code": corp_code, "bgn_de": f"{min(years)}0101", "page_count": 100})
+        listing[corp_code] = r.json().get("list", [])
+        company[corp_code] = session.get(f"{DART_API}/company.json",
+                                         params={"crtfc_key": api_key, "corp_code": corp_code}).json()
+        print(f"{corp_code}: 기록 완료")
+
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    write_json("fnlttSinglAcnt.json", finstate)
+    write_json("list.json", listing)
+    write_json("company.json", company)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="fake_dart_server 픽스처 생성")
+    parser.add_argument("corp_codes", nargs="*", help="기록할 DART 고유번호")
+    parser.add_argument("--years", nargs="+", type=int, default=[2023, 2024, 2025])
+    parser.add_argument("--synthetic", action="store_true", help="네트워크 없이 합성 픽스처 생성")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        make_synthetic()
+        print(f"합성 픽스처 생성 완료: {FIXTURES_DIR}")
+        sys.exit(0)
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    key = os.getenv("DART_API_KEY")
+    if not key or not args.corp_codes:
+        parser.error("DART_API_KEY와 고유번호가 필요합니다. (또는 --synthetic)")
+    record_live(key, args.corp_codes, args.years)
@@ -0,0 +1,71 @@
+"""
+stubs.py
+벤치마크용 Gemini 클라이언트 스텁
+
+google-genai Client와 같은 호출 모양(client.models.generate_content, client.aio.models.generate_content)을
+흉내 내며, 설정한 지연 후 고정된 리포트를 돌려줍니다. fail_rate 비율로 RESOURCE_EXHAUSTED 오류를 냅니다.
+fail_models에 넣은 모델은 항상 할당량 초과로 실패하고, slow_rate 비율의 호출은 slow_latency만큼 늦게 답합니다(꼬리 지연).
+"""
+import time
+import random
+import asyncio
+import threading
+from types import SimpleNamespace
+
+STUB_REPORT = (
+    "📊 재무 상태 한 줄 요약: 매출과 이익이 함께 늘고 있습니다.\n\n"
+    "📈 추세: 최근 분기 영업이익률이 개선되었습니다.\n\n"
+    "💪 강점:\n- 안정적인 매출 성장\n- 낮은 부채비율\n\n"
+    "⚠️ 리스크 요인:\n- 유상증자에 따른 지분 희석\n\n"
+    "💡 투자자 코멘트: 실적 개선 흐름을 확인하며 접근하세요."
+)
+
+
+class StubQuotaError(Exception):
+    pass
+
+
+class _Models:
+    def __init__(self, stub):
+        self._stub = stub
+
+    def generate_content(self, model, contents, config=None):
+        time.sleep(self._stub._before_call(model))
+        return SimpleNamespace(text=self._stub.text)
+
+
+class _AsyncModels:
+    def __init__(self, stub):
+        self._stub = stub
+
+    async def generate_content(self, model, contents, config=None):
+        await asyncio.sleep(self._stub._before_call(model))
+        return SimpleNamespace(text=self._stub.text)
+
+
+class StubGeminiClient:
+    def __init__(self, latency: float = 0.0, fail_rate: float = 0.0, text: str = STUB_REPORT, seed: int = 0,
+                 fail_models=(), slow_rate: float = 0.0, slow_latency: float = 0.0):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.fail_models = set(fail_models)
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.calls_by_model = {}
+        self.text = text
+        self.calls = 0
+        self.models = _Models(self)
+        self.aio = SimpleNamespace(models=_AsyncModels(self))
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _before_call(self, model) -> float:
+        """호출 수를 세고, 실패할 차례면 예외를 내며, 아니면 이번 호출의 지연(초)을 반환합니다."""
+        with self._lock:
+            self.calls += 1
+            self.calls_by_model[model] = self.calls_by_model.get(model, 0) + 1
+            failed = model in self.fail_models or (self.fail_rate > 0 and self._rng.random() < self.fail_rate)
+            slow = self.slow_rate > 0 and self._rng.random() < self.slow_rate
+        if failed:
+            raise StubQuotaError(f"429 RESOURCE_EXHAUSTED: quota exceeded for {model}")
+        return self.slow_latency if slow else self.latency
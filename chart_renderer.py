@@ -0,0 +1,147 @@
+"""
+chart_renderer.py
+분기별 재무 실적 차트(매출액/영업이익/당기순이익 + YoY) 렌더링 공용 모듈
+
+- Agg 백엔드로 화면 없이 렌더링합니다 (서버, 봇, 배치 프로세스 공통).
+- 분기 개수·크기별로 Figure 템플릿을 한 번만 만들고, 이후에는 막대 높이·선·라벨 값만 바꿔서 다시 그립니다.
+  (축/막대/텍스트 객체를 매번 새로 만드는 비용과 bbox_inches='tight'의 이중 렌더링을 없앰)
+- PNG와 WebP 출력을 지원하며, 'telegram' 프리셋은 텔레그램 사진 규격(긴 변 1280px 이하)에 맞춥니다.
+"""
+import io
+import threading
+from functools import lru_cache
+
+import matplotlib
+matplotlib.use("Agg")  # 서버/자식 프로세스에서 화면 없이 렌더링
+import matplotlib.pyplot as plt
+import matplotlib.font_manager as fm
+import numpy as np
+
+# 한글 폰트 설정 (Windows: 맑은 고딕, Linux 서버: 나눔고딕) — 설치된 폰트만 지정해 경고 로그를 막음
+KOREAN_FONTS = ['Malgun Gothic', 'NanumGothic', 'AppleGothic']
+_installed = {f.name for f in fm.fontManager.ttflist}
+plt.rcParams['font.family'] = [f for f in KOREAN_FONTS if f in _installed] or ['DejaVu Sans']
+plt.rcParams['axes.unicode_minus'] = False
+
+ACCOUNTS = [
+    ('Revenue', 'Rev_YoY', '매출액'),
+    ('OpIncome', 'Op_YoY', '영업이익'),
+    ('NetIncome', 'Net_YoY', '당기순이익')
+]
+
+BAR_COLOR  = '#4e79a7'
+LINE_COLOR = '#e15759'
+
+# 프리셋: (figsize(inch), dpi, 라벨 글자 크기)
+PRESETS = {
+    'telegram': ((8, 10), 120, 7),    # 960 x 1200 px
+    'thumb':    ((6, 7.5), 100, 6),   # 600 x 750 px
+    'print':    ((14, 18), 300, 9),   # 기존 analyze_samchundang.py 출력 크기
+}
+
+FORMATS = {'png', 'webp'}
+
+
+class FinancialChartTemplate:
+    """분기 개수(n_periods)와 프리셋이 같은 차트를 반복 렌더링하기 위한 재사용 Figure"""
+
+    def __init__(self, n_periods: int, preset: str = 'telegram'):
+        figsize, self.dpi, fontsize = PRESETS[preset]
+        self.n = n_periods
+        # 같은 Figure를 재사용하므로 봇의 여러 스레드가 동시에 그리지 않도록 잠금
+        self._lock = threading.Lock()
+        self.fig, axes = plt.subplots(3, 1, figsize=figsize)
+        self.fig.subplots_adjust(left=0.09, right=0.91, top=0.96, bottom=0.06, hspace=0.55)
+        x = np.arange(n_periods)
+        self.x = x
+        self.panels = []
+
+        for ax1 in axes:
+            bars = ax1.bar(x, np.zeros(n_periods), color=BAR_COLOR, alpha=0.7, label='금액 (억 원)')
+            ax1.set_ylabel('금액 (억 원)', color=BAR_COLOR, fontsize=fontsize + 2)
+            ax1.tick_params(axis='y', labelcolor=BAR_COLOR, labelsize=fontsize)
+            ax1.set_xticks(x)
+            ax1.tick_params(axis='x', labelrotation=45, labelsize=fontsize)
+            ax1.margins(y=0.15)
+            title = ax1.set_title("", fontsize=fontsize + 4, fontweight='bold')
+            bar_labels = [ax1.text(i, 0, "", ha='center', va='bottom', fontsize=fontsize) for i in x]
+
+            ax2 = ax1.twinx()
+            line, = ax2.plot(x, np.full(n_periods, np.nan), color=LINE_COLOR, marker='o', linewidth=2,
+                             label='전년 동기 대비 증감율 (%)')
+            ax2.set_ylabel('증감율 (%)', color=LINE_COLOR, fontsize=fontsize + 2)
+            ax2.tick_params(axis='y', labelcolor=LINE_COLOR, labelsize=fontsize)
+            ax2.axhline(0, color='gray', linestyle='--', linewidth=0.8)  # 0% 기준선
+            ax2.margins(y=0.15)
+            yoy_labels = [ax2.text(i, 0, "", ha='center', color=LINE_COLOR, fontsize=fontsize) for i in x]
+
+            # 범례 (두 축 합치기)
+            ax1.legend([bars, line], [bars.get_label(), line.get_label()], loc='upper left', fontsize=fontsize)
+            self.panels.append((ax1, ax2, title, bars, bar_labels, line, yoy_labels))
+
+    def render(self, df, corp_name, fmt='png'):
+        """add_yoy()를 거친 분기 테이블로 차트를 갱신하고 이미지 바이트를 반환합니다."""
+        with self._lock:
+            return self._render(df, corp_name, fmt)
+
+    def _render(self, df, corp_name, fmt):
+        periods = df['Period'].tolist()
+
+        for (acc, acc_yoy, name), (ax1, ax2, title, bars, bar_labels, line, yoy_labels) in zip(ACCOUNTS, self.panels):
+            heights = df[acc].to_numpy(dtype=float) / 1e8
+            yoy = df[acc_yoy].to_numpy(dtype=float)
+            yoy = np.where(np.isfinite(yoy), yoy, np.nan)
+
+            title.set_text(f"{corp_name} 분기별 {name} 추이")
+            ax1.set_xticklabels(periods)
+
+            for rect, label, i, h in zip(bars.patches, bar_labels, self.x, heights):
+                rect.set_height(h)
+                label.set_position((i, h))
+                label.set_text(f"{int(h)}")
+                label.set_va('bottom' if h >= 0 else 'top')
+
+            line.set_ydata(yoy)
+            for label, i, v in zip(yoy_labels, self.x, yoy):
+                has_value = not np.isnan(v)
+                label.set_visible(has_value)
+                if has_value:
+                    label.set_position((i, v))
+                    label.set_text(f"{v:.1f}%")
+                    label.set_va('bottom' if v > 0 else 'top')
+
+            for ax in (ax1, ax2):
+                ax.relim()
+                ax.autoscale_view()
+
+        buf = io.BytesIO()
+        save_kwargs = {'pil_kwargs': {'quality': 80, 'method': 4}} if fmt == 'webp' else {}
+        self.fig.savefig(buf, format=fmt, dpi=self.dpi, **save_kwargs)
+        return buf.getvalue()
+
+
+@lru_cache(maxsize=16)
+def get_template(n_periods: int, preset: str = 'telegram') -> FinancialChartTemplate:
+    """프로세스별 템플릿 캐시 (분기 수·프리셋 조합마다 Figure 하나)"""
+    return FinancialChartTemplate(n_periods, preset)
+
+
+def render_financial_chart(df, corp_name, output_file=None, fmt=None, preset='telegram'):
+    """
+    add_yoy()를 거친 분기 테이블을 받아 3단 차트를 렌더링합니다.
+    output_file을 주면 파일로 저장하고 경로를, 아니면 이미지 바이트를 반환합니다.
+    fmt를 생략하면 output_file 확장자(없으면 png)를 따릅니다.
+    """
+    if fmt is None:
+        fmt = output_file.rsplit('.', 1)[-1].lower() if output_file and '.' in output_file else 'png'
+    if fmt not in FORMATS:
+        raise ValueError(f"지원하지 않는 이미지 형식입니다: {fmt}")
+    if df.empty:
+        raise ValueError("차트를 그릴 데이터가 없습니다.")
+
+    image = get_template(len(df), preset).render(df, corp_name, fmt)
+    if output_file is None:
+        return image
+    with open(output_file, 'wb') as f:
+        f.write(image)
+    return output_file
@@ -0,0 +1,116 @@
+"""
+context_builder.py
+/stock 분석용 Gemini 프롬프트 컨텍스트(피처 시트) 생성기
+
+캐시된 DART 데이터로 다년도 분기 추이, 이익률, 최근 공시 제목을 압축된 표 형태로 만들고,
+토큰 예산을 넘으면 오래된 분기와 공시부터 잘라냅니다.
+같은 데이터에는 항상 같은 문자열이 나오므로 프롬프트 캐시/응답 캐시 키로 쓸 수 있습니다.
+"""
+import math
+import datetime
+
+from financials import load_quarterly_financials, annual_from_quarterly, add_yoy
+from schema import format_rcept_dt
+
+DEFAULT_TOKEN_BUDGET = 1200
+DEFAULT_YEARS        = 3
+MAX_DISCLOSURES      = 10
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    토큰 수 근사치. 한글은 글자당 약 1토큰, 그 외(숫자/기호/영문)는 4글자당 약 1토큰으로 계산합니다.
+    """
+    hangul = sum(1 for ch in text if "가" <= ch <= "힣")
+    return hangul + (len(text) - hangul + 3) // 4
+
+
+def _eok(val) -> str:
+    """원 단위 금액을 억원 정수 문자열로 변환"""
+    return f"{val / 1e8:,.0f}"
+
+
+def _pct(num, den) -> str:
+    return f"{num / den * 100:.1f}" if den else "-"
+
+
+def _annual_lines(df_annual) -> list:
+    lines = []
+    for row in df_annual.itertuples(index=False):
+        lines.append(
+            f"{row.Year}|{_eok(row.Revenue)}|{_eok(row.OpIncome)}|{_pct(row.OpIncome, row.Revenue)}"
+            f"|{_eok(row.NetIncome)}|{_pct(row.NetIncome, row.Revenue)}"
+        )
+    return lines
+
+
+def _quarter_lines(df_quarterly) -> list:
+    df = add_yoy(df_quarterly)  # 전년 동기는 (연도-1, 분기) 키로 맞춤 — 빠진 분기가 있어도 어긋나지 않음
+    lines = []
+    for row in df.itertuples(index=False):
+        yoy = f"{row.Rev_YoY:.1f}" if math.isfinite(row.Rev_YoY) else "-"
+        lines.append(
+            f"{row.Period}|{_eok(row.Revenue)}|{_eok(row.OpIncome)}|{_pct(row.OpIncome, row.Revenue)}"
+            f"|{_eok(row.NetIncome)}|{yoy}"
+        )
+    return lines
+
+
+def _disclosure_lines(disclosures) -> list:
+    if disclosures is None or disclosures.empty:
+        return []
+    lines = []
+    for row in disclosures.head(MAX_DISCLOSURES).itertuples(index=False):
+        dt = format_rcept_dt(getattr(row, "rcept_dt", ""))
+        lines.append(f"{dt} {str(row.report_nm).strip()}")
+    return lines
+
+
+def build_feature_sheet(corp_name, df_quarterly, disclosures=None,
+                        token_budget: int = DEFAULT_TOKEN_BUDGET) -> str:
+    """
+    분기 실적 테이블과 공시 목록으로 압축 피처 시트를 만듭니다.
+    예산을 넘으면 오래된 공시 제목(최근 3건까지) → 오래된 분기(최근 8개까지)
+    → 나머지 공시 → 오래된 분기(최근 4개까지) 순서로 제거합니다. 연간 실적은 항상 남깁니다.
+    """
+    annual = _annual_lines(annual_from_quarterly(df_quarterly)) if not df_quarterly.empty else []
+    quarters = _quarter_lines(df_quarterly) if not df_quarterly.empty else []
+    titles = _disclosure_lines(disclosures)
+
+    def render():
+        parts = [f"[기업] {corp_name}", "[단위] 억원, %"]
+        if annual:
+            parts.append("[연간] 연도|매출|영업이익|OPM|순이익|NPM")
+            parts.extend(annual)
+        if quarters:
+            parts.append("[분기] 기간|매출|영업이익|OPM|순이익|매출YoY")
+            parts.extend(quarters)
+        if titles:
+            parts.append("[최근공시]")
+            parts.extend(titles)
+        return "\n".join(parts)
+
+    # (목록, 최소 유지 개수, 앞쪽(오래된 분기)부터 제거 여부) 순서대로 줄여 나감
+    trim_steps = [(titles, 3, False), (quarters, 8, True), (titles, 0, False), (quarters, 4, True)]
+
+    sheet = render()
+    for items, keep, from_front in trim_steps:
+        while estimate_tokens(sheet) > token_budget and len(items) > keep:
+            items.pop(0 if from_front else -1)
+            sheet = render()
+    return sheet
+
+
+def build_stock_context(handler, corp_code, corp_name, years: int = DEFAULT_YEARS,
+                        token_budget: int = DEFAULT_TOKEN_BUDGET) -> str:
+    """DartHandler(캐시 사용)로 데이터를 모아 /stock 분석용 피처 시트를 반환합니다."""
+    current_year = datetime.datetime.now().year
+    df_quarterly = load_quarterly_financials(handler, corp_code, current_year - years, current_year)
+
+    try:
+        disclosures = handler.get_recent_disclosures(corp_code, count=MAX_DISCLOSURES)
+    except Exception as e:
+        print(f"Error fetching disclosures: {e}")
+        disclosures = None
+
+    return build_feature_sheet(corp_name, df_quarterly, disclosures, token_budget)
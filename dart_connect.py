@@ -1,8 +1,9 @@
 import os
-import requests
 import OpenDartReader
 from dotenv import load_dotenv
 
+import dart_http
+
 def main():
     # .env 파일 로드
     load_dotenv()
@@ -30,7 +31,7 @@ def main():
     
     try:
         print("\n--- 1. HTTP 연결 상태 확인 ---")
-        response = requests.get(url, params=params)
+        response = dart_http.get_session().get(url, params=params, timeout=dart_http.DEFAULT_TIMEOUT)
         
         # 상태 코드 출력
         print(f"HTTP Status Code: {response.status_code}")
@@ -56,6 +57,7 @@ def main():
     # 2. OpenDartReader 라이브러리 테스트
     print("\n--- 2. OpenDartReader 라이브러리 테스트 ---")
     try:
+        dart_http.install()
         dart = OpenDartReader(api_key)
         
         # 예시: 삼성전자(005930)의 2023년도 공시 목록 조회
@@ -1,11 +1,29 @@
-import OpenDartReader
-import pandas as pd
 import os
 import datetime
 from dotenv import load_dotenv
 
+import metrics
+import dart_http
+from filing_index import build_filing_index
+from schema import FinancialRecord, compact_finstate, compact_disclosures, parse_amount
+
+# 캐시 유효기간 (초)
+PAST_YEAR_TTL   = 30 * 24 * 3600   # 지난 연도 재무제표는 거의 바뀌지 않음
+RECENT_TTL      = 24 * 3600        # 올해 재무제표 (정정공시 가능)
+DISCLOSURE_TTL  = 3600             # 공시 목록
+FILING_INDEX_TTL = 6 * 3600        # 정기보고서 제출 현황 (새 보고서가 올라오면 반영되도록 짧게)
+NEGATIVE_TTL    = 6 * 3600         # DART가 "조회된 데이터 없음(013)"으로 답한 요청
+COMPANY_TTL     = 30 * 24 * 3600   # 기업개황 (업종·결산월·법인구분은 거의 바뀌지 않음)
+
+# 기업개황 응답에서 보관하는 항목
+COMPANY_FIELDS = ("corp_code", "corp_name", "stock_code", "corp_cls", "induty_code", "acc_mt", "est_dt")
+
+# 빈 결과를 캐시에 저장할 때 쓰는 표식
+EMPTY_RESULT = "__dart_empty__"
+
+
 class DartHandler:
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, cache=None):
         if api_key is None:
             load_dotenv()
             api_key = os.getenv("DART_API_KEY")
@@ -14,24 +32,80 @@ class DartHandler:
         if not self.api_key:
             raise ValueError("API Key is missing. Please check .env file.")
         
+        # DART_BASE_URL이 설정되어 있으면 해당 서버로 요청 (기업 코드 목록도 생성 시점에 받으므로 먼저 설치)
+        dart_http.install()
+        # OpenDartReader는 무거우므로 핸들러를 만들 때 불러옴
+        import OpenDartReader
         self.dart = OpenDartReader(self.api_key)
+        # DataCache 인스턴스 (None이면 캐시 없이 매번 DART를 호출)
+        self.cache = cache
+
+    def _cached(self, key, ttl, loader):
+        """
+        캐시에 결과가 있으면 반환하고, 없으면 loader()를 호출해 저장합니다.
+        빈 결과는 DART가 "데이터 없음(013)"으로 답한 경우에만 NEGATIVE_TTL 동안 기억하고 None을 반환합니다.
+        (한도 초과 등 오류로 비어 있는 결과는 저장하지 않음)
+        """
+        if self.cache is None:
+            with metrics.timer("dart_api", endpoint=key.split(":", 1)[0]):
+                return loader()
+        value = self.cache.get(key)
+        if value is not None:
+            if isinstance(value, str) and value == EMPTY_RESULT:
+                metrics.record_cache(hit=True, cache="dart_negative")
+                return None
+            return value
+        with metrics.timer("dart_api", endpoint=key.split(":", 1)[0]):
+            value = loader()
+        if value is not None and not getattr(value, "empty", False):
+            self.cache.set(key, value, ttl)
+        elif dart_http.last_status() == dart_http.NO_DATA_STATUS:
+            self.cache.set(key, EMPTY_RESULT, min(ttl, NEGATIVE_TTL))
+        return value
 
+    @metrics.timed("dart_call", method="find_corp_code")
     def find_corp_code(self, corp_name):
         try:
             return self.dart.find_corp_code(corp_name)
         except:
             return None
 
+    def find_stock_code(self, corp_code):
+        """기업 코드의 상장 종목코드(6자리)를 반환합니다. 비상장이면 None."""
+        try:
+            corp_list = self.dart.corp_codes
+            row = corp_list[corp_list['corp_code'] == corp_code]
+        except Exception:
+            return None
+        if row.empty:
+            return None
+        stock_code = str(row.iloc[0]['stock_code']).strip()
+        return stock_code or None
+
+    def listed_corp_codes(self, stock_codes):
+        """종목코드 목록 중 DART 기업 코드가 있는 것만 골라 {기업 코드: 종목코드} Series로 반환합니다."""
+        corp_list = self.dart.corp_codes
+        listed = corp_list[corp_list['stock_code'].isin(list(stock_codes))][['corp_code', 'stock_code']]
+        return listed.drop_duplicates('stock_code').set_index('corp_code')['stock_code']
+
+    @metrics.timed("dart_call", method="get_financial_data")
     def get_financial_data(self, corp_code, year, reprt_code):
         """
-        특정 연도/분기의 재무제표를 조회하여 핵심 지표(매출, 영업이익, 순이익)를 반환합니다.
+        특정 연도/분기의 재무제표를 조회하여 핵심 지표(매출, 영업이익, 순이익)를 FinancialRecord로 반환합니다.
         누적 데이터인지 여부는 DART가 제공하는 값에 따르며, 이 함수는 원본 값을 그대로 반환합니다.
         """
         try:
             # finstate 호출 (fs_div 인자 제거)
-            fs_all = self.dart.finstate(corp_code, year, reprt_code=reprt_code)
+            ttl = RECENT_TTL if int(year) >= datetime.datetime.now().year else PAST_YEAR_TTL
+            fs_all = self._cached(
+                f"finstate:{corp_code}:{year}:{reprt_code}", ttl,
+                lambda: compact_finstate(self.dart.finstate(corp_code, year, reprt_code=reprt_code)),
+            )
+            # 예전 형식(문자열 그대로)으로 캐시된 표도 같은 스키마로 맞춤
+            fs_all = compact_finstate(fs_all)
         except Exception as e:
             print(f"Error fetching data: {e}")
+            metrics.record_error("dart_call", method="get_financial_data")
             return None
 
         if fs_all is None or fs_all.empty:
@@ -59,48 +133,48 @@ class DartHandler:
                 # account_nm 컬럼에서 포함 여부 확인
                 row = df[df['account_nm'].str.contains(nm, na=False)]
                 if not row.empty:
-                    val = row.iloc[0]['thstrm_amount'] # 당기 금액
-                    if val == '-': return 0
-                    try:
-                        return float(val.replace(',', ''))
-                    except:
-                        return 0
+                    return parse_amount(row.iloc[0]['thstrm_amount']) # 당기 금액 (원, int)
             return 0
 
         revenue = get_value(fs, ['매출액', '수익(매출액)'])
         op_income = get_value(fs, ['영업이익', '영업손실'])
         net_income = get_value(fs, ['당기순이익', '당기순손실', '분기순이익', '반기순이익'])
         
-        # 상세 테이블용 전체 데이터도 반환하면 좋음
-        return {
-            'revenue': revenue,
-            'op_income': op_income,
-            'net_income': net_income,
-            'details': fs # 전체 데이터프레임
-        }
+        # 상세 테이블용 전체 데이터(details)도 함께 반환
+        return FinancialRecord(corp_code, year, reprt_code, revenue, op_income, net_income, details=fs)
+
+    @metrics.timed("dart_call", method="get_company_info")
+    def get_company_info(self, corp_code):
+        """
+        기업개황(업종코드 induty_code, 결산월 acc_mt, 법인구분 corp_cls 등)을 dict로 반환합니다. 실패하면 None.
+        corp_code 대신 기업명을 넘겨도 되지만, 캐시는 기업 코드 기준으로 저장합니다.
+        """
+        def load():
+            info = self.dart.company(corp_code)
+            if not info or info.get('status', '000') != '000':
+                return None
+            return {field: str(info.get(field) or '').strip() for field in COMPANY_FIELDS}
 
+        try:
+            return self._cached(f"company:{corp_code}", COMPANY_TTL, load)
+        except Exception as e:
+            print(f"Error fetching company info: {e}")
+            metrics.record_error("dart_call", method="get_company_info")
+            return None
+
+    @metrics.timed("dart_call", method="get_stock_code")
     def get_stock_code(self, corp_name):
         """
         상장 종목 코드를 반환 (FinanceDataReader용)
-        OpenDartReader의 list() 메서드나 corp_codes를 활용
-        """
-        # 간단하게 dart.corp_codes에서 검색
-        # (주의: OpenDartReader 객체 초기화 시 corp_codes를 로딩함)
-        # 하지만 이게 오래 걸릴 수 있으므로, find_corp_code로 찾은 뒤
-        # 해당 종목의 stock_code를 별도로 조회하는 게 나을 수 있음.
-        # 여기서는 편의상 document(공시정보) 조회 시 나오는 stock_code를 활용하거나
-        # dart.find_corp_code 결과는 DART 고유코드임.
-        
-        # OpenDartReader API에는 종목코드를 바로 주는 명시적 함수가 find_corp_code(고유코드 반환) 외에
-        # 기업개황(company_by_name) 등을 쓸 수 있음.
-        try:
-            info = self.dart.company(corp_name)
-            if info:
-                return info.get('stock_code')
-        except:
-            pass
+        기업개황을 조회하므로 업종·결산월 정보도 함께 캐시에 남습니다. (get_company_info)
+        """
+        corp_code = self.find_corp_code(corp_name)
+        info = self.get_company_info(corp_code or corp_name)
+        if info:
+            return info.get('stock_code') or None
         return None
 
+    @metrics.timed("dart_call", method="get_recent_disclosures")
     def get_recent_disclosures(self, corp_code, count=15):
         """
         특정 기업의 최근 공시 목록을 가져옵니다.
@@ -110,12 +184,64 @@ class DartHandler:
             start_date = (datetime.datetime.now() - datetime.timedelta(days=365)).strftime("%Y-%m-%d")
             
             # API 호출
-            disclosures = self.dart.list(corp_code, start=start_date)
+            disclosures = self._cached(
+                f"list:{corp_code}:{start_date}", DISCLOSURE_TTL,
+                lambda: compact_disclosures(self.dart.list(corp_code, start=start_date)),
+            )
             
             if disclosures is None or disclosures.empty:
                 return None
                 
-            return disclosures.head(count)
+            return compact_disclosures(disclosures.head(count))
         except Exception as e:
             # 앱에서 에러를 확인할 수 있도록 예외를 다시 발생시킵니다.
             raise e
+
+    @metrics.timed("dart_call", method="get_filing_index")
+    def get_filing_index(self, corp_code, start_year):
+        """
+        start_year 이후 제출된 정기보고서 인덱스 {(사업연도, 보고서 코드): 최초 접수일}를 반환합니다.
+        (filing_index.py) 조회에 실패하면 None을 반환하므로, 호출하는 쪽은 기존처럼 기간별로 조회하면 됩니다.
+        """
+        def load():
+            # final=False: 정정 전 원본도 받아 기간별 최초 접수일을 남김 (기본값은 최종 정정본만 — 접수일이 정정일이 됨)
+            reports = self.dart.list(corp_code, start=f"{start_year}-01-01", kind="A", final=False)
+            if reports is None or (reports.empty and dart_http.last_status() != dart_http.NO_DATA_STATUS):
+                return None  # 오류로 비어 있는 목록은 "제출 없음"으로 취급하지 않음
+            return build_filing_index(reports)
+
+        try:
+            return self._cached(f"filings:{corp_code}:{start_year}", FILING_INDEX_TTL, load)
+        except Exception as e:
+            print(f"Error fetching filing index: {e}")
+            metrics.record_error("dart_call", method="get_filing_index")
+            return None
+
+    @metrics.timed("dart_call", method="get_filed_corps")
+    def get_filed_corps(self, start_date, end_date=None):
+        """
+        기간(YYYY-MM-DD) 안에 정기보고서를 접수한 모든 기업의 고유번호 집합을 반환합니다.
+        (기업을 지정하지 않은 공시 목록 한 번 조회, 증분 갱신 대상 선정용) 실패하면 None.
+        """
+        end_date = end_date or datetime.date.today().isoformat()
+        try:
+            filings = self.dart.list(start=start_date, end=end_date, kind="A", final=False)
+        except Exception as e:
+            print(f"Error fetching periodic filings: {e}")
+            metrics.record_error("dart_call", method="get_filed_corps")
+            return None
+        if filings is None or filings.empty:
+            return set() if dart_http.last_status() == dart_http.NO_DATA_STATUS else None
+        return set(filings["corp_code"].astype(str))
+
+    @metrics.timed("dart_call", method="get_document")
+    def get_document(self, rcept_no):
+        """
+        공시 원문(XML 문자열)을 가져옵니다. 실패하면 None을 반환합니다.
+        """
+        try:
+            return self.dart.document(rcept_no)
+        except Exception as e:
+            print(f"Error fetching document {rcept_no}: {e}")
+            metrics.record_error("dart_call", method="get_document")
+            return None
@@ -0,0 +1,126 @@
+"""
+dart_http.py
+OpenDartReader의 HTTP 호출 경로 설정
+
+OpenDartReader는 각 모듈에서 `requests.get(url, ...)`을 직접 호출해 요청마다 새 연결(TLS 핸드셰이크)을 맺습니다.
+이 모듈은 그 `requests` 참조를 얇은 래퍼로 바꿔
+- 프로세스 전역 커넥션 풀 세션(keep-alive, gzip 압축)으로 모든 DART 요청을 보내고
+- DART 주소를 다른 서버(로컬 스탠드인 서버 등)로 돌릴 수 있게 합니다.
+
+환경변수
+    DART_BASE_URL   설정 시 https://opendart.fss.or.kr 대신 이 주소로 요청합니다.
+                    (예: http://127.0.0.1:8765 — benchmarks/fake_dart_server.py)
+    DART_POOL_SIZE  호스트당 유지할 최대 연결 수 (기본 16, 동시에 DART를 호출하는 스레드 수 이상으로)
+"""
+import os
+import sys
+import json
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DART_ORIGIN = "https://opendart.fss.or.kr"
+
+POOL_SIZE = int(os.getenv("DART_POOL_SIZE", "16"))
+# OpenDartReader는 timeout 없이 호출하므로 기본값을 둠 (연결, 읽기 — 초)
+DEFAULT_TIMEOUT = (5, 60)
+
+# 스레드별 마지막 DART 응답의 status (OpenDartReader는 빈 결과와 오류를 구분하지 않고 빈 DataFrame을 반환)
+_local = threading.local()
+NO_DATA_STATUS = "013"
+OK_STATUS = "000"
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """
+    DART 요청용 공유 세션을 반환합니다.
+    urllib3 커넥션 풀은 스레드 안전하므로 여러 스레드가 같은 세션을 써도 됩니다.
+    fork된 자식 프로세스에서는 부모의 소켓을 공유하지 않도록 새로 만듭니다.
+    """
+    global _session, _session_pid
+    if _session is not None and _session_pid == os.getpid():
+        return _session
+    with _session_lock:
+        if _session is None or _session_pid != os.getpid():
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update({"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"})
+            _session, _session_pid = session, os.getpid()
+    return _session
+
+
+class DartRequests:
+    """OpenDartReader 모듈 안의 `requests` 자리에 들어가는 래퍼"""
+
+    def __init__(self, base_url: str = None, pooled: bool = True):
+        self.base_url = base_url.rstrip("/") if base_url else None
+        # pooled=False면 기존처럼 요청마다 새 연결 (비교 측정용)
+        self.pooled = pooled
+
+    def rewrite(self, url: str) -> str:
+        if self.base_url and url.startswith(DART_ORIGIN):
+            return self.base_url + url[len(DART_ORIGIN):]
+        return url
+
+    def get(self, url, *args, **kwargs):
+        kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+        http = get_session() if self.pooled else requests
+        _local.status = None
+        try:
+            response = http.get(self.rewrite(url), *args, **kwargs)
+        except Exception:
+            _local.failures = failed_requests() + 1
+            raise
+        _local.status = _status_of(response)
+        if response.status_code >= 400 or _local.status not in (None, OK_STATUS, NO_DATA_STATUS):
+            _local.failures = failed_requests() + 1
+        return response
+
+    def __getattr__(self, name):
+        # exceptions, codes 등 나머지 속성은 원래 requests 모듈로 위임
+        return getattr(requests, name)
+
+
+def _status_of(response):
+    """짧은 JSON 응답(오류·데이터 없음)에서만 DART status를 꺼냅니다. 정상 데이터 응답은 파싱하지 않습니다."""
+    content = response.content
+    if len(content) > 1024 or b'"status"' not in content:
+        return None
+    try:
+        return json.loads(content).get("status")
+    except ValueError:
+        return None
+
+
+def last_status():
+    """이 스레드에서 마지막으로 받은 DART 응답의 status ("013" = 조회된 데이터 없음). 알 수 없으면 None."""
+    return getattr(_local, "status", None)
+
+
+def failed_requests():
+    """
+    이 스레드에서 지금까지 실패한 DART 요청 수 (연결 오류·시간 초과·HTTP 오류·한도 초과 등 오류 status, 013은 제외).
+    작업 전후의 차이로 빈 결과가 "데이터 없음"인지 일시 오류인지 구분합니다.
+    """
+    return getattr(_local, "failures", 0)
+
+
+def install(base_url: str = None, pooled: bool = True) -> DartRequests:
+    """
+    로드된 OpenDartReader 하위 모듈의 `requests`를 DartRequests로 교체합니다.
+    여러 번 호출해도 안전하며, 마지막 설정이 적용됩니다.
+    """
+    import OpenDartReader  # noqa: F401  (하위 모듈을 sys.modules에 올려두기 위함)
+
+    shim = DartRequests(base_url or os.getenv("DART_BASE_URL"), pooled=pooled)
+    for name, module in list(sys.modules.items()):
+        if name.startswith("OpenDartReader") and hasattr(module, "requests"):
+            module.requests = shim
+    return shim
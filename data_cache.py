@@ -0,0 +1,83 @@
+"""
+data_cache.py
+DART 조회 결과 등을 저장하는 로컬 캐시 (SQLite, 프로세스 간 공유)
+
+값은 pickle로 직렬화해 저장하며, 키마다 만료 시간(TTL)을 둘 수 있습니다.
+봇과 대시보드가 같은 파일을 바라보면 한쪽에서 받아온 데이터를 다른 쪽도 재사용합니다.
+"""
+import os
+import time
+import pickle
+import sqlite3
+from contextlib import closing
+
+import metrics
+
+DEFAULT_CACHE_PATH = os.getenv("DATA_CACHE_PATH", "data_cache.db")
+
+_MISSING = object()
+
+
+class DataCache:
+    def __init__(self, db_path: str = DEFAULT_CACHE_PATH):
+        self.db_path = db_path
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS cache (
+                    key        TEXT PRIMARY KEY,
+                    value      BLOB,
+                    expires_at REAL
+                )
+                """
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def get(self, key: str, default=None):
+        """만료되지 않은 값을 반환합니다. 없으면 default를 반환합니다."""
+        with metrics.timer("cache_lookup"):
+            with closing(self._connect()) as conn:
+                row = conn.execute(
+                    "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+                ).fetchone()
+            if row is None or (row[1] is not None and row[1] < time.time()):
+                metrics.record_cache(hit=False)
+                return default
+            metrics.record_cache(hit=True)
+            return pickle.loads(row[0])
+
+    def set(self, key: str, value, ttl: float = None):
+        """값을 저장합니다. ttl(초)이 None이면 만료되지 않습니다."""
+        expires_at = time.time() + ttl if ttl is not None else None
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, blob, expires_at),
+            )
+
+    def get_or_set(self, key: str, loader, ttl: float = None):
+        """캐시에 없으면 loader()를 호출해 저장한 뒤 반환합니다."""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = loader()
+            self.set(key, value, ttl)
+        return value
+
+    def delete(self, key: str):
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def purge_expired(self) -> int:
+        """만료된 항목을 삭제하고 삭제 건수를 반환합니다."""
+        with closing(self._connect()) as conn, conn:
+            cur = conn.execute(
+                "DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at < ?",
+                (time.time(),),
+            )
+        return cur.rowcount
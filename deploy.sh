@@ -7,14 +7,27 @@ BOT_DIR="$HOME/stock-bot"
 echo "=== Stock Bot 배포 업데이트 ==="
 cd "$BOT_DIR"
 
-echo "[1/3] 최신 코드 가져오기..."
+echo "[1/4] 최신 코드 가져오기..."
 git pull origin main
 
-echo "[2/3] 패키지 업데이트..."
+echo "[2/4] 패키지 업데이트..."
 "$BOT_DIR/venv/bin/pip" install -r requirements.txt --quiet
 
-echo "[3/3] 봇 서비스 재시작..."
+# 서비스에 ExecStartPre 예열이 있으면 재시작 때 한 번만 (예산을 두 번 쓰지 않도록)
+if systemctl cat stockbot 2>/dev/null | grep -q "^ExecStartPre=.*warmup.py"; then
+    echo "[3/4] 캐시 예열은 서비스 시작 시(ExecStartPre) 실행됩니다."
+else
+    echo "[3/4] 캐시 예열 (최근 요청 상위 기업, WARMUP_BUDGET_SECONDS 안에서)..."
+    "$BOT_DIR/venv/bin/python" warmup.py || echo "캐시 예열 실패 (배포는 계속 진행)"
+fi
+
+echo "[4/4] 봇 서비스 재시작..."
 sudo systemctl restart stockbot
 sudo systemctl status stockbot --no-pager
 
+# REST API 서비스가 설치되어 있으면 함께 재시작
+if systemctl list-unit-files stockapi.service --no-legend | grep -q stockapi; then
+    sudo systemctl restart stockapi
+fi
+
 echo "=== 배포 완료! ==="
@@ -0,0 +1,205 @@
+"""
+disclosure_index.py
+DART 공시 원문 전문(Full-text) 검색 인덱스 (SQLite FTS5)
+
+- dart.document()로 받은 공시 원문을 태그 제거 후 FTS5 테이블에 저장합니다.
+- 한국어는 형태소 분석 없이도 부분 문자열 검색이 되도록 trigram 토크나이저를 사용합니다.
+- 이미 인덱싱된 rcept_no는 다시 받지 않으므로, 새 공시가 올라올 때마다 증분 갱신됩니다.
+
+사용 예)
+    python disclosure_index.py 삼성전자 SK하이닉스     # 최근 공시 원문 인덱싱
+    python disclosure_index.py --search 유상증자        # 검색
+"""
+import os
+import re
+import html
+import sqlite3
+import datetime
+from contextlib import closing
+
+DEFAULT_DB_PATH = os.getenv("DISCLOSURE_INDEX_PATH", "disclosure_index.db")
+
+# trigram 토크나이저는 3글자 미만 검색어를 MATCH로 찾을 수 없어 LIKE로 대체합니다.
+MIN_MATCH_CHARS = 3
+
+_TAG_RE   = re.compile(r"<[^>]+>")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def extract_text(document) -> str:
+    """공시 원문(XML/HTML 문자열)에서 태그를 제거한 본문 텍스트만 반환합니다."""
+    if not document:
+        return ""
+    if isinstance(document, bytes):
+        document = document.decode("utf-8", errors="replace")
+    text = _TAG_RE.sub(" ", document)
+    text = html.unescape(text)
+    return _SPACE_RE.sub(" ", text).strip()
+
+
+class DisclosureIndex:
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        self.db_path = db_path
+        with closing(self._connect()) as conn, conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS disclosures (
+                    rcept_no   TEXT PRIMARY KEY,
+                    corp_code  TEXT,
+                    corp_name  TEXT,
+                    report_nm  TEXT,
+                    rcept_dt   TEXT,
+                    indexed_at TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_disclosures_corp ON disclosures(corp_code);
+                CREATE VIRTUAL TABLE IF NOT EXISTS disclosure_fts USING fts5(
+                    rcept_no UNINDEXED,
+                    report_nm,
+                    body,
+                    tokenize = 'trigram'
+                );
+                """
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # 스레드마다 별도 연결을 쓰도록 호출 시점에 연결합니다 (WAL: 읽기/쓰기 동시 진행).
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    # ──────────────────────────────────────────────
+    # 인덱싱
+    # ──────────────────────────────────────────────
+    def indexed_rcept_nos(self, rcept_nos) -> set:
+        """주어진 접수번호 중 이미 인덱싱된 것만 반환합니다."""
+        rcept_nos = [str(r) for r in rcept_nos]
+        if not rcept_nos:
+            return set()
+        placeholders = ",".join("?" * len(rcept_nos))
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                f"SELECT rcept_no FROM disclosures WHERE rcept_no IN ({placeholders})",
+                rcept_nos,
+            ).fetchall()
+        return {row["rcept_no"] for row in rows}
+
+    def add(self, rcept_no, corp_code, corp_name, report_nm, rcept_dt, body: str):
+        """공시 한 건을 인덱스에 추가합니다. 이미 있으면 교체합니다."""
+        rcept_no = str(rcept_no)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM disclosure_fts WHERE rcept_no = ?", (rcept_no,))
+            conn.execute(
+                "INSERT OR REPLACE INTO disclosures VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    rcept_no, corp_code, corp_name, report_nm, str(rcept_dt),
+                    datetime.datetime.now().isoformat(timespec="seconds"),
+                ),
+            )
+            conn.execute(
+                "INSERT INTO disclosure_fts (rcept_no, report_nm, body) VALUES (?, ?, ?)",
+                (rcept_no, report_nm, body),
+            )
+
+    def update_from_disclosures(self, handler, disclosures, max_docs: int = None) -> int:
+        """
+        공시 목록(DataFrame) 중 아직 인덱싱되지 않은 rcept_no만 원문을 받아 추가합니다.
+        새로 인덱싱한 건수를 반환합니다.
+        """
+        if disclosures is None or disclosures.empty or "rcept_no" not in disclosures.columns:
+            return 0
+
+        known = self.indexed_rcept_nos(disclosures["rcept_no"].tolist())
+        new_rows = disclosures[~disclosures["rcept_no"].astype(str).isin(known)]
+        if max_docs is not None:
+            new_rows = new_rows.head(max_docs)
+
+        from schema import format_rcept_dt
+
+        added = 0
+        for row in new_rows.itertuples(index=False):
+            document = handler.get_document(row.rcept_no)
+            if document is None:
+                continue
+            self.add(
+                row.rcept_no,
+                getattr(row, "corp_code", ""),
+                getattr(row, "corp_name", ""),
+                getattr(row, "report_nm", ""),
+                format_rcept_dt(getattr(row, "rcept_dt", ""), sep=""),  # 저장은 YYYYMMDD
+                extract_text(document),
+            )
+            added += 1
+        return added
+
+    def update_company(self, handler, corp_code, count: int = 15, max_docs: int = None) -> int:
+        """기업의 최근 공시 목록을 조회해 새 공시만 증분 인덱싱합니다."""
+        try:
+            disclosures = handler.get_recent_disclosures(corp_code, count=count)
+        except Exception as e:
+            print(f"Error fetching disclosures: {e}")
+            return 0
+        return self.update_from_disclosures(handler, disclosures, max_docs=max_docs)
+
+    # ──────────────────────────────────────────────
+    # 검색
+    # ──────────────────────────────────────────────
+    def search(self, query: str, corp_codes=None, limit: int = 20) -> list:
+        """
+        공시 원문에서 검색어를 찾아 최신순으로 반환합니다.
+        공백으로 구분된 검색어는 모두 포함(AND)하는 문서만 찾습니다.
+        """
+        terms = [t for t in query.split() if t]
+        if not terms:
+            return []
+
+        where, params = [], []
+        if all(len(t) >= MIN_MATCH_CHARS for t in terms):
+            where.append("disclosure_fts MATCH ?")
+            params.append(" AND ".join('"' + t.replace('"', '""') + '"' for t in terms))
+            snippet = "snippet(disclosure_fts, 2, '[', ']', '…', 16)"
+        else:
+            for t in terms:
+                where.append("(disclosure_fts.body LIKE ? OR disclosure_fts.report_nm LIKE ?)")
+                params.extend([f"%{t}%", f"%{t}%"])
+            snippet = "substr(disclosure_fts.body, 1, 80)"
+
+        if corp_codes:
+            corp_codes = list(corp_codes)
+            where.append(f"d.corp_code IN ({','.join('?' * len(corp_codes))})")
+            params.extend(corp_codes)
+
+        sql = (
+            f"SELECT d.rcept_no, d.corp_code, d.corp_name, d.report_nm, d.rcept_dt, {snippet} AS snippet "
+            "FROM disclosure_fts JOIN disclosures AS d ON d.rcept_no = disclosure_fts.rcept_no "
+            f"WHERE {' AND '.join(where)} "
+            "ORDER BY d.rcept_dt DESC LIMIT ?"
+        )
+        params.append(limit)
+
+        with closing(self._connect()) as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [dict(row) for row in rows]
+
+
+if __name__ == "__main__":
+    import sys
+    from dart_handler import DartHandler
+
+    index = DisclosureIndex()
+    args = sys.argv[1:]
+
+    if args[:1] == ["--search"]:
+        for hit in index.search(" ".join(args[1:])):
+            print(f"{hit['rcept_dt']} | {hit['corp_name']} | {hit['report_nm']} | {hit['snippet']}")
+        sys.exit(0)
+
+    handler = DartHandler()
+    for corp_name in args:
+        corp_code = handler.find_corp_code(corp_name)
+        if not corp_code:
+            print(f"'{corp_name}'을(를) 찾을 수 없습니다.")
+            continue
+        added = index.update_company(handler, corp_code)
+        print(f"{corp_name}: 신규 공시 {added}건 인덱싱 완료")
@@ -0,0 +1,80 @@
+"""
+filing_index.py
+정기보고서 제출 현황 인덱스
+
+DART 공시 목록(정기공시, pblntf_ty=A)의 보고서명 — 예) "사업보고서 (2023.12)", "[기재정정]분기보고서 (2024.09)" —
+에서 (사업연도, 보고서 코드) → 최초 접수일 인덱스를 만듭니다.
+재무제표 조회 전에 이 인덱스를 보면, 아직 제출되지 않은 분기나 없는 연도를 DART에 묻지 않아도 됩니다.
+"""
+import re
+from collections import Counter
+
+ANNUAL, HALF, Q1, Q3 = "11011", "11012", "11013", "11014"
+
+REPORT_PATTERN = re.compile(r"(사업|반기|분기)보고서\s*\((\d{4})\.(\d{2})\)")
+
+
+def parse_report_name(report_nm: str, fiscal_end_month: int = 12):
+    """
+    보고서명을 (사업연도, 보고서 코드)로 변환합니다. 정기보고서가 아니면 None.
+    사업연도는 결산월이 속한 연도 기준입니다. (12월 결산이면 보고서 기간의 연도와 같음)
+    """
+    m = REPORT_PATTERN.search(report_nm or "")
+    if not m:
+        return None
+    kind, year, month = m.group(1), int(m.group(2)), int(m.group(3))
+
+    if kind == "사업":
+        return year, ANNUAL
+    fiscal_year = year + 1 if month > fiscal_end_month else year
+    if kind == "반기":
+        return fiscal_year, HALF
+    offset = (month - fiscal_end_month) % 12
+    if offset == 3:
+        return fiscal_year, Q1
+    if offset == 9:
+        return fiscal_year, Q3
+    return None
+
+
+def build_filing_index(disclosures) -> dict:
+    """
+    공시 목록 DataFrame(report_nm, rcept_dt 컬럼)에서 {(사업연도, 보고서 코드): 최초 접수일} 인덱스를 만듭니다.
+    결산월은 사업보고서의 기간 표기에서 추정합니다. (없으면 12월)
+    """
+    if disclosures is None or disclosures.empty:
+        return {}
+
+    names = disclosures["report_nm"].astype(str)
+    annual_months = Counter(
+        int(m.group(3)) for m in map(REPORT_PATTERN.search, names) if m and m.group(1) == "사업"
+    )
+    fiscal_end_month = annual_months.most_common(1)[0][0] if annual_months else 12
+
+    index = {}
+    rcept_dts = disclosures["rcept_dt"]
+    # 압축 스키마(schema.compact_disclosures)의 datetime 컬럼도 "YYYYMMDD" 문자열로 맞춤
+    rcept_dts = rcept_dts.dt.strftime("%Y%m%d") if hasattr(rcept_dts, "dt") else rcept_dts.astype(str)
+    for report_nm, rcept_dt in zip(names, rcept_dts):
+        period = parse_report_name(report_nm, fiscal_end_month)
+        if period is None:
+            continue
+        # 정정 공시보다 최초 제출일을 기준으로 (그 시점부터 데이터 조회 가능)
+        if period not in index or rcept_dt < index[period]:
+            index[period] = rcept_dt
+    return index
+
+
+def filed_periods(index: dict, start_year: int, end_year: int) -> list:
+    """기간 내 제출된 (사업연도, 보고서 코드)를 분기 순서대로 반환합니다."""
+    order = {Q1: 1, HALF: 2, Q3: 3, ANNUAL: 4}
+    periods = [p for p in index if start_year <= p[0] <= end_year and p[1] in order]
+    return sorted(periods, key=lambda p: (p[0], order[p[1]]))
+
+
+def latest_period(index: dict, reprt_code: str = None):
+    """가장 최근 (사업연도, 보고서 코드). reprt_code를 주면 해당 종류 중 최신. 없으면 None."""
+    periods = filed_periods(index, 0, 9999)
+    if reprt_code:
+        periods = [p for p in periods if p[1] == reprt_code]
+    return periods[-1] if periods else None
@@ -0,0 +1,142 @@
+"""
+financials.py
+DART 누적 재무 데이터를 분기별 실적 테이블로 가공하는 공용 함수 모음
+
+app.py, 봇, 배치 스크립트가 같은 로직을 공유하도록 분리했습니다.
+"""
+import datetime
+
+import pandas as pd
+
+from filing_index import filed_periods, ANNUAL
+from schema import compact_panel
+
+# 보고서 코드 → 분기 (1Q, 반기(2Q 누적), 3Q 누적, 사업보고서(4Q 누적))
+QUARTER_CODES = {'11013': 1, '11012': 2, '11014': 3, '11011': 4}
+
+ACC_COLUMNS = {
+    'Revenue':   'Revenue_Acc',
+    'OpIncome':  'OpIncome_Acc',
+    'NetIncome': 'NetIncome_Acc',
+}
+
+
+def load_cumulative_financials(handler, corp_code, start_year, end_year, on_progress=None):
+    """
+    기간 내 모든 분기 보고서의 누적 실적(매출/영업이익/순이익)을 수집합니다.
+    핸들러가 정기보고서 제출 현황(get_filing_index)을 주면 제출된 보고서만 조회합니다.
+    on_progress(step, total_steps)를 넘기면 진행률을 전달받을 수 있습니다.
+    """
+    periods = None
+    get_filing_index = getattr(handler, 'get_filing_index', None)
+    if get_filing_index is not None:
+        index = get_filing_index(corp_code, start_year)
+        if index is not None:
+            periods = filed_periods(index, start_year, end_year)
+    if periods is None:
+        periods = [(year, reprt_code) for year in range(start_year, end_year + 1) for reprt_code in QUARTER_CODES]
+
+    data_list = []
+    total_steps = len(periods)
+
+    for step, (year, reprt_code) in enumerate(periods, start=1):
+        if on_progress:
+            on_progress(step, total_steps)
+
+        quarter_num = QUARTER_CODES[reprt_code]
+        data = handler.get_financial_data(corp_code, year, reprt_code)
+        if data:
+            data_list.append({
+                'Year': year,
+                'Quarter': quarter_num,
+                'Revenue_Acc': data.revenue,
+                'OpIncome_Acc': data.op_income,
+                'NetIncome_Acc': data.net_income,
+                'Period': f"{year}.{quarter_num}Q"
+            })
+
+    return compact_panel(pd.DataFrame(data_list))
+
+
+def load_latest_annual(handler, corp_code, lookback: int = 3, current_year: int = None):
+    """
+    최근 lookback년 중 연간 실적(사업보고서)이 있는 가장 최신 연도를 찾아 (연도, FinancialRecord)를 반환합니다.
+    제출 현황(get_filing_index)을 알면 사업보고서가 나온 연도만 조회합니다. 없으면 (None, None).
+    """
+    current_year = current_year or datetime.datetime.now().year
+    candidate_years = range(current_year - 1, current_year - 1 - lookback, -1)
+
+    get_filing_index = getattr(handler, 'get_filing_index', None)
+    if get_filing_index is not None:
+        index = get_filing_index(corp_code, current_year - lookback)
+        if index is not None:
+            candidate_years = sorted(
+                (year for year, code in filed_periods(index, current_year - lookback, current_year) if code == ANNUAL),
+                reverse=True,
+            )
+
+    for year in candidate_years:
+        data = handler.get_financial_data(corp_code, year, ANNUAL)
+        if data and (data.revenue or data.op_income or data.net_income):
+            return year, data
+    return None, None
+
+
+def to_quarterly(df):
+    """
+    누적 실적을 분기별 별도 실적으로 변환합니다.
+    1Q는 그대로, 2Q~4Q는 직전 분기 누적값을 차감합니다.
+    직전 분기 데이터가 없으면 누적값을 그대로 사용합니다.
+    """
+    if df.empty:
+        return df
+
+    df = df.sort_values(by=['Year', 'Quarter']).reset_index(drop=True)
+    by_year = df.groupby('Year')
+    prev_quarter = by_year['Quarter'].shift(1)
+    has_prev = prev_quarter == df['Quarter'] - 1
+
+    for col, acc in ACC_COLUMNS.items():
+        prev_acc = by_year[acc].shift(1)
+        # shift로 생긴 결측은 where에서 0으로 채워지므로 다시 정수(원)로 맞춤
+        df[col] = (df[acc] - prev_acc.where(has_prev, 0)).astype('int64')
+
+    return df
+
+
+def load_quarterly_financials(handler, corp_code, start_year, end_year, on_progress=None):
+    """누적 실적 수집과 분기 변환을 한 번에 수행합니다."""
+    return to_quarterly(load_cumulative_financials(handler, corp_code, start_year, end_year, on_progress))
+
+
+def annual_from_quarterly(df):
+    """분기 테이블에서 4Q 누적값(= 연간 실적)만 뽑아 연도별 테이블로 반환합니다."""
+    if df.empty:
+        return df
+    annual = df[df['Quarter'] == 4][['Year'] + list(ACC_COLUMNS.values())]
+    return annual.rename(columns={acc: col for col, acc in ACC_COLUMNS.items()}).reset_index(drop=True)
+
+
+YOY_COLUMNS = {'Rev_YoY': 'Revenue', 'Op_YoY': 'OpIncome', 'Net_YoY': 'NetIncome'}
+
+
+def add_yoy(df):
+    """
+    전년 동기 대비 증감율(YoY, %) 컬럼을 추가합니다.
+    행 위치(4행 전)가 아니라 (전년도, 같은 분기) 키로 맞춰 비교하므로, 중간에 빠진 분기가 있어도 어긋나지 않습니다.
+    전년 동기 행이 없거나 전년 값이 0이면 NaN입니다.
+    """
+    df = df.copy()
+    if df.empty:
+        for yoy in YOY_COLUMNS:
+            df[yoy] = pd.Series(dtype='float64')
+        return df
+
+    cols = list(YOY_COLUMNS.values())
+    last_year = df[['Year', 'Quarter'] + cols].drop_duplicates(['Year', 'Quarter'], keep='last')
+    last_year = last_year.assign(Year=last_year['Year'] + 1)
+    prev = df[['Year', 'Quarter']].merge(last_year, on=['Year', 'Quarter'], how='left')
+    for yoy, col in YOY_COLUMNS.items():
+        base = prev[col].astype('float64')
+        df[yoy] = ((df[col].astype('float64').to_numpy() / base.where(base != 0).to_numpy()) - 1) * 100
+    return df
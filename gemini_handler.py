@@ -1,83 +1,235 @@
 """
 gemini_handler.py
 Gemini API 래퍼 모듈 (google-genai 최신 SDK 사용)
+
+동기(chat, analyze_stock)·비동기(achat, aanalyze_stock) 경로 모두 모델별 제한 시간을 두고,
+기본 모델 할당량이 소진(RESOURCE_EXHAUSTED)되거나 제한 시간을 넘기면 대체 모델로 자동 전환합니다.
+응답은 str을 상속한 GeminiReply로 돌려주며 .model에 실제로 응답한 모델이 담깁니다.
+(메트릭: gemini_responses_total{model, method})
+
+환경변수
+    GEMINI_MODEL            기본 모델 (기본 gemini-2.0-flash)
+    GEMINI_FALLBACK_MODELS  할당량 초과·지연 시 차례로 쓸 대체 모델, 쉼표 구분 (기본 gemini-2.0-flash-lite)
+    GEMINI_TIMEOUT          모델별 호출 제한 시간(초, 기본 30)
+    GEMINI_HEDGE_AFTER      비동기 호출이 이 시간(초) 안에 끝나지 않으면 같은 요청을 한 번 더 보내
+                            먼저 도착한 응답을 씀 (기본 0 = 사용 안 함)
 """
 import os
-from google import genai
-from google.genai import types
+import time
+import asyncio
+import hashlib
 from dotenv import load_dotenv
 
+import metrics
+from state_store import MemoryStateStore, MAX_HISTORY
+
 load_dotenv()
 
+GEMINI_MODEL           = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
+GEMINI_FALLBACK_MODELS = [m.strip() for m in os.getenv("GEMINI_FALLBACK_MODELS", "gemini-2.0-flash-lite").split(",")
+                          if m.strip()]
+GEMINI_TIMEOUT         = float(os.getenv("GEMINI_TIMEOUT", "30"))
+GEMINI_HEDGE_AFTER     = float(os.getenv("GEMINI_HEDGE_AFTER", "0"))
+
+# 할당량을 초과한 모델은 이 시간(초) 동안 건너뛰고 바로 대체 모델을 호출
+QUOTA_COOLDOWN = 60
+
+CHAT_INSTRUCTION = (
+    "당신은 주식 투자 및 금융 분야 전문 AI 어시스턴트입니다. "
+    "답변은 항상 한국어로, 명확하고 간결하게 해주세요."
+)
+
+# 분석 리포트 작성 규칙 — 매 요청 동일한 접두부로 두어 프롬프트 캐시가 적중하도록 시스템 지시로 분리
+ANALYSIS_INSTRUCTION = """
+당신은 한국 주식 재무 분석가입니다. 사용자가 주는 피처 시트(분기/연간 실적, 이익률, 최근 공시)만 근거로
+아래 형식의 핵심 투자 분석 리포트를 작성해주세요.
+
+📊 재무 상태 한 줄 요약: (한 문장)
+
+📈 추세: (최근 분기 매출·이익률 흐름, 1~2문장)
+
+💪 강점:
+- (2~3가지 불릿 포인트)
+
+⚠️ 리스크 요인:
+- (1~2가지 불릿 포인트, 공시 내용이 있으면 반영)
+
+💡 투자자 코멘트: (한 문장 결론)
+
+규칙: 반드시 한국어로, 이모지 사용, 각 섹션 구분 명확히, 전체 250단어 이내. 시트에 없는 수치는 지어내지 마세요.
+"""
+
+# 동일한 피처 시트에 대한 분석 결과 재사용 기간 (초)
+ANALYSIS_CACHE_TTL = 24 * 3600
+# 대체 모델이 쓴 분석은 기본 모델 할당량이 돌아오면 다시 만들도록 짧게만 재사용 (초)
+FALLBACK_CACHE_TTL = 3600
+
+
+# 할당량 초과·오류 시 analyze_stock/chat이 돌려주는 안내 메시지의 시작 문자
+ERROR_REPLY_PREFIXES = ("⏳", "⚠️")
+
+
+def is_error_reply(text: str) -> bool:
+    """Gemini 응답 대신 돌려준 오류 안내 메시지인지 (저장·캐시하면 안 되는 응답)"""
+    return not text or text.startswith(ERROR_REPLY_PREFIXES)
+
+
+
+class GeminiReply(str):
+    """Gemini 응답 문자열. model에 실제로 응답한 모델 이름을 담습니다."""
+
+    def __new__(cls, text: str, model: str):
+        reply = super().__new__(cls, text or "")
+        reply.model = model
+        return reply
+
+
+def _is_timeout(error) -> bool:
+    """asyncio 제한 시간 초과 또는 SDK(httpx) 타임아웃 예외인지"""
+    return isinstance(error, TimeoutError) or "Timeout" in type(error).__name__
+
 
 class GeminiHandler:
-    def __init__(self, api_key: str = None):
-        key = api_key or os.getenv("GEMINI_API_KEY")
-        if not key:
-            raise ValueError("GEMINI_API_KEY가 없습니다. .env 파일을 확인해주세요.")
-        self.client = genai.Client(api_key=key)
-        self.model_id = "gemini-2.0-flash"
-        # 사용자별 대화 히스토리 (user_id → list of contents)
-        self._histories: dict[int, list] = {}
+    def __init__(self, api_key: str = None, cache=None, client=None, store=None,
+                 model: str = None, fallback_models: list = None, timeout: float = None, hedge_after: float = None):
+        if client is None:
+            key = api_key or os.getenv("GEMINI_API_KEY")
+            if not key:
+                raise ValueError("GEMINI_API_KEY가 없습니다. .env 파일을 확인해주세요.")
+            from google import genai  # SDK 로딩이 무거워 실제 클라이언트가 필요할 때만 import
+            client = genai.Client(api_key=key)
+        # client를 직접 넘기면 (벤치마크용 스텁 등) API 키 없이 사용
+        self.client = client
+        self.model_id = model or GEMINI_MODEL
+        # 기본 모델 → 대체 모델 순서의 호출 후보
+        fallbacks = GEMINI_FALLBACK_MODELS if fallback_models is None else fallback_models
+        self.models = [self.model_id] + [m for m in fallbacks if m != self.model_id]
+        self.timeout = GEMINI_TIMEOUT if timeout is None else timeout
+        self.hedge_after = GEMINI_HEDGE_AFTER if hedge_after is None else hedge_after
+        # 모델별 할당량 초과 후 다시 시도할 시각 (time.monotonic 기준)
+        self._exhausted_until = {}
+        # 사용자별 대화 히스토리 저장소 (StateStore, 없으면 이 프로세스 메모리에만 보관)
+        self.store = store if store is not None else MemoryStateStore()
+        # DataCache 인스턴스 (분석 리포트 재사용, None이면 사용 안 함)
+        self.cache = cache
 
     def reset_session(self, user_id: int):
         """대화 히스토리를 초기화합니다."""
-        self._histories.pop(user_id, None)
+        self.store.clear_history(user_id)
 
+    # ──────────────────────────────────────────────
+    # 공개 API (동기)
+    # ──────────────────────────────────────────────
+    @metrics.timed("gemini_call", method="chat")
     def chat(self, user_id: int, message: str) -> str:
         """
         일반 대화: 사용자 메시지에 Gemini가 한국어로 답변합니다.
         대화 히스토리를 유지합니다.
         """
         try:
-            history = self._histories.get(user_id, [])
-
-            # 시스템 지시 + 사용자 메시지
-            system_instruction = (
-                "당신은 주식 투자 및 금융 분야 전문 AI 어시스턴트입니다. "
-                "답변은 항상 한국어로, 명확하고 간결하게 해주세요."
-            )
-
-            # 새 사용자 메시지를 히스토리에 추가
-            history.append(types.Content(
-                role="user",
-                parts=[types.Part(text=message)]
-            ))
-
-            response = self.client.models.generate_content(
-                model=self.model_id,
-                contents=history,
-                config=types.GenerateContentConfig(
-                    system_instruction=system_instruction,
-                    max_output_tokens=1024,
-                )
-            )
-            answer = response.text
-
-            # 모델 응답도 히스토리에 추가
-            history.append(types.Content(
-                role="model",
-                parts=[types.Part(text=answer)]
-            ))
-            # 히스토리 저장 (최대 20턴 유지)
-            self._histories[user_id] = history[-20:]
-
+            contents, config = self._chat_request(user_id, message)
+            answer = self._generate(contents, config, "chat")
+            self._remember(user_id, message, answer)
             return answer
         except Exception as e:
-            err = str(e)
-            if '429' in err or 'RESOURCE_EXHAUSTED' in err or 'quota' in err.lower():
-                return (
-                    "⏳ Gemini AI 무료 한도를 초과했습니다.\n\n"
-                    "• 잠시 후 다시 시도해주세요 (보통 1분 후 리셋)\n"
-                    "• 일일 한도 초과 시 내일 다시 이용 가능합니다.\n"
-                    "• 지속적 사용을 원하시면 Gemini API 유료 플랜을 고려해보세요."
-                )
-            return f"⚠️ Gemini 응답 중 오류가 발생했습니다: {e}"
-
-    def analyze_stock(self, corp_name: str, financials: dict) -> str:
+            return self._error_reply(e, "chat")
+
+    @metrics.timed("gemini_call", method="analyze_stock")
+    def analyze_stock(self, corp_name: str, financials: dict, context: str = None) -> str:
         """
         DART 재무 데이터를 받아 Gemini가 한국어 분석 리포트를 생성합니다.
+        context(context_builder의 피처 시트)를 넘기면 다년도 추이를 근거로 분석합니다.
         """
+        if context:
+            return self._analyze_with_context(context)
+        try:
+            return self._generate(self._stock_prompt(corp_name, financials), self._config(max_output_tokens=512),
+                                  "analyze_stock")
+        except Exception as e:
+            return self._error_reply(e, "analyze_stock")
+
+    def _analyze_with_context(self, context: str) -> str:
+        """피처 시트 기반 분석. 같은 시트는 캐시된 리포트를 반환합니다."""
+        cache_key = self._analysis_cache_key(context)
+        cached = self._cached_analysis(cache_key)
+        if cached:
+            return cached
+        try:
+            answer = self._generate(context, self._analysis_config(), "analyze_stock")
+        except Exception as e:
+            return self._error_reply(e, "analyze_stock")
+        self._store_analysis(cache_key, answer)
+        return answer
+
+    # ──────────────────────────────────────────────
+    # 공개 API (비동기) — 봇 이벤트 루프에서 스레드 없이 호출
+    # ──────────────────────────────────────────────
+    @metrics.timed("gemini_call", method="chat")
+    async def achat(self, user_id: int, message: str) -> str:
+        """chat의 비동기 버전 (히스토리 저장소 접근만 스레드에서 실행)"""
+        try:
+            contents, config = await asyncio.to_thread(self._chat_request, user_id, message)
+            answer = await self._agenerate(contents, config, "chat")
+            await asyncio.to_thread(self._remember, user_id, message, answer)
+            return answer
+        except Exception as e:
+            return self._error_reply(e, "chat")
+
+    @metrics.timed("gemini_call", method="analyze_stock")
+    async def aanalyze_stock(self, corp_name: str, financials: dict, context: str = None) -> str:
+        """analyze_stock의 비동기 버전"""
+        if not context:
+            try:
+                return await self._agenerate(self._stock_prompt(corp_name, financials),
+                                             self._config(max_output_tokens=512), "analyze_stock")
+            except Exception as e:
+                return self._error_reply(e, "analyze_stock")
+
+        cache_key = self._analysis_cache_key(context)
+        cached = await asyncio.to_thread(self._cached_analysis, cache_key)
+        if cached:
+            return cached
+        try:
+            answer = await self._agenerate(context, self._analysis_config(), "analyze_stock")
+        except Exception as e:
+            return self._error_reply(e, "analyze_stock")
+        await asyncio.to_thread(self._store_analysis, cache_key, answer)
+        return answer
+
+    # ──────────────────────────────────────────────
+    # 요청 구성
+    # ──────────────────────────────────────────────
+    def _config(self, **kwargs):
+        """GenerateContentConfig (SDK 수준 HTTP 제한 시간 포함)"""
+        from google.genai import types
+        return types.GenerateContentConfig(
+            http_options=types.HttpOptions(timeout=int(self.timeout * 1000)),
+            **kwargs,
+        )
+
+    def _analysis_config(self):
+        return self._config(system_instruction=ANALYSIS_INSTRUCTION, max_output_tokens=768)
+
+    def _chat_request(self, user_id: int, message: str):
+        """저장된 히스토리 + 새 사용자 메시지로 (contents, config)를 만듭니다."""
+        from google.genai import types
+        history = [
+            types.Content(role=e["role"], parts=[types.Part(text=e["text"])])
+            for e in self.store.get_history(user_id)
+        ]
+        history.append(types.Content(role="user", parts=[types.Part(text=message)]))
+        return history, self._config(system_instruction=CHAT_INSTRUCTION, max_output_tokens=1024)
+
+    def _remember(self, user_id: int, message: str, answer: str):
+        """사용자 메시지와 모델 응답을 함께 저장 (최대 20개 유지)"""
+        self.store.append_history(user_id, [
+            {"role": "user", "text": message},
+            {"role": "model", "text": str(answer)},
+        ], max_items=MAX_HISTORY)
+
+    @staticmethod
+    def _stock_prompt(corp_name: str, financials: dict) -> str:
+        """피처 시트가 없을 때 쓰는 연간 실적 한 해 기준 프롬프트"""
         def fmt(val):
             if val == 0:
                 return "데이터 없음"
@@ -94,7 +246,7 @@ class GeminiHandler:
         opm     = f"{op_raw / rev_raw * 100:.1f}%" if rev_raw else "N/A"
         npm     = f"{net_raw / rev_raw * 100:.1f}%" if rev_raw else "N/A"
 
-        prompt = f"""
+        return f"""
 다음은 '{corp_name}'의 {year}년 연간 재무 데이터입니다.
 
 - 매출액: {revenue}
@@ -115,19 +267,127 @@ class GeminiHandler:
 
 규칙: 반드시 한국어로, 이모지 사용, 각 섹션 구분 명확히, 전체 200단어 이내.
 """
-        try:
-            response = self.client.models.generate_content(
-                model=self.model_id,
-                contents=prompt,
-                config=types.GenerateContentConfig(max_output_tokens=512)
-            )
+
+    # ──────────────────────────────────────────────
+    # 분석 캐시
+    # ──────────────────────────────────────────────
+    def _analysis_cache_key(self, context: str):
+        if self.cache is None:
+            return None
+        digest = hashlib.sha1(f"{self.model_id}\n{context}".encode("utf-8")).hexdigest()
+        return f"gemini:analysis:{digest}"
+
+    def _cached_analysis(self, cache_key):
+        if cache_key is None:
+            return None
+        cached = self.cache.get(cache_key)
+        metrics.record_cache(hit=bool(cached), cache="gemini_analysis")
+        return cached
+
+    def _store_analysis(self, cache_key, answer):
+        if cache_key is None or not answer:
+            return
+        # 대체 모델 응답은 기본 모델로 다시 만들 수 있도록 짧게만 보관
+        ttl = ANALYSIS_CACHE_TTL if getattr(answer, "model", self.model_id) == self.model_id else FALLBACK_CACHE_TTL
+        self.cache.set(cache_key, str(answer), ttl)
+
+    # ──────────────────────────────────────────────
+    # 모델 호출 (대체 모델 전환 · 제한 시간 · 헤지 요청)
+    # ──────────────────────────────────────────────
+    def _candidate_models(self) -> list:
+        """할당량 대기 중인 모델을 뺀 호출 순서. 모두 대기 중이면 전체를 다시 시도합니다."""
+        now = time.monotonic()
+        available = [m for m in self.models if self._exhausted_until.get(m, 0) <= now]
+        return available or list(self.models)
+
+    def _should_fall_back(self, model: str, error, method: str) -> bool:
+        """다음 모델로 넘어갈 오류(할당량 초과, 제한 시간 초과)인지 판단하고 기록합니다."""
+        if metrics.is_quota_error(error):
+            metrics.record_quota_hit("gemini", method=method, model=model)
+            self._exhausted_until[model] = time.monotonic() + QUOTA_COOLDOWN
+            return True
+        if _is_timeout(error):
+            metrics.registry.inc("gemini_timeouts_total", method=method, model=model)
+            return True
+        return False
+
+    def _served(self, text: str, model: str, method: str) -> GeminiReply:
+        metrics.registry.inc("gemini_responses_total", method=method, model=model)
+        if model != self.model_id:
+            metrics.registry.inc("gemini_fallback_total", method=method, model=model)
+        return GeminiReply(text, model)
+
+    def _generate(self, contents, config, method: str) -> GeminiReply:
+        """후보 모델을 차례로 동기 호출합니다. 모든 모델이 실패하면 마지막 예외를 다시 발생시킵니다."""
+        error = None
+        for model in self._candidate_models():
+            try:
+                response = self.client.models.generate_content(model=model, contents=contents, config=config)
+            except Exception as e:
+                if not self._should_fall_back(model, e, method):
+                    raise
+                error = e
+                continue
+            return self._served(response.text, model, method)
+        raise error
+
+    async def _agenerate(self, contents, config, method: str) -> GeminiReply:
+        """_generate의 비동기 버전. 모델마다 self.timeout 제한 시간과 헤지 요청을 적용합니다."""
+        error = None
+        for model in self._candidate_models():
+            try:
+                text = await self._acall_model(model, contents, config)
+            except Exception as e:
+                if not self._should_fall_back(model, e, method):
+                    raise
+                error = e
+                continue
+            return self._served(text, model, method)
+        raise error
+
+    async def _acall_model(self, model: str, contents, config) -> str:
+        """
+        한 모델을 제한 시간 안에 호출합니다.
+        hedge_after초가 지나도 응답이 없으면 같은 요청을 한 번 더 보내 먼저 성공한 응답을 쓰고 나머지는 취소합니다.
+        """
+        async def request():
+            response = await self.client.aio.models.generate_content(model=model, contents=contents, config=config)
             return response.text
-        except Exception as e:
-            err = str(e)
-            if '429' in err or 'RESOURCE_EXHAUSTED' in err or 'quota' in err.lower():
-                return (
-                    "⏳ Gemini AI 무료 한도를 초과했습니다.\n\n"
-                    "• 잠시 후 다시 시도해주세요 (보통 1분 후 리셋)\n"
-                    "• 일일 한도 초과 시 내일 다시 이용 가능합니다."
-                )
-            return f"⚠️ Gemini 분석 중 오류가 발생했습니다: {e}"
+
+        async with asyncio.timeout(self.timeout):
+            pending = {asyncio.ensure_future(request())}
+            try:
+                if self.hedge_after > 0:
+                    done, _ = await asyncio.wait(pending, timeout=self.hedge_after)
+                    if not done:
+                        metrics.registry.inc("gemini_hedged_total", model=model)
+                        pending.add(asyncio.ensure_future(request()))
+                error = None
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        if task.exception() is None:
+                            return task.result()
+                        error = task.exception()
+                raise error
+            finally:
+                for task in pending:
+                    task.cancel()
+
+    @staticmethod
+    def _error_reply(error, method: str) -> str:
+        """모든 모델 호출이 실패했을 때 사용자에게 돌려줄 안내 메시지"""
+        metrics.record_error("gemini_call", method=method)
+        action = "응답" if method == "chat" else "분석"
+        if metrics.is_quota_error(error):
+            reply = (
+                "⏳ Gemini AI 무료 한도를 초과했습니다.\n\n"
+                "• 잠시 후 다시 시도해주세요 (보통 1분 후 리셋)\n"
+                "• 일일 한도 초과 시 내일 다시 이용 가능합니다."
+            )
+            if method == "chat":
+                reply += "\n• 지속적 사용을 원하시면 Gemini API 유료 플랜을 고려해보세요."
+            return reply
+        if _is_timeout(error):
+            return f"⚠️ Gemini {action}이 지연되고 있습니다. 잠시 후 다시 시도해주세요."
+        return f"⚠️ Gemini {action} 중 오류가 발생했습니다: {error}"
@@ -0,0 +1,276 @@
+"""
+metrics.py
+봇·대시보드 핫패스 계측 모듈
+
+- 지연시간 히스토그램: DART/Gemini 호출, 캐시 조회, 텔레그램 명령 핸들러
+- 카운터: 오류, 쿼터 초과(429/RESOURCE_EXHAUSTED), 캐시 적중/실패
+- 노출: Prometheus 텍스트 형식 HTTP 엔드포인트(/metrics, /metrics.json) 또는 주기적 JSON 파일 덤프
+
+환경변수
+    METRICS_PORT       설정 시 해당 포트로 HTTP 엔드포인트를 엽니다. (127.0.0.1 바인딩)
+    METRICS_DUMP_PATH  설정 시 METRICS_DUMP_INTERVAL(기본 60초)마다 JSON 스냅샷을 저장합니다.
+"""
+import os
+import json
+import time
+import asyncio
+import threading
+import functools
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 초 단위 버킷 (DART 왕복은 수백 ms, Gemini는 수 초 단위)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def is_quota_error(error) -> bool:
+    """DART(status 020)·Gemini(429/RESOURCE_EXHAUSTED) 사용 한도 초과 여부"""
+    err = str(error)
+    return '429' in err or 'RESOURCE_EXHAUSTED' in err or 'quota' in err.lower() or "'020'" in err
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # 마지막 칸은 +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, upper in enumerate(self.buckets):
+            if value <= upper:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """버킷 경계 기준 근사 분위수 (해당 분위가 속한 버킷의 상한)"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= target:
+                return self.buckets[i] if i < len(self.buckets) else float("inf")
+        return float("inf")
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+def _label_str(key: tuple, extra: dict = None) -> str:
+    items = list(key) + list((extra or {}).items())
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: dict[str, dict[tuple, float]] = {}
+        self._histograms: dict[str, dict[tuple, Histogram]] = {}
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            hist = series.get(key)
+            if hist is None:
+                hist = series[key] = Histogram()
+            hist.observe(value)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    # ──────────────────────────────────────────────
+    # 출력
+    # ──────────────────────────────────────────────
+    def render_prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                for key, value in series.items():
+                    lines.append(f"{name}{_label_str(key)} {value:g}")
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# TYPE {name} histogram")
+                for key, hist in series.items():
+                    cumulative = 0
+                    for upper, c in zip(hist.buckets, hist.counts):
+                        cumulative += c
+                        lines.append(f"{name}_bucket{_label_str(key, {'le': f'{upper:g}'})} {cumulative}")
+                    lines.append(f"{name}_bucket{_label_str(key, {'le': '+Inf'})} {hist.count}")
+                    lines.append(f"{name}_sum{_label_str(key)} {hist.sum:.6f}")
+                    lines.append(f"{name}_count{_label_str(key)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        """JSON 직렬화 가능한 요약 (분위수, 캐시 적중률 포함)"""
+        with self._lock:
+            counters = {
+                name: {_label_str(key) or "total": value for key, value in series.items()}
+                for name, series in self._counters.items()
+            }
+            histograms = {
+                name: {
+                    _label_str(key) or "total": {
+                        "count": h.count,
+                        "avg": h.sum / h.count if h.count else 0.0,
+                        "p50": h.quantile(0.50),
+                        "p95": h.quantile(0.95),
+                        "p99": h.quantile(0.99),
+                    }
+                    for key, h in series.items()
+                }
+                for name, series in self._histograms.items()
+            }
+            cache_ratio = {}
+            for key, value in self._counters.get("cache_requests_total", {}).items():
+                labels = dict(key)
+                stats = cache_ratio.setdefault(labels.get("cache", "default"), {"hit": 0, "miss": 0})
+                stats[labels.get("result", "miss")] += value
+        for stats in cache_ratio.values():
+            total = stats["hit"] + stats["miss"]
+            stats["hit_ratio"] = stats["hit"] / total if total else 0.0
+        return {
+            "timestamp": time.time(),
+            "counters": counters,
+            "histograms": histograms,
+            "cache": cache_ratio,
+        }
+
+
+# 프로세스 전역 레지스트리
+registry = MetricsRegistry()
+
+
+# ──────────────────────────────────────────────
+# 계측 도우미
+# ──────────────────────────────────────────────
+@contextmanager
+def timer(name: str, **labels):
+    """블록 실행 시간을 {name}_seconds 히스토그램에 기록하고, 예외는 {name}_errors_total로 셉니다."""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        registry.inc(f"{name}_errors_total", **labels)
+        if is_quota_error(e):
+            registry.inc("quota_exhausted_total", source=name, **labels)
+        raise
+    finally:
+        registry.observe(f"{name}_seconds", time.perf_counter() - started, **labels)
+
+
+def timed(name: str, **labels):
+    """함수(동기/비동기) 데코레이터 버전의 timer"""
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with timer(name, **labels):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timer(name, **labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_cache(hit: bool, cache: str = "data_cache"):
+    registry.inc("cache_requests_total", cache=cache, result="hit" if hit else "miss")
+
+
+def record_quota_hit(source: str, **labels):
+    registry.inc("quota_exhausted_total", source=source, **labels)
+
+
+def record_error(name: str, **labels):
+    registry.inc(f"{name}_errors_total", **labels)
+
+
+# ──────────────────────────────────────────────
+# 노출 (HTTP 엔드포인트 / JSON 덤프)
+# ──────────────────────────────────────────────
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.startswith("/metrics.json"):
+            body = json.dumps(registry.snapshot(), ensure_ascii=False).encode("utf-8")
+            content_type = "application/json; charset=utf-8"
+        elif self.path.startswith("/metrics"):
+            body = registry.render_prometheus().encode("utf-8")
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # 스크레이프 요청마다 로그가 쌓이지 않도록 무시
+
+
+def start_http_server(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """백그라운드 스레드에서 /metrics, /metrics.json 엔드포인트를 엽니다."""
+    server = ThreadingHTTPServer((host, port), _MetricsRequestHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def dump_json(path: str):
+    """스냅샷을 임시 파일에 쓴 뒤 교체해, 읽는 쪽이 반쯤 쓰인 파일을 보지 않도록 합니다."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(registry.snapshot(), f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def start_json_dump(path: str, interval: float = 60.0) -> threading.Thread:
+    """interval초마다 JSON 스냅샷을 path에 저장하는 백그라운드 스레드를 시작합니다."""
+    def loop():
+        while True:
+            time.sleep(interval)
+            try:
+                dump_json(path)
+            except OSError as e:
+                print(f"Error dumping metrics: {e}")
+
+    thread = threading.Thread(target=loop, name="metrics-dump", daemon=True)
+    thread.start()
+    return thread
+
+
+def start_from_env():
+    """
+    METRICS_PORT / METRICS_DUMP_PATH 환경변수에 따라 노출 방식을 켭니다.
+    포트를 열지 못해도(다른 프로세스가 사용 중 등) 계측 노출만 건너뛰고 봇은 계속 실행합니다.
+    """
+    port = os.getenv("METRICS_PORT")
+    if port:
+        try:
+            start_http_server(int(port))
+        except OSError as e:
+            print(f"Error starting metrics server on port {port}: {e}")
+    dump_path = os.getenv("METRICS_DUMP_PATH")
+    if dump_path:
+        start_json_dump(dump_path, float(os.getenv("METRICS_DUMP_INTERVAL", "60")))
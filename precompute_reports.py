@@ -0,0 +1,115 @@
+"""
+precompute_reports.py
+자주 요청되는 기업의 /stock 리포트를 미리 생성하는 야간 작업
+
+report_store.py에 쌓인 /stock 요청 빈도에서 최근 상위 N개 기업을 골라, 연간 실적 요약과
+Gemini 분석 리포트를 새로 만들어 저장합니다. 봇은 저장된 리포트가 REPORT_MAX_AGE_HOURS 안이면
+DART·Gemini를 거치지 않고 바로 응답합니다. (systemd 타이머: stockbot-precompute.timer)
+
+사용 예)
+    python precompute_reports.py                     # 최근 30일 요청 상위 PRECOMPUTE_TOP_N(기본 300)개
+    python precompute_reports.py --top 50 --days 7
+    python precompute_reports.py --skip-fresh 12     # 12시간 안에 만든 리포트는 건너뜀
+"""
+import os
+import sys
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from dotenv import load_dotenv
+
+import metrics
+from data_cache import DataCache
+from report_store import ReportStore
+
+load_dotenv()
+DEFAULT_TOP_N = int(os.getenv("PRECOMPUTE_TOP_N", "300"))
+
+
+def precompute_company(dart, gemini, reports, corp_code, corp_name) -> str:
+    """한 기업의 리포트를 만들어 저장하고 상태(ok, no_data, quota, error:gemini)를 반환합니다."""
+    from context_builder import build_stock_context
+    from financials import load_latest_annual
+    from gemini_handler import is_error_reply
+
+    year, data = load_latest_annual(dart, corp_code)
+    if data is None:
+        return "no_data"
+
+    financials = {"year": year, "revenue": data.revenue, "op_income": data.op_income, "net_income": data.net_income}
+    sheet = build_stock_context(dart, corp_code, corp_name)
+    analysis = gemini.analyze_stock(corp_name, financials, context=sheet)
+    if is_error_reply(analysis):
+        return "quota" if analysis.startswith("⏳") else "error:gemini"
+
+    reports.save_report(corp_code, corp_name, year, data.revenue, data.op_income, data.net_income, analysis)
+    return "ok"
+
+
+def run_precompute(top_n: int = DEFAULT_TOP_N, days: int = 30, workers: int = 2, skip_fresh: float = None,
+                   reports: ReportStore = None, dart=None, gemini=None) -> dict:
+    """
+    상위 top_n개 기업 리포트를 생성하고 상태별 건수를 반환합니다.
+    Gemini 할당량을 다 쓰면 남은 기업은 건너뜁니다. (다음 실행이나 실시간 요청 때 생성)
+    """
+    reports = reports or ReportStore()
+    targets = reports.top_requested(top_n, days)
+    if skip_fresh is not None:
+        targets = [t for t in targets if reports.get_report(t["corp_code"], max_age=skip_fresh * 3600) is None]
+    print(f"최근 {days}일 요청 상위 {top_n}개 중 {len(targets)}개 기업 리포트 생성 시작")
+
+    if dart is None or gemini is None:
+        from dart_handler import DartHandler
+        from gemini_handler import GeminiHandler
+        cache = DataCache()
+        dart = dart or DartHandler(cache=cache)
+        gemini = gemini or GeminiHandler(cache=cache)
+
+    started = time.perf_counter()
+    counts = {}
+    quota_exhausted = threading.Event()
+
+    def work(target):
+        if quota_exhausted.is_set():
+            return "skipped"
+        try:
+            status = precompute_company(dart, gemini, reports, target["corp_code"], target["corp_name"])
+        except Exception as e:
+            print(f"{target['corp_name']} 리포트 생성 오류: {e}")
+            status = "error"
+        if status == "quota":
+            quota_exhausted.set()
+        return status
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(work, t): t for t in targets}
+        for done, fut in enumerate(as_completed(futures), start=1):
+            target, status = futures[fut], fut.result()
+            counts[status] = counts.get(status, 0) + 1
+            metrics.registry.inc("precompute_reports_total", status=status.split(":")[0])
+            print(f"[{done}/{len(targets)}] {target['corp_name']} ({target['requests']}회): {status}")
+
+    purged = reports.purge_requests()
+    elapsed = time.perf_counter() - started
+    print(f"=== 완료: {counts} / {elapsed:.1f}초 (오래된 요청 카운터 {purged}건 삭제) ===")
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="자주 요청되는 기업의 /stock 리포트를 미리 생성합니다.")
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP_N, help="생성할 기업 수 (요청 빈도 상위)")
+    parser.add_argument("--days", type=int, default=30, help="요청 빈도를 집계할 최근 일수")
+    parser.add_argument("--workers", type=int, default=2, help="동시 생성 스레드 수 (Gemini 분당 한도 고려)")
+    parser.add_argument("--skip-fresh", type=float, default=None, metavar="HOURS",
+                        help="이 시간 안에 생성된 리포트는 건너뜀")
+    args = parser.parse_args(argv)
+
+    counts = run_precompute(args.top, args.days, args.workers, args.skip_fresh)
+    # 대상이 있었는데 하나도 만들지 못했으면 실패로 종료 (systemd에서 확인 가능)
+    return 1 if counts and not counts.get("ok") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
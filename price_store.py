@@ -0,0 +1,101 @@
+"""
+price_store.py
+주가 시계열 조회 (FinanceDataReader + 로컬 캐시)
+
+대시보드와 API 서버가 같은 DataCache를 쓰면 한쪽에서 받은 주가를 다른 쪽도 재사용합니다.
+"""
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+PRICE_TTL      = 6 * 3600          # 오늘이 포함된 구간 (장중·장 마감 후 갱신)
+PAST_PRICE_TTL = 30 * 24 * 3600    # 과거 구간은 바뀌지 않음
+SNAPSHOT_TTL   = 3600              # 전 종목 시세표 (장 마감 후 한 번 갱신)
+SECTOR_TTL     = 7 * 24 * 3600     # 종목별 업종 (거의 바뀌지 않음)
+
+# 전 종목 시세 배열을 게시하는 공유 데이터셋 이름 (arrow_store, signal_scanner.py가 장 마감 후 갱신)
+SHARED_PRICES = "market_prices"
+
+
+def load_prices(ticker: str, start: str, end: str = None, cache=None):
+    """
+    종목코드의 일별 시세(Open/High/Low/Close/Volume, 날짜 인덱스)를 반환합니다.
+    start/end는 "YYYY-MM-DD" (end 기본값: 오늘). cache(DataCache)를 주면 결과를 저장해 재사용합니다.
+    """
+    today = datetime.date.today().isoformat()
+    end = end or today
+
+    def fetch():
+        # FinanceDataReader는 무거우므로 실제로 받을 때 불러옴
+        import FinanceDataReader as fdr
+        return fdr.DataReader(ticker, start, end)
+
+    if cache is None:
+        return fetch()
+    ttl = PRICE_TTL if end >= today else PAST_PRICE_TTL
+    return cache.get_or_set(f"prices:{ticker}:{start}:{end}", fetch, ttl)
+
+
+def load_market_snapshot(cache=None):
+    """
+    KRX 전 종목의 최근 종가·시가총액·상장주식수 표를 한 번의 호출로 받습니다.
+    인덱스는 종목코드(6자리), 컬럼은 Name, Market, Close, Marcap, Stocks 입니다.
+    """
+    def fetch():
+        import FinanceDataReader as fdr
+        listing = fdr.StockListing("KRX")
+        return listing.set_index("Code")[["Name", "Market", "Close", "Marcap", "Stocks"]]
+
+    if cache is None:
+        return fetch()
+    return cache.get_or_set(f"market:krx:{datetime.date.today().isoformat()}", fetch, SNAPSHOT_TTL)
+
+
+def load_sector_map(cache=None):
+    """종목코드 → KRX 업종명 Series (업종 정보가 없는 종목은 빠짐)"""
+    def fetch():
+        import FinanceDataReader as fdr
+        desc = fdr.StockListing("KRX-DESC")
+        return desc.dropna(subset=["Sector"]).set_index("Code")["Sector"]
+
+    if cache is None:
+        return fetch()
+    return cache.get_or_set("market:sectors", fetch, SECTOR_TTL)
+
+
+class PriceMatrix:
+    """
+    날짜 × 종목 2차원 시세. close·volume은 (날짜 수, 종목 수) float64 배열이고 거래가 없던 칸은 NaN입니다.
+    전 종목 스캐너·백테스트가 종목별 반복 없이 배열 연산으로 처리하도록 한 번에 정렬해 둡니다.
+    """
+    __slots__ = ("dates", "tickers", "close", "volume")
+
+    def __init__(self, dates, tickers, close, volume):
+        self.dates = dates
+        self.tickers = list(tickers)
+        self.close = close
+        self.volume = volume
+
+    def __repr__(self):
+        return f"PriceMatrix({len(self.dates)} days x {len(self.tickers)} tickers)"
+
+
+def load_price_matrix(tickers, start: str, end: str = None, cache=None, workers: int = 8) -> PriceMatrix:
+    """여러 종목의 일별 시세를 (캐시를 거쳐) 받아 날짜 합집합 기준의 PriceMatrix로 정렬합니다. 실패한 종목은 빠집니다."""
+    import pandas as pd
+
+    def load(ticker):
+        try:
+            return ticker, load_prices(ticker, start, end, cache)
+        except Exception as e:
+            print(f"Error fetching prices for {ticker}: {e}")
+            return ticker, None
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        frames = {t: df for t, df in pool.map(load, tickers) if df is not None and not df.empty}
+
+    if not frames:
+        return PriceMatrix(pd.DatetimeIndex([]).to_numpy(), [], None, None)
+    close = pd.concat({t: df["Close"] for t, df in frames.items()}, axis=1).sort_index()
+    volume = pd.concat({t: df["Volume"] for t, df in frames.items()}, axis=1).reindex(close.index)
+    return PriceMatrix(close.index.to_numpy(), close.columns,
+                       close.to_numpy(dtype="float64"), volume.to_numpy(dtype="float64"))
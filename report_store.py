@@ -0,0 +1,106 @@
+"""
+report_store.py
+/stock 요청 빈도와 미리 생성한 분석 리포트 저장소 (SQLite)
+
+봇은 /stock 요청마다 기업별 일 단위 카운터를 올리고, 야간 작업(precompute_reports.py)은
+최근 요청이 많은 상위 N개 기업의 재무 요약과 Gemini 리포트를 미리 만들어 저장합니다.
+봇은 저장된 리포트가 충분히 최신이면 DART·Gemini를 거치지 않고 바로 답합니다.
+
+환경변수
+    REPORT_DB_PATH  SQLite 파일 경로 (기본 stock_reports.db)
+"""
+import os
+import time
+import sqlite3
+import datetime
+from contextlib import closing
+
+DEFAULT_REPORT_PATH = os.getenv("REPORT_DB_PATH", "stock_reports.db")
+
+
+class ReportStore:
+    def __init__(self, db_path: str = DEFAULT_REPORT_PATH):
+        self.db_path = db_path
+        with closing(self._connect()) as conn, conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS stock_requests (
+                    corp_code TEXT NOT NULL,
+                    day       TEXT NOT NULL,
+                    corp_name TEXT NOT NULL,
+                    count     INTEGER NOT NULL,
+                    PRIMARY KEY (corp_code, day)
+                );
+
+                CREATE TABLE IF NOT EXISTS stock_reports (
+                    corp_code    TEXT PRIMARY KEY,
+                    corp_name    TEXT NOT NULL,
+                    year         INTEGER NOT NULL,
+                    revenue      INTEGER NOT NULL,
+                    op_income    INTEGER NOT NULL,
+                    net_income   INTEGER NOT NULL,
+                    analysis     TEXT NOT NULL,
+                    generated_at REAL NOT NULL,
+                    source       TEXT NOT NULL
+                );
+                """
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    # ── 요청 빈도 ──
+    def record_request(self, corp_code: str, corp_name: str):
+        """오늘 날짜의 기업별 요청 카운터를 1 올립니다."""
+        day = datetime.date.today().isoformat()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                """
+                INSERT INTO stock_requests (corp_code, day, corp_name, count) VALUES (?, ?, ?, 1)
+                ON CONFLICT (corp_code, day) DO UPDATE SET count = count + 1, corp_name = excluded.corp_name
+                """,
+                (corp_code, day, corp_name),
+            )
+
+    def top_requested(self, limit: int, days: int = 30) -> list:
+        """최근 days일 요청 수 상위 limit개 [{"corp_code", "corp_name", "requests"}]"""
+        since = (datetime.date.today() - datetime.timedelta(days=days - 1)).isoformat()
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                """
+                SELECT corp_code, MAX(corp_name) AS corp_name, SUM(count) AS requests
+                FROM stock_requests WHERE day >= ?
+                GROUP BY corp_code ORDER BY requests DESC, corp_code LIMIT ?
+                """,
+                (since, limit),
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def purge_requests(self, keep_days: int = 90) -> int:
+        """keep_days일보다 오래된 카운터를 지우고 삭제 건수를 반환합니다."""
+        before = (datetime.date.today() - datetime.timedelta(days=keep_days)).isoformat()
+        with closing(self._connect()) as conn, conn:
+            return conn.execute("DELETE FROM stock_requests WHERE day < ?", (before,)).rowcount
+
+    # ── 리포트 ──
+    def save_report(self, corp_code: str, corp_name: str, year: int, revenue: int, op_income: int,
+                    net_income: int, analysis: str, source: str = "precompute"):
+        """source: precompute(야간 작업) | live(요청 시 생성)"""
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO stock_reports VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (corp_code, corp_name, int(year), int(revenue), int(op_income), int(net_income),
+                 analysis, time.time(), source),
+            )
+
+    def get_report(self, corp_code: str, max_age: float = None):
+        """저장된 리포트(dict). 없거나 max_age초보다 오래됐으면 None."""
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM stock_reports WHERE corp_code = ?", (corp_code,)).fetchone()
+        if row is None or (max_age is not None and time.time() - row["generated_at"] > max_age):
+            return None
+        return dict(row)
@@ -0,0 +1,130 @@
+"""
+schema.py
+DART 표(재무제표, 공시 목록, 분기 실적 패널)의 압축 스키마와 보고서별 레코드
+
+DART 응답은 모든 값이 문자열(object)이라, 전 종목·다년도 패널을 메모리에 올리면 같은 계정명·기업 코드
+문자열이 행마다 따로 저장됩니다. 여기서는 다음 규칙으로 변환합니다.
+    - 금액        → int64 (원 단위, "-"·빈 값은 0)
+    - 반복되는 코드·이름 (corp_code, account_nm, fs_div …) → category
+    - 접수일자 rcept_dt → datetime64
+변환 함수는 이미 변환된 표를 받으면 그대로 돌려주므로, 캐시에 남아 있는 예전 형식과 섞여도 됩니다.
+"""
+import pandas as pd
+
+# 재무제표(fnlttSinglAcnt) 컬럼
+FINSTATE_AMOUNT_COLUMNS = ["thstrm_amount", "frmtrm_amount", "bfefrmtrm_amount"]
+FINSTATE_CATEGORY_COLUMNS = [
+    "rcept_no", "reprt_code", "bsns_year", "corp_code", "stock_code", "fs_div", "fs_nm", "sj_div", "sj_nm",
+    "account_nm", "thstrm_nm", "thstrm_dt", "frmtrm_nm", "frmtrm_dt", "bfefrmtrm_nm", "bfefrmtrm_dt", "currency",
+]
+
+# 공시 목록(list) 컬럼
+DISCLOSURE_CATEGORY_COLUMNS = ["corp_code", "corp_name", "stock_code", "corp_cls", "flr_nm", "rm", "pblntf_ty"]
+
+# 분기 실적 패널 (financials.py) 컬럼
+PANEL_AMOUNT_COLUMNS = ["Revenue_Acc", "OpIncome_Acc", "NetIncome_Acc", "Revenue", "OpIncome", "NetIncome"]
+
+
+def parse_amount(value) -> int:
+    """DART 금액 문자열("1,234", "-1,234", "-", "")을 원 단위 정수로 바꿉니다. 읽을 수 없으면 0."""
+    if value is None:
+        return 0
+    if isinstance(value, (int, float)):
+        return 0 if value != value else int(value)  # NaN → 0
+    text = str(value).replace(",", "").strip()
+    if text in ("", "-"):
+        return 0
+    try:
+        return int(text)
+    except ValueError:
+        try:
+            return int(float(text))
+        except ValueError:
+            return 0
+
+
+def _is_compact(df, column: str) -> bool:
+    """column이 없거나 이미 문자열이 아닌 타입으로 바뀌어 있으면 True"""
+    if column not in df.columns:
+        return True
+    dtype = df[column].dtype
+    return not (pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype))
+
+
+def _to_category(df, columns):
+    for col in columns:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("category")
+
+
+def compact_finstate(df):
+    """finstate 결과 표를 압축 스키마로 변환합니다. (금액 int64, 코드·계정명 category)"""
+    if df is None or df.empty or _is_compact(df, "thstrm_amount"):
+        return df
+    df = df.copy()
+    for col in FINSTATE_AMOUNT_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].map(parse_amount).astype("int64")
+    if "ord" in df.columns:
+        df["ord"] = pd.to_numeric(df["ord"], errors="coerce").fillna(0).astype("int16")
+    _to_category(df, FINSTATE_CATEGORY_COLUMNS)
+    return df
+
+
+def compact_disclosures(df):
+    """공시 목록 표를 압축 스키마로 변환합니다. (rcept_dt datetime64, 반복 문자열 category)"""
+    if df is None or df.empty or _is_compact(df, "rcept_dt"):
+        return df
+    df = df.copy()
+    df["rcept_dt"] = pd.to_datetime(df["rcept_dt"].astype(str), format="%Y%m%d", errors="coerce")
+    _to_category(df, DISCLOSURE_CATEGORY_COLUMNS)
+    return df
+
+
+def compact_panel(df):
+    """분기 실적 패널을 압축 스키마로 변환합니다. (Year int16, Quarter int8, 금액 int64, Period category)"""
+    if df is None or df.empty:
+        return df
+    df = df.copy()
+    if "Year" in df.columns:
+        df["Year"] = df["Year"].astype("int16")
+    if "Quarter" in df.columns:
+        df["Quarter"] = df["Quarter"].astype("int8")
+    for col in PANEL_AMOUNT_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("int64")
+    _to_category(df, ["corp_code", "Period"])
+    return df
+
+
+def format_rcept_dt(value, sep: str = "-") -> str:
+    """접수일자(datetime 또는 "YYYYMMDD" 문자열)를 "YYYY-MM-DD"로 표시합니다. sep=""이면 "YYYYMMDD"."""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return ""
+    if isinstance(value, str):
+        digits = value.replace("-", "").strip()[:8]
+        if len(digits) != 8 or not digits.isdigit():
+            return value
+        return f"{digits[:4]}{sep}{digits[4:6]}{sep}{digits[6:]}"
+    return pd.Timestamp(value).strftime(f"%Y{sep}%m{sep}%d")
+
+
+class FinancialRecord:
+    """
+    보고서 1건의 핵심 실적 (get_financial_data 결과)
+    전 종목 패널을 만들 때 보고서마다 생기므로 __slots__로 인스턴스 dict를 두지 않습니다.
+    """
+    __slots__ = ("corp_code", "year", "reprt_code", "revenue", "op_income", "net_income", "details")
+
+    def __init__(self, corp_code, year, reprt_code, revenue: int, op_income: int, net_income: int, details=None):
+        self.corp_code = corp_code
+        self.year = int(year)
+        self.reprt_code = reprt_code
+        self.revenue = revenue
+        self.op_income = op_income
+        self.net_income = net_income
+        self.details = details  # 해당 보고서의 전체 재무제표 (compact_finstate 형식)
+
+    def __repr__(self):
+        return (f"FinancialRecord({self.corp_code}, {self.year}, {self.reprt_code}, "
+                f"revenue={self.revenue}, op_income={self.op_income}, net_income={self.net_income})")
@@ -0,0 +1,148 @@
+"""
+sectors.py
+기업 메타데이터(DART 기업개황)와 업종별 집계
+
+DART 기업개황의 업종코드(induty_code, 한국표준산업분류), 결산월(acc_mt), 법인구분(corp_cls → 상장 시장)을
+기업별로 한 번 조회해 메타 표로 DataCache에 보관하고(COMPANY_META_MAX_AGE마다 다시 조회),
+업종코드 앞 SECTOR_DIGITS자리(산업분류 소분류)로 업종을 묶습니다.
+업종 이름은 KRX 업종표(price_store.load_sector_map)에서 같은 업종코드 기업들이 가장 많이 쓰는 이름을 빌려 옵니다.
+
+업종별 집계(sector_rollups — 기업 수, 시가총액 합계, 영업이익률·매출 증가율·배수 중앙값)는
+valuation.py가 장 마감 후 증분 갱신 때 함께 계산해 저장하므로, 봇·대시보드는 동종 기업 데이터를 따로 조회하지 않습니다.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import metrics
+
+# 캐시 키 (valuation.py 갱신 작업이 채우고 봇·대시보드가 읽음)
+COMPANY_META_KEY = "sectors:company_meta"
+ROLLUPS_KEY      = "sectors:rollups"
+
+# 기업개황을 다시 조회하는 주기 (초)
+COMPANY_META_MAX_AGE = 90 * 24 * 3600
+
+# 업종으로 묶는 산업분류 자릿수 (2: 중분류, 3: 소분류)
+SECTOR_DIGITS = 3
+
+# 법인구분 → 시장
+CORP_CLS_MARKETS = {"Y": "KOSPI", "K": "KOSDAQ", "N": "KONEX", "E": "기타"}
+
+META_COLUMNS = ["corp_name", "stock_code", "induty_code", "sector_code", "acc_mt", "market", "updated_at"]
+
+# 업종별 중앙값을 내는 지표 (valuation 표 컬럼)
+ROLLUP_METRICS = ["opm", "revenue_growth", "per", "pbr", "psr", "ev_ebit"]
+ROLLUP_LABELS = {
+    "opm": "영업이익률", "revenue_growth": "매출 증가율",
+    "per": "PER", "pbr": "PBR", "psr": "PSR", "ev_ebit": "EV/EBIT",
+}
+
+
+def sector_code(induty_code) -> str:
+    """업종코드(최대 5자리)를 업종 묶음 코드로 줄입니다. 없으면 빈 문자열."""
+    return str(induty_code or "").strip()[:SECTOR_DIGITS]
+
+
+# ──────────────────────────────────────────────
+# 기업 메타데이터 (증분 갱신)
+# ──────────────────────────────────────────────
+def _meta_row(handler, corp_code):
+    info = handler.get_company_info(corp_code)
+    if not info:
+        return None
+    return {
+        "corp_code": corp_code,
+        "corp_name": info.get("corp_name", ""),
+        "stock_code": info.get("stock_code", ""),
+        "induty_code": info.get("induty_code", ""),
+        "sector_code": sector_code(info.get("induty_code")),
+        "acc_mt": int(info["acc_mt"]) if str(info.get("acc_mt", "")).isdigit() else 12,
+        "market": CORP_CLS_MARKETS.get(info.get("corp_cls"), "기타"),
+        "updated_at": time.time(),
+    }
+
+
+def refresh_company_meta(handler, cache, corp_codes, workers: int = 4, full: bool = False):
+    """
+    corp_codes의 메타 표(기업 코드 인덱스, META_COLUMNS)를 반환합니다.
+    저장된 표에 없거나 COMPANY_META_MAX_AGE가 지난 기업만 기업개황을 조회합니다. (실패한 기업은 다음 갱신 때 다시)
+    """
+    meta = None if full else cache.get(COMPANY_META_KEY)
+    if meta is None:
+        meta = pd.DataFrame(columns=META_COLUMNS).rename_axis("corp_code")
+    corp_codes = list(corp_codes)
+    stale = meta.index[meta["updated_at"] < time.time() - COMPANY_META_MAX_AGE]
+    targets = sorted((set(corp_codes) - set(meta.index)) | set(stale))
+
+    if targets:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            rows = [row for row in pool.map(lambda c: _meta_row(handler, c), targets) if row is not None]
+        metrics.registry.inc("company_meta_fetched_total", len(rows))
+        if rows:
+            updated = pd.DataFrame(rows).set_index("corp_code")
+            meta = pd.concat([meta.drop(updated.index, errors="ignore"), updated])[META_COLUMNS]
+        cache.set(COMPANY_META_KEY, meta)
+    return meta[meta.index.isin(corp_codes)]
+
+
+def load_company_meta(cache):
+    """저장된 메타 표 (없으면 None, DART 호출 없음)"""
+    return cache.get(COMPANY_META_KEY)
+
+
+# ──────────────────────────────────────────────
+# 업종 이름 · 종목별 업종
+# ──────────────────────────────────────────────
+def sector_names(meta, krx_sectors=None) -> dict:
+    """
+    업종 묶음 코드 → 이름. KRX 업종표(종목코드 → 업종명)가 있으면 같은 코드 기업들이 가장 많이 쓰는 업종명,
+    없으면 "산업분류 {코드}".
+    """
+    codes = meta.loc[meta["sector_code"] != "", ["stock_code", "sector_code"]]
+    names = {code: f"산업분류 {code}" for code in codes["sector_code"].unique()}
+    if krx_sectors is not None and not codes.empty:
+        labels = codes.assign(label=krx_sectors.reindex(codes["stock_code"]).to_numpy()).dropna(subset=["label"])
+        if not labels.empty:
+            names.update(labels.groupby("sector_code")["label"].agg(lambda s: s.value_counts().index[0]).to_dict())
+    return names
+
+
+def sector_map(meta, krx_sectors=None):
+    """
+    종목코드 → 업종명 Series. 업종코드가 없는 기업(기업개황 조회 실패 등)은 KRX 업종명을 그대로 씁니다.
+    """
+    names = sector_names(meta, krx_sectors)
+    listed = meta[meta["stock_code"] != ""]
+    sectors = pd.Series(listed["sector_code"].map(names).to_numpy(), index=listed["stock_code"].to_numpy())
+    if krx_sectors is not None:
+        sectors = sectors.fillna(krx_sectors.reindex(sectors.index))
+    return sectors.dropna()
+
+
+# ──────────────────────────────────────────────
+# 업종별 집계
+# ──────────────────────────────────────────────
+def sector_rollups(table):
+    """
+    valuation 표(종목별 sector, marcap, opm, revenue_growth, 배수)로 업종별 기업 수·시가총액 합계·지표 중앙값 표를 만듭니다.
+    중앙값은 값이 있는 기업만으로 계산합니다. (적자 기업의 PER 등은 제외)
+    """
+    columns = [m for m in ROLLUP_METRICS if m in table.columns]
+    by_sector = table.groupby("sector", observed=True)
+    rollups = by_sector[columns].median()
+    rollups.insert(0, "companies", by_sector.size().astype("int32"))
+    rollups.insert(1, "marcap", by_sector["marcap"].sum().astype("int64"))
+    return rollups.sort_values("marcap", ascending=False)
+
+
+def compare_to_sector(row: dict, rollup: dict) -> dict:
+    """종목 지표와 업종 중앙값을 나란히 담은 dict ({지표: (종목 값, 업종 중앙값)}), 둘 다 없으면 생략"""
+    result = {}
+    for metric in ROLLUP_METRICS:
+        value, median = row.get(metric, np.nan), rollup.get(metric, np.nan)
+        if value == value or median == median:
+            result[metric] = (value, median)
+    return result
@@ -0,0 +1,304 @@
+"""
+signal_scanner.py
+전 종목 기술적 신호 스캐너 + 구독자 일일 알림
+
+로컬 시세 저장소(price_store.load_price_matrix)의 날짜 × 종목 2차원 배열 위에서
+이동평균 교차, RSI, MACD 교차, 거래량 급증을 종목별 반복 없이 한 번의 배열 연산으로 계산합니다.
+(지수이동평균처럼 직전 값이 필요한 계산만 날짜 축으로 반복하고, 각 단계는 전 종목을 한꺼번에 처리)
+--workers를 주면 종목을 나눠 프로세스 풀에서 병렬로 계산합니다.
+
+--send를 주면 /subscribe로 알림을 신청한 사용자에게 관심종목 신호와 시장 전체 주요 신호를 보냅니다.
+
+사용 예)
+    python signal_scanner.py                       # 전 종목 스캔 결과 요약 출력
+    python signal_scanner.py --workers 4 --send    # 장 마감 후 알림 (systemd 타이머: stockbot-signals.timer)
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+import metrics
+
+load_dotenv()
+
+# 알림 구독 주제 (state_store 구독 키)
+SIGNAL_TOPIC = "signals"
+
+MA_SHORT, MA_LONG = 20, 60
+RSI_PERIOD = 14
+RSI_OVERSOLD, RSI_OVERBOUGHT = 30, 70
+MACD_FAST, MACD_SLOW, MACD_SIGNAL = 12, 26, 9
+VOLUME_WINDOW = 20
+VOLUME_BREAKOUT = 3.0   # 20일 평균 거래량의 몇 배부터 급증으로 볼지
+
+# 지표 계산에 필요한 최근 거래일 수 (MACD·60일선 안정화 여유 포함)
+LOOKBACK_DAYS = 250
+
+SIGNALS = {
+    "golden_cross":    f"골든크로스 ({MA_SHORT}일선이 {MA_LONG}일선 상향 돌파)",
+    "dead_cross":      f"데드크로스 ({MA_SHORT}일선이 {MA_LONG}일선 하향 돌파)",
+    "macd_bullish":    "MACD 시그널선 상향 교차",
+    "macd_bearish":    "MACD 시그널선 하향 교차",
+    "rsi_oversold":    f"RSI 과매도 진입 ({RSI_OVERSOLD} 미만)",
+    "rsi_overbought":  f"RSI 과매수 진입 ({RSI_OVERBOUGHT} 초과)",
+    "volume_breakout": f"거래량 급증 ({VOLUME_WINDOW}일 평균의 {VOLUME_BREAKOUT:g}배 이상, 상승 마감)",
+}
+
+# scan() 결과 표의 컬럼 (종목·신호별 한 행)
+SIGNAL_COLUMNS = ["ticker", "signal", "change", "rsi", "volume_ratio"]
+
+
+# ──────────────────────────────────────────────
+# 지표 (입력: (날짜, 종목) 2차원 배열)
+# ──────────────────────────────────────────────
+def ffill(values):
+    """날짜 축으로 직전 값을 채웁니다. (거래정지일 등) 첫 거래 이전 칸은 NaN으로 남습니다."""
+    index = np.where(~np.isnan(values), np.arange(values.shape[0])[:, None], 0)
+    np.maximum.accumulate(index, axis=0, out=index)
+    return values[index, np.arange(values.shape[1])]
+
+
+def rolling_mean(values, window: int):
+    """날짜 축 단순이동평균 (누적합 차이). 창 안에 NaN이 있으면 NaN."""
+    valid = ~np.isnan(values)
+    csum = np.cumsum(np.where(valid, values, 0.0), axis=0)
+    ccount = np.cumsum(valid, axis=0)
+    out = np.full(values.shape, np.nan)
+    if values.shape[0] < window:
+        return out
+    total = csum[window - 1:].copy()
+    total[1:] -= csum[:-window]
+    count = ccount[window - 1:].copy()
+    count[1:] -= ccount[:-window]
+    out[window - 1:] = np.where(count == window, total / window, np.nan)
+    return out
+
+
+def ewm(values, alpha: float):
+    """지수가중평균. 종목마다 첫 유효값에서 시작하고, NaN인 날은 직전 값을 유지합니다."""
+    out = np.empty_like(values)
+    prev = np.full(values.shape[1], np.nan)
+    for t in range(values.shape[0]):
+        x = values[t]
+        prev = np.where(np.isnan(prev), x, np.where(np.isnan(x), prev, prev + alpha * (x - prev)))
+        out[t] = prev
+    return out
+
+
+def ema(values, span: int):
+    return ewm(values, 2.0 / (span + 1))
+
+
+def rsi(close, period: int = RSI_PERIOD):
+    """Wilder RSI (0~100). 첫 행은 NaN."""
+    delta = np.diff(close, axis=0, prepend=np.nan)
+    gain = ewm(np.where(np.isnan(delta), np.nan, np.clip(delta, 0, None)), 1.0 / period)
+    loss = ewm(np.where(np.isnan(delta), np.nan, np.clip(-delta, 0, None)), 1.0 / period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(loss == 0, np.where(gain > 0, 100.0, 50.0), 100.0 - 100.0 / (1.0 + gain / loss))
+
+
+def macd(close):
+    """(MACD선, 시그널선)"""
+    line = ema(close, MACD_FAST) - ema(close, MACD_SLOW)
+    return line, ema(line, MACD_SIGNAL)
+
+
+def _crossed_up(a, b):
+    """마지막 거래일에 a가 b를 아래에서 위로 돌파했는지 (종목별 bool)"""
+    return (a[-2] <= b[-2]) & (a[-1] > b[-1])
+
+
+def compute_signals(close, volume) -> dict:
+    """
+    마지막 거래일 기준 신호(종목별 bool 배열)와 참고 값을 계산합니다.
+    반환: {신호 이름: bool (N,), "rsi": float (N,), "volume_ratio": float (N,), "change": float (N,)}
+    """
+    close = ffill(close[-LOOKBACK_DAYS:])
+    volume = np.nan_to_num(volume[-LOOKBACK_DAYS:], nan=0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ma_short, ma_long = rolling_mean(close, MA_SHORT), rolling_mean(close, MA_LONG)
+        macd_line, macd_signal = macd(close)
+        rsi_values = rsi(close)
+        # 오늘 거래량 ÷ 어제까지 20일 평균 거래량
+        avg_volume = rolling_mean(volume[:-1], VOLUME_WINDOW)[-1]
+        volume_ratio = np.where(avg_volume > 0, volume[-1] / avg_volume, np.nan)
+        change = close[-1] / close[-2] - 1
+
+        return {
+            "golden_cross": _crossed_up(ma_short, ma_long),
+            "dead_cross": _crossed_up(ma_long, ma_short),
+            "macd_bullish": _crossed_up(macd_line, macd_signal),
+            "macd_bearish": _crossed_up(macd_signal, macd_line),
+            "rsi_oversold": (rsi_values[-2] >= RSI_OVERSOLD) & (rsi_values[-1] < RSI_OVERSOLD),
+            "rsi_overbought": (rsi_values[-2] <= RSI_OVERBOUGHT) & (rsi_values[-1] > RSI_OVERBOUGHT),
+            "volume_breakout": (volume_ratio >= VOLUME_BREAKOUT) & (change > 0),
+            "rsi": rsi_values[-1],
+            "volume_ratio": volume_ratio,
+            "change": change,
+        }
+
+
+def _signals_table(tickers, result) -> pd.DataFrame:
+    """compute_signals 결과를 (종목, 신호) 행 단위 표로 바꿉니다."""
+    frames = []
+    for name in SIGNALS:
+        hit = np.flatnonzero(result[name])
+        if hit.size:
+            frames.append(pd.DataFrame({
+                "ticker": np.asarray(tickers, dtype=object)[hit], "signal": name,
+                "change": result["change"][hit], "rsi": result["rsi"][hit],
+                "volume_ratio": result["volume_ratio"][hit],
+            }))
+    if not frames:
+        return _empty_signals()
+    return pd.concat(frames, ignore_index=True)
+
+
+def _empty_signals() -> pd.DataFrame:
+    return pd.DataFrame(columns=SIGNAL_COLUMNS)
+
+
+def _scan_chunk(args):
+    tickers, close, volume = args
+    return _signals_table(tickers, compute_signals(close, volume))
+
+
+def scan(matrix, workers: int = 1) -> pd.DataFrame:
+    """
+    PriceMatrix 전체를 스캔해 마지막 거래일에 발생한 신호 표(ticker, signal, change, rsi, volume_ratio)를 반환합니다.
+    workers > 1이면 종목을 workers개 묶음으로 나눠 프로세스 풀에서 계산합니다.
+    """
+    if not matrix.tickers or matrix.close is None or matrix.close.shape[0] < 2:
+        return _empty_signals()
+    started = time.perf_counter()
+    close, volume = matrix.close[-LOOKBACK_DAYS:], matrix.volume[-LOOKBACK_DAYS:]
+    if workers <= 1:
+        table = _scan_chunk((matrix.tickers, close, volume))
+    else:
+        bounds = np.linspace(0, len(matrix.tickers), workers + 1, dtype=int)
+        chunks = [(matrix.tickers[a:b], close[:, a:b], volume[:, a:b]) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            table = pd.concat(list(pool.map(_scan_chunk, chunks)), ignore_index=True)
+    metrics.registry.observe("signal_scan_seconds", time.perf_counter() - started, workers=str(workers))
+    return table
+
+
+# ──────────────────────────────────────────────
+# 구독자 알림
+# ──────────────────────────────────────────────
+def _signal_line(row, names: dict) -> str:
+    name = names.get(row.ticker, row.ticker)
+    return f"• {name}({row.ticker}) {row.change * 100:+.1f}% · RSI {row.rsi:.0f} · 거래량 {row.volume_ratio:.1f}배"
+
+
+def build_digest(signals: pd.DataFrame, names: dict, watch_tickers=(), per_signal: int = 5, as_of=None) -> str:
+    """
+    알림 메시지. 관심종목 신호를 먼저, 이어서 신호별 시장 전체 상위 per_signal개(거래량 비율 순)를 보여줍니다.
+    보낼 신호가 없으면 빈 문자열.
+    """
+    lines = []
+    watch = signals[signals["ticker"].isin(list(watch_tickers))]
+    if not watch.empty:
+        lines.append("⭐ **관심종목 신호**")
+        for row in watch.itertuples(index=False):
+            lines.append(f"{_signal_line(row, names)} — {SIGNALS[row.signal]}")
+        lines.append("")
+
+    for signal, label in SIGNALS.items():
+        hits = signals[signals["signal"] == signal]
+        if hits.empty:
+            continue
+        lines.append(f"**{label}** ({len(hits)}종목)")
+        for row in hits.nlargest(per_signal, "volume_ratio").itertuples(index=False):
+            lines.append(_signal_line(row, names))
+        lines.append("")
+
+    if not lines:
+        return ""
+    as_of = as_of or datetime.date.today().isoformat()
+    return f"📡 **{as_of} 장 마감 기술적 신호**\n\n" + "\n".join(lines) + "\n⚠️ 투자 참고용이며 매매 권유가 아닙니다."
+
+
+async def send_digests(token: str, state, signals: pd.DataFrame, names: dict, stock_codes, as_of=None) -> dict:
+    """
+    구독자마다 알림을 보냅니다. stock_codes(corp_code → 종목코드 함수)로 관심종목을 종목코드로 바꿉니다.
+    봇을 차단한 사용자는 구독을 해지합니다. 반환: {"sent", "skipped", "failed"}
+    """
+    from telegram import Bot
+    from telegram.constants import ParseMode
+    from telegram.error import Forbidden
+
+    counts = {"sent": 0, "skipped": 0, "failed": 0}
+    async with Bot(token) as bot:
+        for user_id in state.list_subscribers(SIGNAL_TOPIC):
+            watch = [stock_codes(item["corp_code"]) for item in state.list_watch(user_id)]
+            text = build_digest(signals, names, [t for t in watch if t], as_of=as_of)
+            if not text:
+                counts["skipped"] += 1
+                continue
+            try:
+                await bot.send_message(user_id, text, parse_mode=ParseMode.MARKDOWN)
+                counts["sent"] += 1
+            except Forbidden:
+                state.unsubscribe(user_id, SIGNAL_TOPIC)
+                counts["failed"] += 1
+            except Exception as e:
+                print(f"Error sending digest to {user_id}: {e}")
+                counts["failed"] += 1
+            await asyncio.sleep(0.05)  # 텔레그램 전송 한도(초당 30건) 아래로 유지
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="전 종목 기술적 신호를 스캔하고 구독자에게 알림을 보냅니다.")
+    parser.add_argument("--workers", type=int, default=1, help="스캔 프로세스 수")
+    parser.add_argument("--days", type=int, default=400, help="불러올 시세 기간 (달력일)")
+    parser.add_argument("--send", action="store_true", help="구독자에게 텔레그램 알림 전송")
+    args = parser.parse_args(argv)
+
+    from data_cache import DataCache
+    from arrow_store import ArrowStore
+    from price_store import load_market_snapshot, load_price_matrix, SHARED_PRICES
+
+    cache = DataCache()
+    snapshot = load_market_snapshot(cache)
+    start = (datetime.date.today() - datetime.timedelta(days=args.days)).isoformat()
+
+    started = time.perf_counter()
+    matrix = load_price_matrix(list(snapshot.index), start, cache=cache)
+    loaded = time.perf_counter()
+    signals = scan(matrix, workers=args.workers)
+    print(f"{matrix} 로딩 {loaded - started:.1f}초, 스캔 {time.perf_counter() - loaded:.2f}초")
+    print(signals["signal"].value_counts().to_string() if not signals.empty else "신호 없음")
+    if not matrix.tickers:
+        # 시세를 하나도 못 받음 — 빈 배열로 공유 시세를 덮어쓰거나 빈 알림을 보내지 않음
+        print("시세를 불러온 종목이 없어 게시·알림을 건너뜁니다.")
+        return 0
+    # 같은 시세 배열을 다른 프로세스(유사 기업 색인 등)가 다시 받지 않고 매핑해 쓰도록 게시
+    ArrowStore().publish_matrix(SHARED_PRICES, matrix)
+
+    if args.send:
+        from dart_handler import DartHandler
+        from state_store import create_state_store
+        token = os.getenv("TELEGRAM_BOT_TOKEN")
+        if not token:
+            raise RuntimeError("TELEGRAM_BOT_TOKEN이 없습니다. .env 파일을 확인하세요.")
+        dart = DartHandler(cache=cache)
+        as_of = pd.Timestamp(matrix.dates[-1]).date().isoformat() if len(matrix.dates) else None
+        counts = asyncio.run(send_digests(token, create_state_store(), signals, snapshot["Name"].to_dict(),
+                                          dart.find_stock_code, as_of=as_of))
+        print(f"알림 전송: {counts}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,296 @@
+"""
+similarity.py
+재무·주가 특성이 비슷한 기업 찾기 (/similar)
+
+valuation.py가 저장한 전 종목 표·기업별 재무(TTM)와 price_store 시세로 기업마다 특성 벡터
+(영업이익률, 순이익률, 매출 증가율, 매출 규모, 시가총액, 부채비율, 주가 변동성)를 만들고,
+특성별로 극단값을 자른 뒤 중앙값·MAD로 표준화해 (종목 × 특성) 배열 하나로 DataCache에 저장합니다.
+조회는 이 배열 전체와의 가중 유클리드 거리를 한 번에 계산(수천 종목 × 7개 특성, 1ms 안팎)해 가까운 순으로 답합니다.
+
+갱신은 증분으로 합니다. 재무 특성은 표에서 전 종목을 한 번에 계산하고(벡터 연산), 시세 조회가 필요한
+변동성만 새 분기 실적이 들어온 종목·새로 상장된 종목·VOLATILITY_MAX_AGE가 지난 종목에 대해 다시 계산합니다.
+밸류에이션 갱신 직후 실행합니다. (stockbot-valuation.service의 ExecStartPost)
+
+사용 예)
+    python similarity.py              # 증분 갱신
+    python similarity.py --full       # 모든 종목 변동성을 다시 계산
+"""
+import sys
+import time
+import argparse
+import warnings
+import datetime
+import threading
+
+import numpy as np
+import pandas as pd
+
+import metrics
+from arrow_store import ArrowStore
+from data_cache import DataCache
+from valuation import TABLE_KEY, FUNDAMENTALS_KEY
+
+# 캐시 키
+INDEX_KEY     = "similarity:index"
+FEATURES_KEY  = "similarity:features"
+REFRESHED_KEY = "similarity:refreshed_at"
+
+# 주가 변동성: 최근 VOLATILITY_DAYS 거래일 일간 로그수익률의 연율화 표준편차
+VOLATILITY_DAYS = 120
+VOLATILITY_MAX_AGE = 7 * 24 * 3600
+
+# 특성과 거리 가중치 (규모·수익성을 조금 더 무겁게)
+FEATURE_WEIGHTS = {
+    "opm": 1.5,
+    "npm": 1.0,
+    "revenue_growth": 1.0,
+    "log_revenue": 1.5,
+    "log_marcap": 1.0,
+    "debt_ratio": 0.5,
+    "volatility": 1.0,
+}
+FEATURE_LABELS = {
+    "opm": "영업이익률", "npm": "순이익률", "revenue_growth": "매출 증가율", "log_revenue": "매출 규모",
+    "log_marcap": "시가총액", "debt_ratio": "부채비율", "volatility": "주가 변동성",
+}
+
+# 표준화 전에 특성별로 자르는 분위 (극단값 한두 개가 척도를 망치지 않도록)
+CLIP_QUANTILES = (0.01, 0.99)
+
+DEFAULT_K = 5
+
+
+# ──────────────────────────────────────────────
+# 특성 계산 (벡터 연산)
+# ──────────────────────────────────────────────
+def volatility(matrix, days: int = VOLATILITY_DAYS):
+    """PriceMatrix 종목별 최근 days 거래일 연율화 변동성 Series (거래일이 20일 미만이면 NaN)"""
+    if not len(matrix.tickers):
+        return pd.Series(dtype="float64")
+    close = matrix.close[-(days + 1):]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = np.diff(np.log(np.where(close > 0, close, np.nan)), axis=0)
+    valid = (~np.isnan(returns)).sum(axis=0)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # 거래일이 없는 종목
+        std = np.nanstd(returns, axis=0, ddof=1) * np.sqrt(252)
+    return pd.Series(np.where(valid >= 20, std, np.nan), index=list(matrix.tickers))
+
+
+def _safe_ratio(numerator, denominator):
+    numerator = np.asarray(numerator, dtype="float64")
+    denominator = np.asarray(denominator, dtype="float64")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator > 0, numerator / denominator, np.nan)
+
+
+def build_features(table, fundamentals, volatilities=None):
+    """
+    valuation 표(종목코드 인덱스)와 기업별 재무(stock_code 컬럼)로 종목 × 특성 원값 표를 만듭니다.
+    volatilities(종목코드 → 변동성)가 없으면 volatility는 NaN.
+    """
+    fundamentals = fundamentals.reset_index(drop=True).drop_duplicates("stock_code").set_index("stock_code")
+    df = table[["marcap"]].join(fundamentals, how="inner")
+    revenue = df["ttm_revenue"].to_numpy(dtype="float64")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        features = pd.DataFrame({
+            "opm": _safe_ratio(df["ttm_op_income"], revenue),
+            "npm": _safe_ratio(df["ttm_net_income"], revenue),
+            "revenue_growth": _safe_ratio(revenue, df.get("prev_ttm_revenue", np.nan)) - 1,
+            "log_revenue": np.log10(np.where(revenue > 0, revenue, np.nan)),
+            "log_marcap": np.log10(np.where(df["marcap"] > 0, df["marcap"].to_numpy(dtype="float64"), np.nan)),
+            "debt_ratio": _safe_ratio(df["liabilities"], df["equity"]),
+        }, index=df.index)
+    features["volatility"] = volatilities.reindex(df.index).to_numpy() if volatilities is not None else np.nan
+    features.index.name = "stock_code"
+    return features[list(FEATURE_WEIGHTS)]
+
+
+def normalize(features):
+    """
+    특성별로 CLIP_QUANTILES 밖을 자르고 (x - 중앙값) / (1.4826 × MAD)로 표준화한 뒤 가중치를 곱한 float32 배열.
+    값이 없는 특성은 0(= 시장 중앙값)으로 둡니다.
+    """
+    values = features.to_numpy(dtype="float64")
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # 전부 NaN인 특성
+        low, high = np.nanquantile(values, CLIP_QUANTILES, axis=0)
+        values = np.clip(values, low, high)
+        median = np.nanmedian(values, axis=0)
+        scale = 1.4826 * np.nanmedian(np.abs(values - median), axis=0)
+        std = np.nanstd(values, axis=0)
+    scale = np.where(scale > 0, scale, np.where(std > 0, std, 1.0))  # 값이 한쪽에 몰린 특성은 표준편차로
+    z = np.nan_to_num((values - median) / scale, nan=0.0)
+    return (z * np.array([FEATURE_WEIGHTS[c] for c in features.columns])).astype("float32")
+
+
+def nearest(vectors, query: int, k: int = DEFAULT_K, candidates=None):
+    """vectors[query]와 가까운 순으로 (행 번호 배열, 거리 배열). 자기 자신은 제외, candidates(bool 배열)로 후보 제한."""
+    distances = np.sqrt(((vectors - vectors[query]) ** 2).sum(axis=1))
+    distances[query] = np.inf
+    if candidates is not None:
+        distances[~candidates] = np.inf
+    k = min(k, int(np.isfinite(distances).sum()))
+    if k <= 0:
+        return np.array([], dtype=int), np.array([])
+    rows = np.argpartition(distances, k - 1)[:k]
+    rows = rows[np.argsort(distances[rows])]
+    return rows, distances[rows]
+
+
+# ──────────────────────────────────────────────
+# 색인 (갱신 · 메모리 조회)
+# ──────────────────────────────────────────────
+class SimilarityIndex:
+    """
+    refresh()는 밸류에이션 갱신 뒤(장 마감 후)에서, similar()는 봇·대시보드에서 씁니다.
+    조회 쪽은 저장된 색인을 메모리에 올려 두고, reload_interval초마다 새 버전이 있는지만 확인합니다.
+    """
+
+    def __init__(self, cache=None, reload_interval: float = 300, shared=None):
+        self.cache = cache if cache is not None else DataCache()
+        self.shared = shared if shared is not None else ArrowStore()
+        self.reload_interval = reload_interval
+        self._index = None
+        self._positions = None      # 종목코드 → 행 번호
+        self._loaded_at = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    # ── 갱신 ──
+    def refresh(self, full: bool = False, workers: int = 8, price_loader=None) -> dict:
+        """
+        저장된 밸류에이션 표로 특성을 다시 계산하고, 변동성은 바뀐 종목만 시세를 받아 갱신합니다.
+        price_loader(tickers, start) → PriceMatrix (기본: 공유 시세 배열에 있는 종목은 그대로, 나머지는 price_store.load_price_matrix)
+        반환값: {"companies": 색인 종목 수, "volatility_updated": 변동성을 다시 계산한 종목 수}
+        """
+        table = self.cache.get(TABLE_KEY)
+        fundamentals = self.cache.get(FUNDAMENTALS_KEY)
+        if table is None or fundamentals is None:
+            print("밸류에이션 표가 없습니다. valuation.py를 먼저 실행하세요.")
+            return {"companies": 0, "volatility_updated": 0}
+
+        started = time.time()
+        stored = None if full else self.cache.get(FEATURES_KEY)
+        periods = table["period"].astype(str)
+        if stored is None:
+            stored = pd.DataFrame({"volatility": pd.Series(dtype="float64"), "period": pd.Series(dtype="object"),
+                                   "volatility_at": pd.Series(dtype="float64")})
+        known = stored.reindex(table.index)
+        targets = table.index[
+            known["volatility_at"].isna()
+            | (known["period"] != periods)                                # 새 분기 실적
+            | (known["volatility_at"] < started - VOLATILITY_MAX_AGE)
+        ]
+
+        if len(targets):
+            fresh = self._volatility(list(targets), price_loader, workers, started).reindex(targets)
+            updated = pd.DataFrame({"volatility": fresh.to_numpy(), "period": periods.reindex(targets).to_numpy(),
+                                    "volatility_at": started}, index=targets)
+            stored = pd.concat([stored.drop(targets, errors="ignore"), updated])
+        stored = stored[stored.index.isin(table.index)]
+
+        features = build_features(table, fundamentals, stored["volatility"])
+        index = {
+            "tickers": list(features.index),
+            "vectors": normalize(features),
+            "features": features,
+            "names": table["corp_name"].reindex(features.index).astype(str).to_numpy(),
+            "sectors": table["sector"].reindex(features.index).astype(str).to_numpy(),
+        }
+        self.cache.set(FEATURES_KEY, stored)
+        self.cache.set(INDEX_KEY, index)
+        self.cache.set(REFRESHED_KEY, started)
+        self._install(index, started)
+
+        metrics.registry.inc("similarity_refresh_total", result="ok")
+        return {"companies": len(features), "volatility_updated": len(targets)}
+
+    def _volatility(self, tickers, price_loader, workers, now):
+        """종목별 변동성. 기본 로더는 signal_scanner가 게시한 공유 시세 배열(최근 것)을 먼저 씁니다."""
+        start = (datetime.date.today() - datetime.timedelta(days=VOLATILITY_DAYS * 7 // 5 + 30)).isoformat()
+        if price_loader is not None:
+            return volatility(price_loader(tickers, start))
+
+        from price_store import PriceMatrix, SHARED_PRICES, load_price_matrix
+        result = pd.Series(dtype="float64")
+        shared = self.shared.read_matrix(SHARED_PRICES)
+        if shared is not None and len(shared.dates) and \
+                (now - pd.Timestamp(shared.dates[-1]).timestamp()) < VOLATILITY_MAX_AGE:
+            columns = {t: i for i, t in enumerate(shared.tickers)}
+            covered = [t for t in tickers if t in columns]
+            if covered:
+                cols = [columns[t] for t in covered]
+                result = volatility(PriceMatrix(shared.dates, covered, shared.close[:, cols], None))
+            tickers = [t for t in tickers if t not in columns]
+        if tickers:
+            loaded = load_price_matrix(tickers, start, cache=self.cache, workers=workers)
+            result = pd.concat([result, volatility(loaded)])
+        return result
+
+    # ── 조회 ──
+    def _install(self, index, refreshed_at):
+        positions = {ticker: i for i, ticker in enumerate(index["tickers"])}
+        with self._lock:
+            self._index, self._positions, self._loaded_at = index, positions, refreshed_at
+
+    def load(self) -> bool:
+        """캐시에 더 새로운 색인이 있으면 메모리에 올립니다. 색인이 준비되어 있으면 True."""
+        now = time.monotonic()
+        if self._index is not None and now - self._checked < self.reload_interval:
+            return True
+        self._checked = now
+        refreshed_at = self.cache.get(REFRESHED_KEY)
+        if refreshed_at and refreshed_at != self._loaded_at:
+            index = self.cache.get(INDEX_KEY)
+            if index is not None:
+                self._install(index, refreshed_at)
+        return self._index is not None
+
+    @property
+    def refreshed_at(self):
+        return self._loaded_at
+
+    def similar(self, stock_code: str, k: int = DEFAULT_K, same_sector: bool = False):
+        """
+        특성이 가까운 종목 목록(가까운 순). 각 항목: stock_code, corp_name, sector, distance, 특성 원값.
+        색인에 없는 종목이면 None.
+        """
+        if not stock_code or not self.load() or stock_code not in self._positions:
+            return None
+        index, row = self._index, self._positions[stock_code]
+        candidates = index["sectors"] == index["sectors"][row] if same_sector else None
+        with metrics.timer("similarity_query"):
+            rows, distances = nearest(index["vectors"], row, k, candidates)
+        features = index["features"]
+        return [{
+            "stock_code": index["tickers"][i],
+            "corp_name": index["names"][i],
+            "sector": index["sectors"][i],
+            "distance": float(d),
+            **features.iloc[i].to_dict(),
+        } for i, d in zip(rows, distances)]
+
+    def profile(self, stock_code: str):
+        """종목 한 곳의 특성 원값(dict, 업종 포함). 색인에 없으면 None."""
+        if not stock_code or not self.load() or stock_code not in self._positions:
+            return None
+        row = self._positions[stock_code]
+        return {"stock_code": stock_code, "corp_name": self._index["names"][row], "sector": self._index["sectors"][row],
+                **self._index["features"].iloc[row].to_dict()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="유사 기업 색인을 갱신합니다. (밸류에이션 갱신 뒤 실행)")
+    parser.add_argument("--full", action="store_true", help="모든 종목 변동성을 다시 계산")
+    parser.add_argument("--workers", type=int, default=8, help="시세 동시 조회 스레드 수")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    result = SimilarityIndex(DataCache()).refresh(full=args.full, workers=args.workers)
+    print(f"=== 완료: {result} / {time.perf_counter() - started:.1f}초 ===")
+    return 0 if result["companies"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
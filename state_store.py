@@ -0,0 +1,368 @@
+"""
+state_store.py
+봇 사용자별 상태 저장소 (대화 히스토리, 관심종목, 알림 구독, 요청 한도 카운터, 워커 간 Update 처리 순번)
+
+상태를 프로세스 메모리 밖(SQLite WAL)에 두어, 재시작해도 유지되고
+같은 호스트의 여러 봇 워커 프로세스가 하나의 상태를 공유할 수 있게 합니다.
+다른 백엔드(Redis 등)는 StateStore(추상 클래스)를 상속해 모든 추상 메서드를 구현하면 됩니다.
+
+환경변수
+    STATE_BACKEND   sqlite(기본) | memory
+    STATE_DB_PATH   SQLite 파일 경로 (기본 bot_state.db)
+"""
+import os
+import time
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from contextlib import closing
+
+DEFAULT_STATE_PATH = os.getenv("STATE_DB_PATH", "bot_state.db")
+
+# 사용자당 보관할 최대 대화 메시지 수 (사용자·모델 메시지를 각각 1개로 셈)
+MAX_HISTORY = 20
+
+
+class StateStore(ABC):
+    """상태 저장소 인터페이스. 히스토리 항목은 {"role": "user"|"model", "text": str} 사전입니다."""
+
+    # ── 대화 히스토리 ──
+    @abstractmethod
+    def get_history(self, user_id: int) -> list:
+        ...
+
+    @abstractmethod
+    def append_history(self, user_id: int, entries: list, max_items: int = MAX_HISTORY):
+        """entries를 덧붙이고 최근 max_items개만 남깁니다."""
+        ...
+
+    @abstractmethod
+    def clear_history(self, user_id: int):
+        ...
+
+    # ── 관심종목 ──
+    @abstractmethod
+    def add_watch(self, user_id: int, corp_code: str, corp_name: str) -> bool:
+        """추가했으면 True, 이미 있으면 False"""
+        ...
+
+    @abstractmethod
+    def remove_watch(self, user_id: int, corp_code: str) -> bool:
+        """삭제했으면 True, 없었으면 False"""
+        ...
+
+    @abstractmethod
+    def list_watch(self, user_id: int) -> list:
+        """[{"corp_code", "corp_name", "added_at"}] (추가한 순서)"""
+        ...
+
+    # ── 알림 구독 ──
+    @abstractmethod
+    def subscribe(self, user_id: int, topic: str) -> bool:
+        """구독했으면 True, 이미 구독 중이면 False"""
+        ...
+
+    @abstractmethod
+    def unsubscribe(self, user_id: int, topic: str) -> bool:
+        """해지했으면 True, 구독 중이 아니었으면 False"""
+        ...
+
+    @abstractmethod
+    def list_subscribers(self, topic: str) -> list:
+        """topic을 구독한 사용자 ID 목록 (구독한 순서)"""
+        ...
+
+    # ── 요청 한도 ──
+    @abstractmethod
+    def hit(self, key: str, limit: int, window: float) -> bool:
+        """
+        key의 현재 윈도(window초 고정 구간) 카운터를 1 올리고, limit 이하이면 True를 반환합니다.
+        한도를 넘은 요청은 카운트하지 않습니다.
+        """
+        ...
+
+    # ── 워커 간 Update 순서 ──
+    @abstractmethod
+    def enqueue_turn(self, key: str, update_id: int):
+        """key(사용자·채팅)의 처리 대기열에 update_id를 올립니다. (도착 즉시, 다른 워커에도 보이도록)"""
+        ...
+
+    @abstractmethod
+    def check_turn(self, key: str, update_id: int, ttl: float) -> bool:
+        """
+        update_id가 key의 대기열에서 가장 앞(가장 작은 update_id)이면 True를 반환합니다.
+        호출할 때마다 이 항목의 최근 확인 시각을 갱신하고, ttl초 넘게 갱신되지 않은 항목
+        (처리 중 죽은 워커의 몫)은 지웁니다.
+        """
+        ...
+
+    @abstractmethod
+    def release_turn(self, key: str, update_id: int):
+        """처리를 마친 update_id를 대기열에서 뺍니다."""
+        ...
+
+
+# ──────────────────────────────────────────────
+# SQLite (기본)
+# ──────────────────────────────────────────────
+class SQLiteStateStore(StateStore):
+    def __init__(self, db_path: str = DEFAULT_STATE_PATH):
+        self.db_path = db_path
+        with closing(self._connect()) as conn, conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS chat_history (
+                    id      INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER NOT NULL,
+                    role    TEXT NOT NULL,
+                    text    TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_chat_history_user ON chat_history (user_id, id);
+
+                CREATE TABLE IF NOT EXISTS watchlist (
+                    user_id   INTEGER NOT NULL,
+                    corp_code TEXT NOT NULL,
+                    corp_name TEXT NOT NULL,
+                    added_at  REAL NOT NULL,
+                    PRIMARY KEY (user_id, corp_code)
+                );
+
+                CREATE TABLE IF NOT EXISTS subscriptions (
+                    user_id       INTEGER NOT NULL,
+                    topic         TEXT NOT NULL,
+                    subscribed_at REAL NOT NULL,
+                    PRIMARY KEY (user_id, topic)
+                );
+
+                CREATE TABLE IF NOT EXISTS rate_limit (
+                    key          TEXT PRIMARY KEY,
+                    window_start REAL NOT NULL,
+                    count        INTEGER NOT NULL
+                );
+
+                CREATE TABLE IF NOT EXISTS update_turns (
+                    key       TEXT NOT NULL,
+                    update_id INTEGER NOT NULL,
+                    seen_at   REAL NOT NULL,
+                    PRIMARY KEY (key, update_id)
+                );
+                """
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # isolation_level=None: 트랜잭션을 직접 BEGIN IMMEDIATE로 열어 프로세스 간 갱신 경합을 막음
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def get_history(self, user_id: int) -> list:
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT role, text FROM chat_history WHERE user_id = ? ORDER BY id", (user_id,)
+            ).fetchall()
+        return [{"role": r["role"], "text": r["text"]} for r in rows]
+
+    def append_history(self, user_id: int, entries: list, max_items: int = MAX_HISTORY):
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                "INSERT INTO chat_history (user_id, role, text) VALUES (?, ?, ?)",
+                [(user_id, e["role"], e["text"]) for e in entries],
+            )
+            conn.execute(
+                """
+                DELETE FROM chat_history WHERE user_id = ? AND id NOT IN (
+                    SELECT id FROM chat_history WHERE user_id = ? ORDER BY id DESC LIMIT ?
+                )
+                """,
+                (user_id, user_id, max_items),
+            )
+            conn.execute("COMMIT")
+
+    def clear_history(self, user_id: int):
+        with closing(self._connect()) as conn:
+            conn.execute("DELETE FROM chat_history WHERE user_id = ?", (user_id,))
+
+    def add_watch(self, user_id: int, corp_code: str, corp_name: str) -> bool:
+        with closing(self._connect()) as conn:
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO watchlist (user_id, corp_code, corp_name, added_at) VALUES (?, ?, ?, ?)",
+                (user_id, corp_code, corp_name, time.time()),
+            )
+        return cur.rowcount > 0
+
+    def remove_watch(self, user_id: int, corp_code: str) -> bool:
+        with closing(self._connect()) as conn:
+            cur = conn.execute(
+                "DELETE FROM watchlist WHERE user_id = ? AND corp_code = ?", (user_id, corp_code)
+            )
+        return cur.rowcount > 0
+
+    def list_watch(self, user_id: int) -> list:
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT corp_code, corp_name, added_at FROM watchlist WHERE user_id = ? ORDER BY added_at",
+                (user_id,),
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def subscribe(self, user_id: int, topic: str) -> bool:
+        with closing(self._connect()) as conn:
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO subscriptions (user_id, topic, subscribed_at) VALUES (?, ?, ?)",
+                (user_id, topic, time.time()),
+            )
+        return cur.rowcount > 0
+
+    def unsubscribe(self, user_id: int, topic: str) -> bool:
+        with closing(self._connect()) as conn:
+            cur = conn.execute("DELETE FROM subscriptions WHERE user_id = ? AND topic = ?", (user_id, topic))
+        return cur.rowcount > 0
+
+    def list_subscribers(self, topic: str) -> list:
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT user_id FROM subscriptions WHERE topic = ? ORDER BY subscribed_at", (topic,)
+            ).fetchall()
+        return [r["user_id"] for r in rows]
+
+    def hit(self, key: str, limit: int, window: float) -> bool:
+        now = time.time()
+        window_start = now - now % window
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT window_start, count FROM rate_limit WHERE key = ?", (key,)).fetchone()
+            count = row["count"] if row and row["window_start"] == window_start else 0
+            allowed = count < limit
+            if allowed:
+                conn.execute(
+                    "INSERT OR REPLACE INTO rate_limit (key, window_start, count) VALUES (?, ?, ?)",
+                    (key, window_start, count + 1),
+                )
+            conn.execute("COMMIT")
+        return allowed
+
+    def enqueue_turn(self, key: str, update_id: int):
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO update_turns (key, update_id, seen_at) VALUES (?, ?, ?)",
+                (key, update_id, time.time()),
+            )
+
+    def check_turn(self, key: str, update_id: int, ttl: float) -> bool:
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM update_turns WHERE key = ? AND seen_at < ?", (key, now - ttl))
+            conn.execute(
+                "INSERT OR REPLACE INTO update_turns (key, update_id, seen_at) VALUES (?, ?, ?)",
+                (key, update_id, now),
+            )
+            head = conn.execute("SELECT MIN(update_id) FROM update_turns WHERE key = ?", (key,)).fetchone()[0]
+            conn.execute("COMMIT")
+        return head == update_id
+
+    def release_turn(self, key: str, update_id: int):
+        with closing(self._connect()) as conn:
+            conn.execute("DELETE FROM update_turns WHERE key = ? AND update_id = ?", (key, update_id))
+
+
+# ──────────────────────────────────────────────
+# 메모리 (단일 프로세스, 테스트·벤치마크용)
+# ──────────────────────────────────────────────
+class MemoryStateStore(StateStore):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histories: dict[int, list] = {}
+        self._watch: dict[int, dict] = {}
+        self._subscribers: dict[str, dict] = {}
+        self._counters: dict[str, tuple] = {}
+        self._turns: dict[str, dict] = {}
+
+    def get_history(self, user_id: int) -> list:
+        with self._lock:
+            return [dict(e) for e in self._histories.get(user_id, [])]
+
+    def append_history(self, user_id: int, entries: list, max_items: int = MAX_HISTORY):
+        with self._lock:
+            history = self._histories.get(user_id, []) + [dict(e) for e in entries]
+            self._histories[user_id] = history[-max_items:]
+
+    def clear_history(self, user_id: int):
+        with self._lock:
+            self._histories.pop(user_id, None)
+
+    def add_watch(self, user_id: int, corp_code: str, corp_name: str) -> bool:
+        with self._lock:
+            items = self._watch.setdefault(user_id, {})
+            if corp_code in items:
+                return False
+            items[corp_code] = {"corp_code": corp_code, "corp_name": corp_name, "added_at": time.time()}
+            return True
+
+    def remove_watch(self, user_id: int, corp_code: str) -> bool:
+        with self._lock:
+            return self._watch.get(user_id, {}).pop(corp_code, None) is not None
+
+    def list_watch(self, user_id: int) -> list:
+        with self._lock:
+            return list(self._watch.get(user_id, {}).values())
+
+    def subscribe(self, user_id: int, topic: str) -> bool:
+        with self._lock:
+            users = self._subscribers.setdefault(topic, {})
+            if user_id in users:
+                return False
+            users[user_id] = time.time()
+            return True
+
+    def unsubscribe(self, user_id: int, topic: str) -> bool:
+        with self._lock:
+            return self._subscribers.get(topic, {}).pop(user_id, None) is not None
+
+    def list_subscribers(self, topic: str) -> list:
+        with self._lock:
+            return list(self._subscribers.get(topic, {}))
+
+    def hit(self, key: str, limit: int, window: float) -> bool:
+        now = time.time()
+        window_start = now - now % window
+        with self._lock:
+            start, count = self._counters.get(key, (window_start, 0))
+            if start != window_start:
+                count = 0
+            if count >= limit:
+                return False
+            self._counters[key] = (window_start, count + 1)
+            return True
+
+    def enqueue_turn(self, key: str, update_id: int):
+        with self._lock:
+            self._turns.setdefault(key, {})[update_id] = time.time()
+
+    def check_turn(self, key: str, update_id: int, ttl: float) -> bool:
+        now = time.time()
+        with self._lock:
+            turns = {uid: seen for uid, seen in self._turns.get(key, {}).items() if seen >= now - ttl}
+            turns[update_id] = now
+            self._turns[key] = turns
+            return min(turns) == update_id
+
+    def release_turn(self, key: str, update_id: int):
+        with self._lock:
+            turns = self._turns.get(key, {})
+            turns.pop(update_id, None)
+            if not turns:
+                self._turns.pop(key, None)
+
+
+def create_state_store(backend: str = None) -> StateStore:
+    """STATE_BACKEND 환경변수(또는 backend 인자)에 맞는 저장소를 만듭니다."""
+    backend = (backend or os.getenv("STATE_BACKEND", "sqlite")).lower()
+    if backend == "sqlite":
+        return SQLiteStateStore()
+    if backend == "memory":
+        return MemoryStateStore()
+    raise ValueError(f"지원하지 않는 STATE_BACKEND입니다: {backend}")
@@ -0,0 +1,174 @@
+"""
+task_queue.py
+무거운 봇 명령(/stock 실시간 분석, /chart)의 작업 큐
+
+명령 핸들러가 파이프라인 전체를 직접 실행하면, 같은 요청을 연달아 보내거나 여러 사용자가 한꺼번에 몰릴 때
+DART·Gemini 호출이 그대로 겹칩니다. 핸들러는 작업을 큐에 넣고 바로 돌아가고, 작업은 아래 규칙으로 실행됩니다.
+  - 전체 동시 실행 작업은 workers개까지 (나머지는 들어온 순서대로 대기 — 순간 부하를 평탄하게)
+  - 한 사용자의 동시 실행 작업은 per_user개까지, 대기 포함 max_user_jobs개를 넘으면 거절(QueueFull)
+  - 같은 키(예: ("stock", 기업코드))의 작업이 대기·실행 중이면 새로 만들지 않고 구독자로 합침
+    (DART·Gemini는 한 번만 호출하고 결과는 모든 구독자에게 전달)
+  - 작업이 단계를 넘길 때마다 구독자에게 알려, 봇은 진행 메시지 하나를 고쳐 씀
+
+이벤트 루프 안에서만 쓰므로 잠금이 필요 없습니다. (작업 안의 동기 호출은 asyncio.to_thread로)
+봇 프로세스가 재시작되면 대기 중이던 작업은 사라집니다. (사용자가 다시 요청)
+"""
+import time
+import asyncio
+import logging
+from collections import deque
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class QueueFull(Exception):
+    """사용자의 대기·실행 중 작업이 max_user_jobs개에 이름"""
+
+
+class Job:
+    """
+    key:      합치기 기준 (첫 원소는 계측 라벨로 쓰는 작업 종류, 예: ("stock", "00126380"))
+    user_id:  작업을 만든 사용자 (합쳐진 구독자는 한도에 포함하지 않음 — 추가 호출이 없으므로)
+    work:     async work(job) → 결과. 단계를 넘길 때 await job.advance(단계 번호)
+    stages:   진행 단계 이름 목록 (stage는 현재 단계 번호)
+    info:     작업이 채우는 중간 결과 (예: 연간 실적 — 구독자가 진행 메시지에 먼저 보여줌)
+    watchers: {구독자 키: async notify(job)} — 상태·단계가 바뀔 때마다 호출
+    """
+
+    def __init__(self, key, user_id, work, stages=()):
+        self.key = key
+        self.kind = key[0] if isinstance(key, tuple) else str(key)
+        self.user_id = user_id
+        self.work = work
+        self.stages = tuple(stages)
+        self.stage = 0
+        self.state = QUEUED
+        self.info = {}
+        self.watchers = {}
+        self.result = None
+        self.error = None
+        self.created = time.monotonic()
+        self.started = None
+
+    async def advance(self, stage: int):
+        """다음 단계로 넘어가고 구독자에게 알립니다."""
+        self.stage = stage
+        await self.notify()
+
+    async def notify(self):
+        """모든 구독자에게 현재 상태를 알립니다. (한 구독자의 전송 실패가 다른 구독자나 작업을 막지 않음)"""
+        results = await asyncio.gather(*(notify(self) for notify in list(self.watchers.values())),
+                                       return_exceptions=True)
+        for error in results:
+            if isinstance(error, Exception):
+                logger.warning("작업 진행 알림 실패 (%s): %s", self.kind, error)
+
+
+class TaskQueue:
+    """
+    workers: 전체 동시 실행 작업 수
+    per_user: 사용자별 동시 실행 작업 수 (차례가 와도 한도면 뒤 작업을 먼저 실행)
+    max_user_jobs: 사용자별 대기 + 실행 작업 수 한도
+    """
+
+    def __init__(self, workers: int = 4, per_user: int = 1, max_user_jobs: int = 3):
+        self.workers = workers
+        self.per_user = per_user
+        self.max_user_jobs = max_user_jobs
+        self._pending = deque()
+        self._jobs = {}             # 키 → 대기·실행 중 Job
+        self._active = 0
+        self._user_active = {}      # 사용자 → 실행 중 작업 수
+        self._tasks = set()
+
+    def get(self, key):
+        """대기·실행 중인 같은 키의 작업 (없으면 None)"""
+        return self._jobs.get(key)
+
+    def position(self, job):
+        """대기 순번 (0이면 다음 차례, 실행 중이거나 끝났으면 None)"""
+        try:
+            return self._pending.index(job)
+        except ValueError:
+            return None
+
+    def user_jobs(self, user_id) -> int:
+        return sum(job.user_id == user_id for job in self._jobs.values())
+
+    def accepts(self, user_id, key) -> bool:
+        """submit이 거절하지 않을지 (같은 키의 작업이 있으면 합쳐지므로 항상 True)"""
+        return key in self._jobs or self.user_jobs(user_id) < self.max_user_jobs
+
+    def submit(self, key, user_id, work, watcher_key, notify, stages=()) -> Job:
+        """
+        작업을 넣거나 같은 키의 작업에 구독자로 합치고 그 Job을 반환합니다.
+        같은 구독자가 이미 구독 중이면 그대로 둡니다. 사용자 한도를 넘으면 QueueFull.
+        """
+        job = self._jobs.get(key)
+        if job is not None:
+            if watcher_key not in job.watchers:
+                job.watchers[watcher_key] = notify
+                metrics.registry.inc("task_queue_jobs", kind=job.kind, outcome="merged")
+            return job
+
+        if self.user_jobs(user_id) >= self.max_user_jobs:
+            metrics.registry.inc("task_queue_jobs", kind=key[0] if isinstance(key, tuple) else str(key),
+                                 outcome="rejected")
+            raise QueueFull(f"{user_id}: {self.max_user_jobs}")
+
+        job = Job(key, user_id, work, stages)
+        job.watchers[watcher_key] = notify
+        self._jobs[key] = job
+        self._pending.append(job)
+        metrics.registry.inc("task_queue_jobs", kind=job.kind, outcome="submitted")
+        self._pump()
+        return job
+
+    def _pump(self):
+        """빈 자리가 있으면 사용자 한도에 걸리지 않는 가장 오래된 작업부터 시작합니다."""
+        for job in list(self._pending):
+            if self._active >= self.workers:
+                break
+            if self._user_active.get(job.user_id, 0) >= self.per_user:
+                continue
+            self._pending.remove(job)
+            self._active += 1
+            self._user_active[job.user_id] = self._user_active.get(job.user_id, 0) + 1
+            job.state = RUNNING
+            task = asyncio.get_running_loop().create_task(self._run(job))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, job):
+        job.started = time.monotonic()
+        metrics.registry.observe("task_queue_wait_seconds", job.started - job.created, kind=job.kind)
+        try:
+            await job.notify()
+            job.result = await job.work(job)
+            job.state = DONE
+        except Exception as e:
+            logger.error("작업 실패 (%s): %s", job.key, e, exc_info=e)
+            job.error = e
+            job.state = FAILED
+        finally:
+            del self._jobs[job.key]
+            self._active -= 1
+            self._user_active[job.user_id] -= 1
+            if not self._user_active[job.user_id]:
+                del self._user_active[job.user_id]
+            metrics.registry.inc("task_queue_jobs", kind=job.kind, outcome=job.state)
+            metrics.registry.observe("task_queue_run_seconds", time.monotonic() - job.started, kind=job.kind)
+            self._pump()
+        await job.notify()
+
+    def stats(self) -> dict:
+        return {"pending": len(self._pending), "running": self._active}
+
+    async def join(self):
+        """대기·실행 중인 작업이 모두 끝날 때까지 기다립니다. (종료·테스트용)"""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
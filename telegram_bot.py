@@ -3,8 +3,10 @@ telegram_bot.py
 Gemini AI + DART 연동 텔레그램 주식 분석 챗봇
 """
 import os
+import asyncio
 import logging
 import datetime
+import threading
 from dotenv import load_dotenv
 
 from telegram import Update
@@ -17,8 +19,13 @@ from telegram.ext import (
 )
 from telegram.constants import ParseMode
 
-from gemini_handler import GeminiHandler
-from dart_handler import DartHandler
+import metrics
+from disclosure_index import DisclosureIndex
+from data_cache import DataCache
+from update_processor import PerUserUpdateProcessor
+from state_store import create_state_store
+from report_store import ReportStore
+from task_queue import TaskQueue, QueueFull, DONE, FAILED
 
 # ──────────────────────────────────────────────
 # 설정
@@ -35,12 +42,127 @@ TELEGRAM_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 DART_API_KEY   = os.getenv("DART_API_KEY")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
-# 핸들러 초기화
-gemini  = GeminiHandler(api_key=GEMINI_API_KEY)
-dart    = DartHandler(api_key=DART_API_KEY)
+# 사용자별 요청 한도 ("횟수/초", /stock·/chart·일반 대화에 적용)
+USER_RATE_LIMIT = os.getenv("USER_RATE_LIMIT", "20/60")
+
+# 미리 생성된 /stock 리포트를 그대로 보여줄 최대 경과 시간 (시간, 야간 작업 주기보다 길게)
+REPORT_MAX_AGE = float(os.getenv("REPORT_MAX_AGE_HOURS", "36")) * 3600
+
+# 기술적 신호 알림 구독 주제 (signal_scanner.SIGNAL_TOPIC과 같은 값 — 봇 시작 시 numpy를 불러오지 않도록 복사)
+SIGNAL_TOPIC = "signals"
+
+# /value 응답에서 업종 중앙값과 비교하는 지표 (sectors.ROLLUP_METRICS 중)
+SECTOR_COMPARE = ("opm", "revenue_growth", "per", "pbr")
+
+# 동시에 처리할 최대 Update 수 (같은 사용자의 Update는 항상 순서대로 처리)
+BOT_CONCURRENCY = int(os.getenv("BOT_CONCURRENCY", "8"))
+
+# 여러 워커 프로세스가 웹훅을 나눠 받을 때(stockbot@.service) 1 — 같은 사용자의 Update 순서를
+# 상태 저장소(STATE_DB_PATH)의 공유 대기열로 워커 간에도 맞춤 (단일 프로세스면 필요 없음)
+BOT_SHARED_ORDERING = os.getenv("BOT_SHARED_ORDERING", "0") == "1"
+
+# 무거운 명령(/stock 실시간 분석, /chart) 작업 큐 — 전체 동시 실행 수, 사용자별 동시 실행 수, 사용자별 대기 포함 한도
+TASK_WORKERS          = int(os.getenv("TASK_WORKERS", "4"))
+TASK_USER_CONCURRENCY = int(os.getenv("TASK_USER_CONCURRENCY", "1"))
+TASK_USER_MAX_JOBS    = int(os.getenv("TASK_USER_MAX_JOBS", "3"))
+
+# 작업 진행 메시지에 표시하는 단계
+STOCK_STAGES = ("DART 연간 실적 조회", "분기 추이·최근 공시 정리", "Gemini AI 리포트 생성")
+CHART_STAGES = ("DART 분기 실적 조회", "차트 그리기")
+
+# 웹훅 모드 — WEBHOOK_URL이 있으면 폴링 대신 로컬 HTTP 서버로 Update를 받음
+# (TLS는 앞단 리버스 프록시가 처리하고, 프록시가 WEBHOOK_LISTEN:WEBHOOK_PORT/WEBHOOK_PATH로 전달)
+WEBHOOK_URL    = os.getenv("WEBHOOK_URL")
+WEBHOOK_LISTEN = os.getenv("WEBHOOK_LISTEN", "127.0.0.1")
+WEBHOOK_PORT   = int(os.getenv("WEBHOOK_PORT", "8443"))
+WEBHOOK_PATH   = os.getenv("WEBHOOK_PATH", "telegram")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")
+
+# 가벼운 저장소는 바로 초기화 (DART 조회 결과와 분석 리포트는 로컬 캐시를, 사용자 상태는 상태 저장소를 공유)
+cache   = DataCache()
+state   = create_state_store()
+reports = ReportStore()
+disclosure_index = DisclosureIndex()
+tasks   = TaskQueue(TASK_WORKERS, TASK_USER_CONCURRENCY, TASK_USER_MAX_JOBS)
+
+# Gemini/DART 핸들러는 google-genai·OpenDartReader·pandas 로딩과 기업 코드 목록 다운로드가 필요해
+# 처음 쓸 때 만듭니다. (/start, /help는 기다리지 않음 — 봇 시작 직후 백그라운드에서 미리 생성)
+_gemini = None
+_dart   = None
+_handlers_lock = threading.Lock()
+
+# 전 종목 밸류에이션 표 (valuation.py, 장 마감 후 갱신 작업이 만든 표를 처음 /value 때 메모리에 올림)
+_valuation = None
+
+# 유사 기업 색인 (similarity.py, 처음 /similar 때 메모리에 올림)
+_similarity = None
+
+# ──────────────────────────────────────────────
+# 핸들러 지연 생성
+# ──────────────────────────────────────────────
+def get_gemini():
+    """GeminiHandler를 처음 호출할 때 만들어 반환합니다. (스레드 안전, 블로킹 — asyncio.to_thread로 호출)"""
+    global _gemini
+    if _gemini is None:
+        with _handlers_lock:
+            if _gemini is None:
+                from gemini_handler import GeminiHandler
+                _gemini = GeminiHandler(api_key=GEMINI_API_KEY, cache=cache, store=state)
+    return _gemini
+
+
+def get_dart():
+    """DartHandler를 처음 호출할 때 만들어 반환합니다. (스레드 안전, 블로킹 — asyncio.to_thread로 호출)"""
+    global _dart
+    if _dart is None:
+        with _handlers_lock:
+            if _dart is None:
+                from dart_handler import DartHandler
+                _dart = DartHandler(api_key=DART_API_KEY, cache=cache)
+    return _dart
+
+
+def get_valuation():
+    """ValuationEngine을 처음 호출할 때 만들어 반환합니다. (pandas 로딩 — asyncio.to_thread로 호출)"""
+    global _valuation
+    if _valuation is None:
+        with _handlers_lock:
+            if _valuation is None:
+                from valuation import ValuationEngine
+                _valuation = ValuationEngine(cache)
+    return _valuation
+
+
+def get_similarity():
+    """SimilarityIndex를 처음 호출할 때 만들어 반환합니다. (pandas 로딩 — asyncio.to_thread로 호출)"""
+    global _similarity
+    if _similarity is None:
+        with _handlers_lock:
+            if _similarity is None:
+                from similarity import SimilarityIndex
+                _similarity = SimilarityIndex(cache)
+    return _similarity
+
+
+def preload_handlers():
+    """
+    두 핸들러를 미리 만들고 밸류에이션 표·유사 기업 색인을 메모리에 올려 첫 요청의 대기 시간을 없앱니다.
+    (디스크 캐시 예열은 warmup.py — 서비스 시작 전 ExecStartPre에서 실행)
+    """
+    started = datetime.datetime.now()
+    try:
+        get_dart()
+        get_gemini()
+    except Exception as e:
+        logger.error("핸들러 미리 생성 실패 (첫 요청 시 다시 시도): %s", e)
+        return
+    try:
+        get_valuation().load()
+        get_similarity().load()
+    except Exception as e:
+        logger.error("밸류에이션 표 미리 읽기 실패 (첫 요청 시 다시 시도): %s", e)
+    logger.info("핸들러 준비 완료 (%.1fs)", (datetime.datetime.now() - started).total_seconds())
 
-# 연간 보고서 코드
-ANNUAL_REPRT_CODE = "11011"
 
 # ──────────────────────────────────────────────
 # 유틸 함수
@@ -51,6 +173,98 @@ def fmt_billion(val: float) -> str:
     return f"{val / 1e8:,.1f}억원"
 
 
+def format_summary(corp_name: str, year: int, rev: int, op: int, net: int, footer: str) -> str:
+    """/stock 기본 재무 정보 메시지"""
+    opm = f"{op / rev * 100:.1f}%" if rev else "N/A"
+    npm = f"{net / rev * 100:.1f}%" if rev else "N/A"
+    return (
+        f"📊 **{corp_name} {year}년 연간 실적**\n\n"
+        f"💰 매출액:     `{fmt_billion(rev)}`\n"
+        f"📈 영업이익:   `{fmt_billion(op)}` (영업이익률 {opm})\n"
+        f"💵 당기순이익: `{fmt_billion(net)}` (순이익률 {npm})\n\n"
+        f"{footer}"
+    )
+
+
+def fmt_multiple(value, rank, peers) -> str:
+    """배수와 업종 내 순위 (적자·자본잠식 등으로 값이 없으면 N/A)"""
+    if value != value:  # NaN
+        return "N/A"
+    return f"{value:,.1f}배 (업종 {int(rank)}/{peers}위)"
+
+
+def fmt_sector_metric(metric: str, value) -> str:
+    """업종 비교 값 (이익률·증가율은 %, 배수는 배, 값이 없으면 N/A)"""
+    if value != value:  # NaN
+        return "N/A"
+    if metric == "revenue_growth":
+        return f"{value * 100:+.1f}%"
+    if metric == "opm":
+        return f"{value * 100:.1f}%"
+    return f"{value:,.1f}배"
+
+
+def format_valuation(corp_name: str, found: dict, peers: list, refreshed_at: float) -> str:
+    """/value 응답 메시지 (업종 내 순위는 낮은 순 = 저평가 순, 업종 집계와 비교)"""
+    from valuation import METRICS, METRIC_LABELS
+    from sectors import ROLLUP_LABELS, compare_to_sector
+    median = found["sector_median"]
+    lines = [
+        f"💹 **{corp_name} ({found['stock_code']}) 밸류에이션**\n",
+        f"💰 종가 `{found['close']:,}원` · 시가총액 `{fmt_billion(found['marcap'])}`",
+        f"📅 실적 기준: {found['period']} 최근 4개 분기 합계\n",
+    ]
+    for metric in METRICS:
+        lines.append(f"• {METRIC_LABELS[metric]}: {fmt_multiple(found[metric], found[f'{metric}_rank'], found[f'{metric}_peers'])}")
+    lines.append(f"\n🏭 업종: {found['sector']} ({int(median['companies'])}개 기업 중앙값과 비교)")
+    for metric, (value, sector_value) in compare_to_sector(found, median).items():
+        if metric in SECTOR_COMPARE:
+            lines.append(f"• {ROLLUP_LABELS[metric]}: {fmt_sector_metric(metric, value)} "
+                         f"(업종 {fmt_sector_metric(metric, sector_value)})")
+    if peers:
+        lines.append("📉 업종 내 PER 낮은 순: " + ", ".join(f"{p['corp_name']} {p['per']:,.1f}" for p in peers))
+    updated = datetime.datetime.fromtimestamp(refreshed_at).strftime("%m/%d %H:%M")
+    lines.append(f"\n🕒 {updated} 장 마감 기준")
+    return "\n".join(lines)
+
+
+def fmt_profile(item: dict) -> str:
+    """유사 기업 특성 요약 (영업이익률 · 매출 증가율 · 시가총액 · 변동성, 값이 없으면 생략)"""
+    parts = []
+    if item["opm"] == item["opm"]:
+        parts.append(f"영업이익률 {item['opm'] * 100:.1f}%")
+    if item["revenue_growth"] == item["revenue_growth"]:
+        parts.append(f"매출 {item['revenue_growth'] * 100:+.1f}%")
+    if item["log_marcap"] == item["log_marcap"]:
+        parts.append(f"시총 {fmt_billion(10 ** item['log_marcap'])}")
+    if item["volatility"] == item["volatility"]:
+        parts.append(f"변동성 {item['volatility'] * 100:.0f}%")
+    return " · ".join(parts)
+
+
+def format_similar(corp_name: str, profile: dict, peers: list, refreshed_at: float) -> str:
+    """/similar 응답 메시지 (재무·주가 특성이 가까운 순)"""
+    lines = [
+        f"🧬 **{corp_name} ({profile['stock_code']})와 비슷한 기업**\n",
+        f"📌 기준: {profile['sector']} · {fmt_profile(profile)}\n",
+    ]
+    for i, peer in enumerate(peers, 1):
+        lines.append(f"{i}. **{peer['corp_name']}** ({peer['stock_code']}) · {peer['sector']}")
+        lines.append(f"   └ {fmt_profile(peer)}")
+    updated = datetime.datetime.fromtimestamp(refreshed_at).strftime("%m/%d %H:%M")
+    lines.append(f"\n🕒 {updated} 기준 · 수익성·성장률·규모·부채비율·주가 변동성으로 비교")
+    return "\n".join(lines)
+
+
+async def check_rate_limit(update: Update) -> bool:
+    """사용자별 요청 한도를 확인하고, 넘었으면 안내 메시지를 보낸 뒤 False를 반환합니다."""
+    limit, window = (int(x) for x in USER_RATE_LIMIT.split("/"))
+    allowed = await asyncio.to_thread(state.hit, f"user:{update.effective_user.id}", limit, window)
+    if not allowed:
+        await update.message.reply_text(f"⏳ 요청이 너무 많습니다. {window}초 후 다시 시도해주세요.")
+    return allowed
+
+
 def escape_md(text: str) -> str:
     """MarkdownV2 특수문자 이스케이프"""
     specials = r"\_*[]()~`>#+-=|{}.!"
@@ -59,9 +273,51 @@ def escape_md(text: str) -> str:
     return text
 
 
+def format_progress(job, position) -> str:
+    """작업 진행 단계 (대기 중이면 순번)"""
+    if position is not None:
+        return f"⏳ 대기 중 (앞에 {position}건)" if position else "⏳ 대기 중 (다음 차례)"
+    lines = []
+    for i, name in enumerate(job.stages):
+        mark = "✅" if i < job.stage else "🔄" if i == job.stage else "▫️"
+        lines.append(f"{mark} {name}")
+    return "\n".join(lines)
+
+
+async def enqueue_job(update: Update, progress, key, work, stages, header, deliver):
+    """
+    무거운 작업을 작업 큐에 넣고(같은 키의 작업이 있으면 합침) 진행 메시지 progress 하나를 단계마다 고쳐 씁니다.
+    header(job): 진행 메시지 윗부분, deliver(job): 작업이 끝나면 이 사용자에게 결과 전송
+    """
+    last = None
+
+    async def notify(job):
+        nonlocal last
+        if job.state in (DONE, FAILED):
+            await deliver(job)
+            return
+        text = f"{header(job)}\n\n{format_progress(job, tasks.position(job))}"
+        if text != last:  # 같은 내용으로 고치면 Bot API가 오류를 냄
+            last = text
+            await progress.edit_text(text, parse_mode=ParseMode.MARKDOWN)
+
+    chat_id = update.effective_chat.id
+    existing = tasks.get(key)
+    if existing is not None and chat_id in existing.watchers:
+        await progress.edit_text("🔄 같은 요청을 이미 처리 중입니다. 앞의 진행 메시지를 확인해주세요.")
+        return
+    try:
+        job = tasks.submit(key, update.effective_user.id, work, chat_id, notify, stages)
+    except QueueFull:
+        await progress.edit_text(f"⏳ 처리 중인 요청이 {TASK_USER_MAX_JOBS}건입니다. 앞선 요청이 끝난 뒤 다시 시도해주세요.")
+        return
+    await notify(job)
+
+
 # ──────────────────────────────────────────────
 # 명령어 핸들러
 # ──────────────────────────────────────────────
+@metrics.timed("telegram_command", command="start")
 async def cmd_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_name = update.effective_user.first_name or "투자자"
     msg = (
@@ -72,6 +328,19 @@ async def cmd_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "📊 `/stock [종목명]`\n"
         "   └ DART 재무데이터 + Gemini 분석 리포트\n"
         "   └ 예) `/stock 삼성전자`\n\n"
+        "📉 `/chart [종목명]`\n"
+        "   └ 최근 분기 실적 차트 이미지\n\n"
+        "💹 `/value [종목명]`\n"
+        "   └ PER·PBR·PSR·EV/EBIT 업종 내 순위 · 업종 중앙값 비교\n\n"
+        "🧬 `/similar [종목명]`\n"
+        "   └ 재무·주가 특성이 비슷한 기업\n\n"
+        "🔎 `/search [검색어]`\n"
+        "   └ 공시 원문 전문 검색\n"
+        "   └ 예) `/search 유상증자`\n\n"
+        "⭐ `/watch [종목명]` · `/unwatch [종목명]` · `/watchlist`\n"
+        "   └ 관심종목 추가 · 삭제 · 목록\n\n"
+        "📡 `/subscribe` · `/unsubscribe`\n"
+        "   └ 장 마감 후 기술적 신호 알림 구독 · 해지\n\n"
         "🔄 `/reset`\n"
         "   └ 대화 히스토리 초기화\n\n"
         "❓ `/help`\n"
@@ -83,13 +352,26 @@ async def cmd_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text(msg, parse_mode=ParseMode.MARKDOWN)
 
 
+@metrics.timed("telegram_command", command="help")
 async def cmd_help(update: Update, context: ContextTypes.DEFAULT_TYPE):
     msg = (
         "📖 **도움말**\n\n"
         "**주식 분석**\n"
         "`/stock [종목명]` — DART 최근 연간 재무 데이터를 조회하고 Gemini AI가 분석 리포트를 작성합니다.\n\n"
+        "`/chart [종목명]` — 최근 3년 분기별 매출·영업이익·순이익 차트를 이미지로 보내드립니다.\n\n"
+        "`/value [종목명]` — 장 마감 기준 PER·PBR·PSR·EV/EBIT와 같은 업종 안에서의 순위, 영업이익률·매출 증가율의 업종 중앙값 비교를 보여드립니다.\n\n"
+        "`/similar [종목명]` — 수익성·성장률·규모·부채비율·주가 변동성이 가장 비슷한 상장 기업을 찾아드립니다.\n\n"
+        "**공시 검색**\n"
+        "`/search [검색어]` — 조회했던 기업들의 공시 원문에서 검색어가 포함된 공시를 찾습니다.\n\n"
         "**일반 대화**\n"
         "아무 텍스트나 입력하면 Gemini AI가 금융·투자 관련 질문에 답변해드립니다.\n\n"
+        "**관심종목**\n"
+        "`/watch [종목명]` — 관심종목에 추가합니다.\n"
+        "`/unwatch [종목명]` — 관심종목에서 삭제합니다.\n"
+        "`/watchlist` — 관심종목 목록을 보여줍니다.\n\n"
+        "**알림**\n"
+        "`/subscribe` — 평일 장 마감 후 관심종목·시장 전체 기술적 신호 알림을 받습니다.\n"
+        "`/unsubscribe` — 알림 구독을 해지합니다.\n\n"
         "**기타**\n"
         "`/reset` — Gemini 대화 히스토리를 초기화합니다.\n\n"
         "⚠️ 본 챗봇은 투자 참고 목적으로만 사용하세요. 투자 손실에 대한 책임은 투자자 본인에게 있습니다."
@@ -97,17 +379,21 @@ async def cmd_help(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text(msg, parse_mode=ParseMode.MARKDOWN)
 
 
+@metrics.timed("telegram_command", command="reset")
 async def cmd_reset(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
-    gemini.reset_session(user_id)
+    gemini = await asyncio.to_thread(get_gemini)
+    await asyncio.to_thread(gemini.reset_session, user_id)
     await update.message.reply_text("🔄 대화 히스토리를 초기화했습니다. 새 대화를 시작하세요!")
 
 
+@metrics.timed("telegram_command", command="stock")
 async def cmd_stock(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     /stock [종목명] 처리
-    1. DART에서 최근 연간 재무 데이터 조회
-    2. Gemini로 분석 리포트 생성
+    1. 미리 생성된 리포트가 최신이면 바로 전송
+    2. 아니면 작업 큐에서 DART 연간 실적 조회 → 분기 추이·공시 정리 → Gemini 분석 리포트 생성
+       (진행 메시지 하나를 단계마다 고쳐 쓰고, 같은 기업을 분석 중이면 그 결과를 함께 받음)
     3. 결과 전송
     """
     if not context.args:
@@ -117,12 +403,23 @@ async def cmd_stock(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return
 
+    if not await check_rate_limit(update):
+        return
+
     corp_name = " ".join(context.args).strip()
-    await update.message.reply_text(f"🔍 **{corp_name}** 데이터를 조회 중입니다... 잠시만 기다려주세요.", parse_mode=ParseMode.MARKDOWN)
+    # 진행 메시지 하나를 단계마다 고쳐 쓰고, 끝나면 연간 실적 요약으로 바꿈
+    progress = await update.message.reply_text(f"🔍 **{corp_name}** 데이터를 조회 중입니다... 잠시만 기다려주세요.",
+                                               parse_mode=ParseMode.MARKDOWN)
+
+    from context_builder import build_stock_context
+    from financials import load_latest_annual
+    from gemini_handler import is_error_reply
 
     # ── DART 조회 ──
+    # DART·Gemini 호출은 동기 함수이므로 스레드에서 실행해 다른 사용자의 Update 처리를 막지 않음
+    dart = await asyncio.to_thread(get_dart)
     try:
-        corp_code = dart.find_corp_code(corp_name)
+        corp_code = await asyncio.to_thread(dart.find_corp_code, corp_name)
     except Exception as e:
         await update.message.reply_text(f"❌ 기업 코드 조회 실패: {e}")
         return
@@ -131,61 +428,339 @@ async def cmd_stock(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text(f"❌ '{corp_name}'을(를) DART에서 찾을 수 없습니다.\n정확한 기업명을 입력해주세요.")
         return
 
-    # 최근 3년 중 데이터가 있는 가장 최신 연도 탐색
-    current_year = datetime.datetime.now().year
-    fin_data = None
-    found_year = None
+    # 요청 빈도 기록 (야간 작업이 자주 찾는 기업의 리포트를 미리 생성)
+    await asyncio.to_thread(reports.record_request, corp_code, corp_name)
+
+    # ── 미리 생성된 리포트가 최신이면 바로 응답 ──
+    stored = await asyncio.to_thread(reports.get_report, corp_code, REPORT_MAX_AGE)
+    metrics.record_cache(hit=stored is not None, cache="stock_report")
+    if stored:
+        generated = datetime.datetime.fromtimestamp(stored["generated_at"]).strftime("%m/%d %H:%M")
+        await progress.edit_text(
+            format_summary(corp_name, stored["year"], stored["revenue"], stored["op_income"], stored["net_income"],
+                           f"🗂 {generated} 기준 분석 리포트입니다."),
+            parse_mode=ParseMode.MARKDOWN,
+        )
+        await update.message.reply_text(
+            f"📝 **Gemini AI 분석 리포트 — {corp_name}**\n\n{stored['analysis']}",
+            parse_mode=ParseMode.MARKDOWN,
+        )
+        context.application.create_task(
+            asyncio.to_thread(disclosure_index.update_company, dart, corp_code)
+        )
+        return
+
+    # ── 실시간 분석은 작업 큐에서 (같은 기업을 분석 중이면 그 작업의 결과를 함께 받음) ──
+    async def work(job):
+        # 최근 3년 중 데이터가 있는 가장 최신 연도 탐색 (제출 현황을 알면 사업보고서가 나온 연도만 조회)
+        found_year, fin_data = await asyncio.to_thread(load_latest_annual, dart, corp_code)
+        if not fin_data:
+            return None
+        job.info.update(year=found_year, revenue=fin_data.revenue, op_income=fin_data.op_income,
+                        net_income=fin_data.net_income)
+
+        # Gemini 분석 리포트 (다년도 분기 추이 + 최근 공시 피처 시트 기반)
+        await job.advance(1)
+        feature_sheet = await asyncio.to_thread(build_stock_context, dart, corp_code, corp_name)
+        await job.advance(2)
+        gemini = await asyncio.to_thread(get_gemini)
+        # 비동기 경로: 모델별 제한 시간, 할당량 초과 시 대체 모델로 전환
+        analysis = await gemini.aanalyze_stock(corp_name, dict(job.info), context=feature_sheet)
+
+        # 정상 리포트는 저장해 두어 같은 기업의 다음 요청은 바로 응답
+        if not is_error_reply(analysis):
+            await asyncio.to_thread(reports.save_report, corp_code, corp_name, found_year, fin_data.revenue,
+                                    fin_data.op_income, fin_data.net_income, analysis, "live")
+
+        # 조회한 기업의 새 공시 원문은 백그라운드에서 검색 인덱스에 추가
+        context.application.create_task(
+            asyncio.to_thread(disclosure_index.update_company, dart, corp_code)
+        )
+        return {**job.info, "analysis": analysis}
+
+    def header(job):
+        info = job.info
+        if not info:
+            return f"🔍 **{corp_name}** 분석 중"
+        return format_summary(corp_name, info["year"], info["revenue"], info["op_income"], info["net_income"], "").rstrip()
+
+    async def deliver(job):
+        if job.state == FAILED:
+            await progress.edit_text(f"❌ '{corp_name}' 분석 중 오류가 발생했습니다. 잠시 후 다시 시도해주세요.")
+            return
+        result = job.result
+        if result is None:
+            await progress.edit_text(f"⚠️ '{corp_name}'의 최근 연간 재무 데이터를 찾을 수 없습니다.")
+            return
+        await progress.edit_text(
+            format_summary(corp_name, result["year"], result["revenue"], result["op_income"], result["net_income"],
+                           "📝 Gemini AI 분석 리포트는 아래 메시지를 확인하세요."),
+            parse_mode=ParseMode.MARKDOWN,
+        )
+        await update.message.reply_text(
+            f"📝 **Gemini AI 분석 리포트 — {corp_name}**\n\n{result['analysis']}",
+            parse_mode=ParseMode.MARKDOWN,
+        )
+
+    await enqueue_job(update, progress, ("stock", corp_code), work, STOCK_STAGES, header, deliver)
+
+
+@metrics.timed("telegram_command", command="chart")
+async def cmd_chart(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    /chart [종목명] 처리
+    최근 3년 분기 실적 차트를 렌더링해 사진으로 전송합니다.
+    """
+    if not context.args:
+        await update.message.reply_text(
+            "⚠️ 종목명을 입력해주세요.\n예) `/chart 삼성전자`",
+            parse_mode=ParseMode.MARKDOWN,
+        )
+        return
+
+    if not await check_rate_limit(update):
+        return
 
-    for year in range(current_year - 1, current_year - 4, -1):
-        data = dart.get_financial_data(corp_code, year, ANNUAL_REPRT_CODE)
-        if data and (data["revenue"] or data["op_income"] or data["net_income"]):
-            fin_data = data
-            found_year = year
-            break
+    from financials import load_quarterly_financials, add_yoy
+    from chart_renderer import render_financial_chart
 
-    if not fin_data:
-        await update.message.reply_text(f"⚠️ '{corp_name}'의 최근 연간 재무 데이터를 찾을 수 없습니다.")
+    corp_name = " ".join(context.args).strip()
+    dart = await asyncio.to_thread(get_dart)
+    corp_code = await asyncio.to_thread(dart.find_corp_code, corp_name)
+    if not corp_code:
+        await update.message.reply_text(f"❌ '{corp_name}'을(를) DART에서 찾을 수 없습니다.\n정확한 기업명을 입력해주세요.")
         return
 
-    # ── 기본 재무 정보 메시지 ──
-    rev    = fin_data["revenue"]
-    op     = fin_data["op_income"]
-    net    = fin_data["net_income"]
-    opm    = f"{op / rev * 100:.1f}%" if rev else "N/A"
-    npm    = f"{net / rev * 100:.1f}%" if rev else "N/A"
+    progress = await update.message.reply_text(f"📉 **{corp_name}** 차트를 준비 중입니다...",
+                                               parse_mode=ParseMode.MARKDOWN)
+
+    async def work(job):
+        current_year = datetime.datetime.now().year
+        df = await asyncio.to_thread(load_quarterly_financials, dart, corp_code, current_year - 2, current_year)
+        if df.empty:
+            return None
+        await job.advance(1)
+        return await asyncio.to_thread(render_financial_chart, add_yoy(df), corp_name)
+
+    async def deliver(job):
+        if job.state == FAILED:
+            await progress.edit_text(f"❌ '{corp_name}' 차트 생성 중 오류가 발생했습니다. 잠시 후 다시 시도해주세요.")
+        elif job.result is None:
+            await progress.edit_text(f"⚠️ '{corp_name}'의 최근 분기 재무 데이터를 찾을 수 없습니다.")
+        else:
+            await context.bot.send_chat_action(chat_id=update.effective_chat.id, action="upload_photo")
+            await update.message.reply_photo(photo=job.result, caption=f"📉 {corp_name} 분기별 실적 추이")
+            await progress.edit_text(f"✅ **{corp_name}** 차트 전송 완료", parse_mode=ParseMode.MARKDOWN)
+
+    await enqueue_job(update, progress, ("chart", corp_code), work, CHART_STAGES,
+                      lambda job: f"📉 **{corp_name}** 차트 준비 중", deliver)
+
+
+@metrics.timed("telegram_command", command="value")
+async def cmd_value(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    /value [종목명] 처리
+    장 마감 후 갱신된 전 종목 밸류에이션 표에서 PER/PBR/PSR/EV·EBIT와 업종 내 순위를 보여줍니다.
+    (DART·시세 조회 없이 메모리에서 응답)
+    """
+    if not context.args:
+        await update.message.reply_text(
+            "⚠️ 종목명을 입력해주세요.\n예) `/value 삼성전자`",
+            parse_mode=ParseMode.MARKDOWN,
+        )
+        return
 
-    summary_msg = (
-        f"📊 **{corp_name} {found_year}년 연간 실적**\n\n"
-        f"💰 매출액:     `{fmt_billion(rev)}`\n"
-        f"📈 영업이익:   `{fmt_billion(op)}` (영업이익률 {opm})\n"
-        f"💵 당기순이익: `{fmt_billion(net)}` (순이익률 {npm})\n\n"
-        f"🤖 Gemini AI 분석 리포트를 생성 중입니다..."
+    corp_name = " ".join(context.args).strip()
+    dart = await asyncio.to_thread(get_dart)
+    corp_code = await asyncio.to_thread(dart.find_corp_code, corp_name)
+    if not corp_code:
+        await update.message.reply_text(f"❌ '{corp_name}'을(를) DART에서 찾을 수 없습니다.\n정확한 기업명을 입력해주세요.")
+        return
+
+    stock_code = await asyncio.to_thread(dart.find_stock_code, corp_code)
+    engine = await asyncio.to_thread(get_valuation)
+    found = await asyncio.to_thread(engine.lookup, stock_code)
+    if found is None:
+        await update.message.reply_text(
+            f"⚠️ '{corp_name}'의 밸류에이션 데이터가 없습니다. (비상장 기업이거나 아직 갱신 전입니다)"
+        )
+        return
+
+    peers = await asyncio.to_thread(engine.rank, found["sector"], "per", 5)
+    await update.message.reply_text(
+        format_valuation(corp_name, found, peers, engine.refreshed_at),
+        parse_mode=ParseMode.MARKDOWN,
     )
-    await update.message.reply_text(summary_msg, parse_mode=ParseMode.MARKDOWN)
-
-    # ── Gemini 분석 리포트 ──
-    financials = {
-        "year":       found_year,
-        "revenue":    rev,
-        "op_income":  op,
-        "net_income": net,
-    }
-    analysis = gemini.analyze_stock(corp_name, financials)
+
+
+@metrics.timed("telegram_command", command="similar")
+async def cmd_similar(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    /similar [종목명] 처리
+    재무·주가 특성 벡터가 가까운 종목을 유사 기업 색인에서 찾아 보여줍니다. (메모리에서 응답)
+    """
+    if not context.args:
+        await update.message.reply_text(
+            "⚠️ 종목명을 입력해주세요.\n예) `/similar 삼성전자`",
+            parse_mode=ParseMode.MARKDOWN,
+        )
+        return
+
+    corp_name = " ".join(context.args).strip()
+    dart = await asyncio.to_thread(get_dart)
+    corp_code = await asyncio.to_thread(dart.find_corp_code, corp_name)
+    if not corp_code:
+        await update.message.reply_text(f"❌ '{corp_name}'을(를) DART에서 찾을 수 없습니다.\n정확한 기업명을 입력해주세요.")
+        return
+
+    stock_code = await asyncio.to_thread(dart.find_stock_code, corp_code)
+    index = await asyncio.to_thread(get_similarity)
+    peers = await asyncio.to_thread(index.similar, stock_code)
+    if not peers:
+        await update.message.reply_text(
+            f"⚠️ '{corp_name}'의 유사 기업 데이터가 없습니다. (비상장 기업이거나 아직 갱신 전입니다)"
+        )
+        return
+
+    profile = index.profile(stock_code)
     await update.message.reply_text(
-        f"📝 **Gemini AI 분석 리포트 — {corp_name}**\n\n{analysis}",
+        format_similar(corp_name, profile, peers, index.refreshed_at),
         parse_mode=ParseMode.MARKDOWN,
     )
 
 
+@metrics.timed("telegram_command", command="search")
+async def cmd_search(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    /search [검색어] 처리
+    인덱싱된 공시 원문에서 검색어를 찾아 최신순으로 보여줍니다.
+    """
+    if not context.args:
+        await update.message.reply_text(
+            "⚠️ 검색어를 입력해주세요.\n예) `/search 유상증자`",
+            parse_mode=ParseMode.MARKDOWN,
+        )
+        return
+
+    query = " ".join(context.args).strip()
+    hits = await asyncio.to_thread(disclosure_index.search, query, limit=10)
+
+    if not hits:
+        await update.message.reply_text(
+            f"🔎 '{query}'이(가) 포함된 공시를 찾지 못했습니다.\n"
+            "먼저 `/stock [종목명]`으로 조회한 기업의 공시가 검색 대상에 추가됩니다.",
+            parse_mode=ParseMode.MARKDOWN,
+        )
+        return
+
+    lines = [f"🔎 '{query}' 공시 검색 결과 ({len(hits)}건)\n"]
+    for hit in hits:
+        dt = hit["rcept_dt"]
+        if len(dt) == 8:
+            dt = f"{dt[:4]}-{dt[4:6]}-{dt[6:]}"
+        lines.append(
+            f"📄 {dt} {hit['corp_name']} — {hit['report_nm']}\n"
+            f"   {hit['snippet']}\n"
+            f"   http://dart.fss.or.kr/dsaf001/main.do?rcpNo={hit['rcept_no']}"
+        )
+    await update.message.reply_text("\n".join(lines))
+
+
+@metrics.timed("telegram_command", command="watch")
+async def cmd_watch(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/watch [종목명] — 관심종목 추가"""
+    if not context.args:
+        await update.message.reply_text("⚠️ 종목명을 입력해주세요.\n예) `/watch 삼성전자`", parse_mode=ParseMode.MARKDOWN)
+        return
+
+    corp_name = " ".join(context.args).strip()
+    dart = await asyncio.to_thread(get_dart)
+    corp_code = await asyncio.to_thread(dart.find_corp_code, corp_name)
+    if not corp_code:
+        await update.message.reply_text(f"❌ '{corp_name}'을(를) DART에서 찾을 수 없습니다.\n정확한 기업명을 입력해주세요.")
+        return
+
+    added = await asyncio.to_thread(state.add_watch, update.effective_user.id, corp_code, corp_name)
+    if added:
+        await update.message.reply_text(f"⭐ '{corp_name}'을(를) 관심종목에 추가했습니다.")
+    else:
+        await update.message.reply_text(f"ℹ️ '{corp_name}'은(는) 이미 관심종목에 있습니다.")
+
+
+@metrics.timed("telegram_command", command="unwatch")
+async def cmd_unwatch(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/unwatch [종목명] — 관심종목 삭제"""
+    if not context.args:
+        await update.message.reply_text("⚠️ 종목명을 입력해주세요.\n예) `/unwatch 삼성전자`", parse_mode=ParseMode.MARKDOWN)
+        return
+
+    corp_name = " ".join(context.args).strip()
+    user_id = update.effective_user.id
+    # 목록에 저장된 이름으로 먼저 찾고, 없으면 DART 고유번호로 찾음
+    items = await asyncio.to_thread(state.list_watch, user_id)
+    corp_code = next((i["corp_code"] for i in items if i["corp_name"] == corp_name), None)
+    if corp_code is None:
+        dart = await asyncio.to_thread(get_dart)
+        corp_code = await asyncio.to_thread(dart.find_corp_code, corp_name)
+
+    removed = corp_code and await asyncio.to_thread(state.remove_watch, user_id, corp_code)
+    if removed:
+        await update.message.reply_text(f"🗑️ '{corp_name}'을(를) 관심종목에서 삭제했습니다.")
+    else:
+        await update.message.reply_text(f"ℹ️ '{corp_name}'은(는) 관심종목에 없습니다.")
+
+
+@metrics.timed("telegram_command", command="watchlist")
+async def cmd_watchlist(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/watchlist — 관심종목 목록"""
+    items = await asyncio.to_thread(state.list_watch, update.effective_user.id)
+    if not items:
+        await update.message.reply_text(
+            "⭐ 관심종목이 없습니다.\n`/watch [종목명]`으로 추가해보세요.", parse_mode=ParseMode.MARKDOWN
+        )
+        return
+
+    lines = [f"⭐ 관심종목 ({len(items)}개)\n"]
+    lines += [f"• {item['corp_name']} ({item['corp_code']})" for item in items]
+    await update.message.reply_text("\n".join(lines))
+
+
+@metrics.timed("telegram_command", command="subscribe")
+async def cmd_subscribe(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/subscribe — 장 마감 후 기술적 신호 알림 구독 (signal_scanner.py가 전송)"""
+    added = await asyncio.to_thread(state.subscribe, update.effective_user.id, SIGNAL_TOPIC)
+    if added:
+        await update.message.reply_text(
+            "📡 기술적 신호 알림을 구독했습니다.\n"
+            "평일 장 마감 후 관심종목 신호와 시장 전체 주요 신호(골든크로스, MACD, RSI, 거래량 급증)를 보내드립니다.\n"
+            "해지하려면 /unsubscribe 를 입력하세요."
+        )
+    else:
+        await update.message.reply_text("ℹ️ 이미 기술적 신호 알림을 구독 중입니다.")
+
+
+@metrics.timed("telegram_command", command="unsubscribe")
+async def cmd_unsubscribe(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/unsubscribe — 기술적 신호 알림 해지"""
+    removed = await asyncio.to_thread(state.unsubscribe, update.effective_user.id, SIGNAL_TOPIC)
+    if removed:
+        await update.message.reply_text("🔕 기술적 신호 알림 구독을 해지했습니다.")
+    else:
+        await update.message.reply_text("ℹ️ 구독 중인 알림이 없습니다.")
+
+
 # ──────────────────────────────────────────────
 # 일반 메시지 핸들러 (Gemini 자유 대화)
 # ──────────────────────────────────────────────
+@metrics.timed("telegram_command", command="chat")
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id   = update.effective_user.id
     user_text = update.message.text.strip()
 
     if not user_text:
         return
+    if not await check_rate_limit(update):
+        return
 
     # 타이핑 액션 표시
     await context.bot.send_chat_action(
@@ -193,7 +768,8 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         action="typing",
     )
 
-    reply = gemini.chat(user_id, user_text)
+    gemini = await asyncio.to_thread(get_gemini)
+    reply = await gemini.achat(user_id, user_text)
     await update.message.reply_text(reply, parse_mode=ParseMode.MARKDOWN)
 
 
@@ -207,21 +783,64 @@ async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE):
 # ──────────────────────────────────────────────
 # 메인
 # ──────────────────────────────────────────────
-def main():
-    if not TELEGRAM_TOKEN:
-        raise RuntimeError("TELEGRAM_BOT_TOKEN이 없습니다. .env 파일을 확인하세요.")
-
-    app = ApplicationBuilder().token(TELEGRAM_TOKEN).build()
+def build_application(builder=None, concurrency: int = None):
+    """
+    핸들러를 등록한 Application을 만듭니다.
+    builder를 넘기면 (부하 테스트용 가짜 Bot API 요청 객체 등) 해당 설정으로 생성합니다.
+    concurrency: 동시 처리 Update 수 (기본 BOT_CONCURRENCY)
+    """
+    if builder is None:
+        builder = ApplicationBuilder().token(TELEGRAM_TOKEN)
+    processor = PerUserUpdateProcessor(concurrency or BOT_CONCURRENCY, store=state if BOT_SHARED_ORDERING else None)
+    builder = builder.concurrent_updates(processor).post_init(_post_init)
+    app = builder.build()
 
     app.add_handler(CommandHandler("start", cmd_start))
     app.add_handler(CommandHandler("help",  cmd_help))
     app.add_handler(CommandHandler("reset", cmd_reset))
     app.add_handler(CommandHandler("stock", cmd_stock))
+    app.add_handler(CommandHandler("chart",  cmd_chart))
+    app.add_handler(CommandHandler("value",  cmd_value))
+    app.add_handler(CommandHandler("similar", cmd_similar))
+    app.add_handler(CommandHandler("search", cmd_search))
+    app.add_handler(CommandHandler("watch",     cmd_watch))
+    app.add_handler(CommandHandler("unwatch",   cmd_unwatch))
+    app.add_handler(CommandHandler("watchlist", cmd_watchlist))
+    app.add_handler(CommandHandler("subscribe",   cmd_subscribe))
+    app.add_handler(CommandHandler("unsubscribe", cmd_unsubscribe))
     app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
     app.add_error_handler(error_handler)
+    return app
+
+
+async def _post_init(app):
+    """폴링/웹훅 시작 직후 Gemini·DART 핸들러를 백그라운드에서 미리 만듭니다. (봇은 바로 응답 시작)"""
+    app.create_task(asyncio.to_thread(preload_handlers))
+
 
-    logger.info("✅ 텔레그램 봇 시작! Ctrl+C로 종료합니다.")
-    app.run_polling(allowed_updates=Update.ALL_TYPES)
+def main():
+    if not TELEGRAM_TOKEN:
+        raise RuntimeError("TELEGRAM_BOT_TOKEN이 없습니다. .env 파일을 확인하세요.")
+
+    app = build_application()
+
+    # METRICS_PORT / METRICS_DUMP_PATH 설정 시 계측값 노출
+    metrics.start_from_env()
+
+    if WEBHOOK_URL:
+        logger.info("✅ 텔레그램 봇 시작 (웹훅 %s:%d/%s, 동시 처리 %d%s)", WEBHOOK_LISTEN, WEBHOOK_PORT, WEBHOOK_PATH,
+                    BOT_CONCURRENCY, ", 워커 간 순서 공유" if BOT_SHARED_ORDERING else "")
+        app.run_webhook(
+            listen=WEBHOOK_LISTEN,
+            port=WEBHOOK_PORT,
+            url_path=WEBHOOK_PATH,
+            webhook_url=f"{WEBHOOK_URL.rstrip('/')}/{WEBHOOK_PATH}",
+            secret_token=WEBHOOK_SECRET,
+            allowed_updates=Update.ALL_TYPES,
+        )
+    else:
+        logger.info("✅ 텔레그램 봇 시작 (폴링, 동시 처리 %d)! Ctrl+C로 종료합니다.", BOT_CONCURRENCY)
+        app.run_polling(allowed_updates=Update.ALL_TYPES)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,126 @@
+"""
+update_processor.py
+텔레그램 Update 동시 처리기 (사용자별 순서 보장)
+
+python-telegram-bot 기본 설정은 Update를 하나씩 차례로 처리해서, 한 사용자의 느린 /stock이
+다른 모든 사용자의 응답을 막습니다. 이 처리기는 서로 다른 사용자의 Update는 최대 workers개까지
+동시에 처리하되, 같은 사용자(채팅)의 Update는 들어온 순서대로 하나씩 처리합니다.
+(예: 앞서 보낸 대화 메시지보다 /reset이 먼저 처리되지 않음)
+
+여러 워커 프로세스가 웹훅을 나눠 받을 때(stockbot@.service)는 프로세스 안의 잠금만으로는 같은 사용자의
+Update가 다른 워커에서 동시에, 뒤바뀐 순서로 처리될 수 있습니다. store(공유 StateStore)를 넘기면
+사용자별 대기열을 저장소에 두고, 도착한 Update 중 update_id가 가장 작은 것부터 한 번에 하나씩 처리합니다.
+(텔레그램 update_id는 보낸 순서대로 증가)
+"""
+import asyncio
+import logging
+
+from telegram.ext import BaseUpdateProcessor
+
+logger = logging.getLogger(__name__)
+
+# 워커 간 순번: 이 시간(초) 넘게 확인되지 않은 대기열 항목은 죽은 워커의 몫으로 보고 건너뜀
+# (처리 중인 Update는 확인하지 않으므로, 핸들러가 이보다 오래 걸리면 다음 Update가 먼저 시작될 수 있음)
+TURN_TTL = 120.0
+# 차례를 기다리는 동안 저장소를 다시 확인하는 간격 (초)
+TURN_POLL_INTERVAL = 0.05
+
+
+def ordering_key(update):
+    """같은 순서로 처리해야 하는 Update 묶음의 키 (사용자 → 채팅 순, 없으면 None)"""
+    user = getattr(update, "effective_user", None)
+    if user is not None:
+        return ("user", user.id)
+    chat = getattr(update, "effective_chat", None)
+    if chat is not None:
+        return ("chat", chat.id)
+    return None
+
+
+class PerUserUpdateProcessor(BaseUpdateProcessor):
+    """
+    workers: 동시에 핸들러를 실행할 최대 Update 수
+    max_pending: 처리 대기 중(사용자 잠금 대기 포함)으로 받아둘 최대 Update 수 (기본 workers * 8)
+    store: 워커 프로세스 간 순서를 맞출 공유 StateStore (None이면 이 프로세스 안에서만 순서 보장)
+
+    사용자 잠금을 먼저 잡은 뒤 작업 슬롯을 얻으므로, 한 사용자가 연달아 보낸 Update가
+    작업 슬롯을 차지한 채 자기 차례를 기다리는 일이 없습니다.
+    """
+
+    def __init__(self, workers: int, max_pending: int = None, store=None,
+                 turn_ttl: float = TURN_TTL, poll_interval: float = TURN_POLL_INTERVAL):
+        super().__init__(max_pending or workers * 8)
+        self.workers = workers
+        self.store = store
+        self.turn_ttl = turn_ttl
+        self.poll_interval = poll_interval
+        self._worker_slots = asyncio.BoundedSemaphore(workers)
+        self._user_locks: dict = {}
+        self._waiting: dict = {}
+
+    async def do_process_update(self, update, coroutine):
+        key = ordering_key(update)
+        if key is None:
+            async with self._worker_slots:
+                await coroutine
+            return
+
+        # asyncio.Lock은 대기 순서(FIFO)대로 넘겨주므로 도착 순서가 유지됨
+        lock = self._user_locks.setdefault(key, asyncio.Lock())
+        self._waiting[key] = self._waiting.get(key, 0) + 1
+        turn = None
+        try:
+            turn = await self._enqueue_turn(key, update)
+            if turn is None:
+                async with lock, self._worker_slots:
+                    await coroutine
+            else:
+                # 공유 대기열이 프로세스 안팎의 순서를 모두 정함 (프로세스 잠금까지 잡으면, 한 워커에
+                # update_id 역순으로 도착한 Update가 서로를 기다릴 수 있음)
+                await self._wait_turn(*turn)
+                async with self._worker_slots:
+                    await coroutine
+        finally:
+            if turn is not None:
+                await self._release_turn(*turn)
+            self._waiting[key] -= 1
+            if not self._waiting[key]:
+                del self._waiting[key]
+                del self._user_locks[key]
+
+    async def _enqueue_turn(self, key, update):
+        """공유 대기열에 올리고 (저장소 키, update_id)를 반환합니다. (저장소가 없거나 실패하면 None)"""
+        update_id = getattr(update, "update_id", None)
+        if self.store is None or update_id is None:
+            return None
+        turn = (f"{key[0]}:{key[1]}", update_id)
+        try:
+            await asyncio.to_thread(self.store.enqueue_turn, *turn)
+        except Exception as e:
+            # 저장소 장애로 봇이 멈추지 않도록 이 Update는 프로세스 안 순서만 지킴
+            logger.warning("워커 간 순번 등록 실패 (%s): %s", turn[0], e)
+            return None
+        return turn
+
+    async def _wait_turn(self, store_key, update_id):
+        """같은 사용자의 앞선 Update(다른 워커 포함)가 모두 끝날 때까지 기다립니다."""
+        while True:
+            try:
+                if await asyncio.to_thread(self.store.check_turn, store_key, update_id, self.turn_ttl):
+                    return
+            except Exception as e:
+                logger.warning("워커 간 순번 확인 실패 (%s): %s", store_key, e)
+                return
+            await asyncio.sleep(self.poll_interval)
+
+    async def _release_turn(self, store_key, update_id):
+        try:
+            await asyncio.to_thread(self.store.release_turn, store_key, update_id)
+        except Exception as e:
+            logger.warning("워커 간 순번 해제 실패 (%s): %s", store_key, e)
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
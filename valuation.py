@@ -0,0 +1,339 @@
+"""
+valuation.py
+전 종목 밸류에이션 엔진 (KRX 종가 × DART 재무)
+
+장 마감 후 KRX 전 종목 종가·시가총액·상장주식수(price_store.load_market_snapshot, 한 번의 호출)와
+기업별 DART 재무(최근 4개 분기 합계(TTM) 매출·영업이익·순이익, 최근 보고서의 자본총계·부채총계·유동자산)를
+종목코드로 이어 붙여 PER/PBR/PSR/EV·EBIT와 업종 내 순위를 전 종목 한 번에(벡터 연산) 계산합니다.
+업종은 DART 기업개황의 산업분류 코드(sectors.py)로 묶고, 업종별 집계(중앙값 등)도 함께 저장합니다.
+
+기업별 재무는 직전 갱신 이후 정기보고서를 접수한 기업과 오래된 기업만 다시 조회하므로(증분 갱신)
+매일 돌려도 DART 호출이 적습니다. 결과 표는 DataCache에 저장되고 Arrow IPC 파일로도 게시되어(arrow_store.py)
+봇 워커·대시보드 프로세스는 같은 파일을 메모리 매핑해 바로 답합니다. (/value)
+
+EV는 주요계정 API에 현금·차입금이 따로 없어 "시가총액 + 부채총계 - 유동자산"으로 근사합니다.
+
+사용 예)
+    python valuation.py                 # 장 마감 후 증분 갱신 (systemd 타이머: stockbot-valuation.timer)
+    python valuation.py --full          # 모든 기업 재무를 다시 계산
+"""
+import sys
+import time
+import argparse
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import metrics
+from arrow_store import ArrowStore
+from data_cache import DataCache
+from financials import QUARTER_CODES, load_quarterly_financials
+from price_store import load_market_snapshot, load_sector_map
+from sectors import ROLLUPS_KEY, refresh_company_meta, sector_map, sector_rollups
+
+# 캐시 키 (봇·대시보드·갱신 작업이 같은 DataCache를 공유)
+TABLE_KEY        = "valuation:table"
+FUNDAMENTALS_KEY = "valuation:fundamentals"
+REFRESHED_KEY    = "valuation:refreshed_at"
+
+# 봇 워커·대시보드가 메모리 매핑으로 함께 쓰는 공유 데이터셋 이름 (arrow_store)
+SHARED_TABLE = "valuation_table"
+
+# 접수 공시 목록으로 변경 여부를 확인하지 못해도 이 기간(초)이 지난 재무는 다시 조회
+FUNDAMENTALS_MAX_AGE = 7 * 24 * 3600
+
+# 배수 지표 (모두 낮을수록 저평가)
+METRICS = ["per", "pbr", "psr", "ev_ebit"]
+METRIC_LABELS = {"per": "PER", "pbr": "PBR", "psr": "PSR", "ev_ebit": "EV/EBIT"}
+
+# 최근 보고서 재무상태표에서 가져올 계정
+BALANCE_ACCOUNTS = {"equity": "자본총계", "liabilities": "부채총계", "current_assets": "유동자산"}
+
+REPRT_CODES = {quarter: code for code, quarter in QUARTER_CODES.items()}
+
+
+# ──────────────────────────────────────────────
+# 기업별 재무 (DART, 캐시 사용)
+# ──────────────────────────────────────────────
+def balance_sheet(details) -> dict:
+    """FinancialRecord.details(연결 우선 재무제표)에서 자본총계·부채총계·유동자산(원)을 뽑습니다."""
+    values = {key: 0 for key in BALANCE_ACCOUNTS}
+    if details is None or details.empty:
+        return values
+    bs = details[details["sj_div"] == "BS"] if "sj_div" in details.columns else details
+    for key, account in BALANCE_ACCOUNTS.items():
+        row = bs[bs["account_nm"] == account]
+        if not row.empty:
+            values[key] = int(row.iloc[0]["thstrm_amount"])
+    return values
+
+
+def company_fundamentals(handler, corp_code, current_year: int = None):
+    """
+    기업 한 곳의 TTM 실적과 최근 재무상태표 값을 dict로 반환합니다. 분기 실적이 없으면 None.
+    최근 4개 분기가 연속되지 않으면(보고서 누락) TTM 대신 가장 최근 사업연도 실적을 씁니다.
+    """
+    current_year = current_year or datetime.datetime.now().year
+    df = load_quarterly_financials(handler, corp_code, current_year - 2, current_year)
+    if df.empty:
+        return None
+
+    last = df.tail(8)
+    order = last["Year"].astype(int) * 4 + last["Quarter"].astype(int)
+    consecutive = (order.diff().iloc[1:] == 1).to_numpy()
+    if len(last) >= 4 and consecutive[-3:].all():
+        ttm = last.tail(4)[["Revenue", "OpIncome", "NetIncome"]].sum()
+        revenue, op_income, net_income = int(ttm["Revenue"]), int(ttm["OpIncome"]), int(ttm["NetIncome"])
+        # 직전 4개 분기(1년 전 TTM)까지 연속이면 매출 증가율 비교 기준으로 사용
+        prev_revenue = int(last.head(4)["Revenue"].sum()) if len(last) == 8 and consecutive.all() else 0
+    else:
+        annual = df[df["Quarter"] == 4]
+        if annual.empty:
+            return None
+        row = annual.iloc[-1]
+        revenue, op_income, net_income = int(row["Revenue_Acc"]), int(row["OpIncome_Acc"]), int(row["NetIncome_Acc"])
+        prev = annual.iloc[-2] if len(annual) > 1 else None
+        prev_revenue = int(prev["Revenue_Acc"]) if prev is not None and int(prev["Year"]) == int(row["Year"]) - 1 else 0
+
+    latest = df.iloc[-1]
+    year, quarter = int(latest["Year"]), int(latest["Quarter"])
+    record = handler.get_financial_data(corp_code, year, REPRT_CODES[quarter])
+    return {
+        "corp_code": corp_code,
+        "period": f"{year}.{quarter}Q",
+        "ttm_revenue": revenue,
+        "ttm_op_income": op_income,
+        "ttm_net_income": net_income,
+        "prev_ttm_revenue": prev_revenue,
+        **balance_sheet(record.details if record else None),
+        "updated_at": time.time(),
+    }
+
+
+# ──────────────────────────────────────────────
+# 전 종목 배수 계산 (벡터 연산)
+# ──────────────────────────────────────────────
+def _ratio(numerator, denominator):
+    """분모가 0 이하(적자·자본잠식)면 NaN"""
+    numerator = np.asarray(numerator, dtype="float64")
+    denominator = np.asarray(denominator, dtype="float64")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator > 0, numerator / denominator, np.nan)
+
+
+def compute_valuations(quotes, fundamentals, sectors=None):
+    """
+    quotes(종목코드 인덱스, Name/Market/Close/Marcap/Stocks)와 fundamentals(stock_code 컬럼 포함)를 이어
+    종목별 배수와 업종 내 순위(낮은 순 1위부터, {지표}_rank / {지표}_peers)를 담은 표를 반환합니다.
+    """
+    fundamentals = fundamentals.reset_index(drop=True).drop_duplicates("stock_code").set_index("stock_code")
+    df = quotes.join(fundamentals, how="inner")
+    if sectors is not None:
+        df["sector"] = sectors.reindex(df.index).fillna("기타")
+    else:
+        df["sector"] = df["Market"]
+
+    marcap = df["Marcap"].to_numpy(dtype="float64")
+    ev = marcap + df["liabilities"].to_numpy(dtype="float64") - df["current_assets"].to_numpy(dtype="float64")
+    ev = np.where(ev > 0, ev, np.nan)  # 유동자산이 시총+부채보다 큰 경우 EV 배수는 의미 없음
+
+    table = pd.DataFrame({
+        "corp_code": df["corp_code"],
+        "corp_name": df["Name"],
+        "market": df["Market"],
+        "sector": df["sector"],
+        "period": df["period"],
+        "close": df["Close"].fillna(0).astype("int64"),
+        "marcap": df["Marcap"].fillna(0).astype("int64"),
+        "shares": df["Stocks"].fillna(0).astype("int64"),
+        "per": _ratio(marcap, df["ttm_net_income"]),
+        "pbr": _ratio(marcap, df["equity"]),
+        "psr": _ratio(marcap, df["ttm_revenue"]),
+        "ev_ebit": _ratio(ev, df["ttm_op_income"]),
+        "opm": _ratio(df["ttm_op_income"], df["ttm_revenue"]),
+        # 예전에 저장된 재무 표에는 1년 전 TTM 매출이 없음
+        "revenue_growth": _ratio(df["ttm_revenue"], df.get("prev_ttm_revenue", np.nan)) - 1,
+    }, index=df.index)
+    table.index.name = "stock_code"
+
+    by_sector = table.groupby("sector", observed=True)
+    for metric in METRICS:
+        table[f"{metric}_rank"] = by_sector[metric].rank(method="min").astype("float32")
+        table[f"{metric}_peers"] = by_sector[metric].transform("count").astype("int32")
+    for column in ("corp_code", "market", "sector", "period"):
+        table[column] = table[column].astype("category")
+    return table
+
+
+# ──────────────────────────────────────────────
+# 엔진 (갱신 · 메모리 조회)
+# ──────────────────────────────────────────────
+class ValuationEngine:
+    """
+    refresh()는 갱신 작업(장 마감 후)에서, lookup()/rank()는 봇·대시보드에서 씁니다.
+    조회 쪽은 공유 데이터셋(없으면 캐시)의 표를 메모리에 올려 두고, reload_interval초마다 새 버전이 있는지만 확인합니다.
+    """
+
+    def __init__(self, cache=None, reload_interval: float = 300, shared=None):
+        self.cache = cache if cache is not None else DataCache()
+        self.shared = shared if shared is not None else ArrowStore()
+        self.reload_interval = reload_interval
+        self._table = None
+        self._rollups = None        # 업종별 집계 (sectors.sector_rollups)
+        self._loaded_at = None      # 메모리에 올린 표의 갱신 시각 (REFRESHED_KEY 값)
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    # ── 갱신 ──
+    def refresh(self, handler, full: bool = False, workers: int = 4) -> dict:
+        """
+        전 종목 시세를 받고, 새 정기보고서가 있거나 오래된 기업의 재무만 다시 조회해 표를 다시 계산합니다.
+        반환값: {"companies": 표의 종목 수, "updated": 재무를 새로 조회한 기업 수, "failed": 실패 수}
+        """
+        started = time.time()
+        quotes = load_market_snapshot(self.cache)
+        try:
+            krx_sectors = load_sector_map(self.cache)
+        except Exception as e:
+            print(f"Error fetching sector map: {e}")
+            krx_sectors = None
+
+        listed = handler.listed_corp_codes(quotes.index)
+        meta = refresh_company_meta(handler, self.cache, listed.index, workers=workers, full=full)
+        sectors = sector_map(meta, krx_sectors)
+
+        fundamentals = None if full else self.cache.get(FUNDAMENTALS_KEY)
+        if fundamentals is None:
+            fundamentals = pd.DataFrame(columns=["stock_code", "updated_at"]).rename_axis("corp_code")
+            targets = set(listed.index)
+        else:
+            stale = fundamentals.index[fundamentals["updated_at"] < started - FUNDAMENTALS_MAX_AGE]
+            targets = (set(listed.index) - set(fundamentals.index)) | set(stale)
+            last_refresh = self.cache.get(REFRESHED_KEY)
+            if last_refresh:
+                since = datetime.date.fromtimestamp(last_refresh).isoformat()
+                filed = handler.get_filed_corps(since)
+                if filed is not None:
+                    targets |= filed & set(listed.index)
+
+        rows, failed = [], 0
+        print(f"상장 {len(listed)}개 기업 중 {len(targets)}개 기업 재무 갱신")
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for row in pool.map(lambda corp_code: self._fundamentals(handler, corp_code), sorted(targets)):
+                if row is None:
+                    failed += 1
+                else:
+                    rows.append(row)
+
+        if rows:
+            updated = pd.DataFrame(rows).set_index("corp_code")
+            updated["stock_code"] = listed.reindex(updated.index)
+            fundamentals = pd.concat([fundamentals.drop(updated.index, errors="ignore"), updated])
+        # 상장폐지 등으로 목록에서 빠진 기업 정리
+        fundamentals = fundamentals[fundamentals.index.isin(listed.index)]
+        if fundamentals.empty:
+            metrics.registry.inc("valuation_refresh_total", result="empty")
+            return {"companies": 0, "updated": 0, "failed": failed}
+
+        table = compute_valuations(quotes, fundamentals.reset_index(), sectors)
+        self.cache.set(FUNDAMENTALS_KEY, fundamentals)
+        self.cache.set(TABLE_KEY, table)
+        self.cache.set(ROLLUPS_KEY, sector_rollups(table))
+        self.cache.set(REFRESHED_KEY, started)
+        try:
+            self.shared.publish_frame(SHARED_TABLE, table, {"refreshed_at": started})
+        except Exception as e:
+            print(f"Error publishing shared table: {e}")  # 조회 쪽은 캐시의 표를 씀
+        self._install(table, started)
+
+        metrics.registry.inc("valuation_refresh_total", result="ok")
+        return {"companies": len(table), "updated": len(rows), "failed": failed}
+
+    @staticmethod
+    def _fundamentals(handler, corp_code):
+        try:
+            return company_fundamentals(handler, corp_code)
+        except Exception as e:
+            print(f"Error computing fundamentals for {corp_code}: {e}")
+            return None
+
+    # ── 조회 ──
+    def _install(self, table, refreshed_at):
+        rollups = sector_rollups(table)
+        with self._lock:
+            self._table, self._rollups, self._loaded_at = table, rollups, refreshed_at
+
+    def load(self) -> bool:
+        """캐시에 더 새로운 표가 있으면 메모리에 올립니다. 표가 준비되어 있으면 True."""
+        now = time.monotonic()
+        if self._table is not None and now - self._checked < self.reload_interval:
+            return True
+        self._checked = now
+        # 게시된 공유 표가 있으면 매핑해서 씀 (버전이 그대로면 ArrowStore가 같은 객체를 돌려줌)
+        table = self.shared.read_frame(SHARED_TABLE)
+        if table is not None:
+            refreshed_at = table.attrs.get("refreshed_at")
+            if refreshed_at != self._loaded_at:
+                self._install(table, refreshed_at)
+            return True
+        refreshed_at = self.cache.get(REFRESHED_KEY)
+        if refreshed_at and refreshed_at != self._loaded_at:
+            table = self.cache.get(TABLE_KEY)
+            if table is not None:
+                self._install(table, refreshed_at)
+        return self._table is not None
+
+    @property
+    def refreshed_at(self):
+        return self._loaded_at
+
+    def lookup(self, stock_code: str):
+        """종목 한 곳의 배수·업종 내 순위·업종 집계(sector_median, dict). 표에 없으면 None."""
+        if not stock_code or not self.load() or stock_code not in self._table.index:
+            return None
+        row = self._table.loc[stock_code]
+        result = {"stock_code": stock_code, **row.to_dict()}
+        result["sector_median"] = self._rollups.loc[row["sector"]].to_dict()
+        return result
+
+    def sector(self, name: str):
+        """업종 하나의 집계(기업 수·시가총액 합계·지표 중앙값, dict). 없으면 None."""
+        if not self.load() or name not in self._rollups.index:
+            return None
+        return {"sector": name, **self._rollups.loc[name].to_dict()}
+
+    def sectors(self):
+        """업종별 집계 표 (시가총액 큰 순). 표가 없으면 None."""
+        return self._rollups if self.load() else None
+
+    def rank(self, sector: str, metric: str = "per", limit: int = 10) -> list:
+        """업종 안에서 metric이 낮은(저평가) 순서로 종목 목록을 반환합니다. (적자 등 값이 없는 종목 제외)"""
+        if metric not in METRICS:
+            raise ValueError(f"지원하지 않는 지표입니다: {metric}")
+        if not self.load():
+            return []
+        peers = self._table[self._table["sector"] == sector].dropna(subset=[metric]).nsmallest(limit, metric)
+        return [{"stock_code": code, "corp_name": row.corp_name, metric: getattr(row, metric)}
+                for code, row in zip(peers.index, peers.itertuples(index=False))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="전 종목 밸류에이션 표를 갱신합니다. (장 마감 후 실행)")
+    parser.add_argument("--full", action="store_true", help="모든 기업 재무를 다시 조회")
+    parser.add_argument("--workers", type=int, default=4, help="DART 동시 조회 스레드 수")
+    args = parser.parse_args(argv)
+
+    from dart_handler import DartHandler
+    cache = DataCache()
+    engine = ValuationEngine(cache)
+    started = time.perf_counter()
+    result = engine.refresh(DartHandler(cache=cache), full=args.full, workers=args.workers)
+    print(f"=== 완료: {result} / {time.perf_counter() - started:.1f}초 ===")
+    return 0 if result["companies"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,217 @@
+"""
+warmup.py
+배포·재시작 직후 캐시 예열
+
+봇 서비스가 뜨기 전에(stockbot.service의 ExecStartPre, 없으면 deploy.sh) 첫 사용자가 겪을 조회를 미리 해 둡니다.
+  1) 기업 코드 목록 (OpenDartReader가 docs_cache/에 저장 — 봇 프로세스가 다시 받지 않음)
+  2) 최근 요청 상위 N개 기업의 재무(/stock 연간 실적·분기 추이·최근 공시)와 주가(대시보드 기본 기간)
+  3) 미리 생성된 /stock 리포트, 밸류에이션 표·유사 기업 색인 (디스크 페이지를 OS 캐시에 올림)
+기업별 예열은 스레드 풀에서 병렬로, 전체 WARMUP_BUDGET_SECONDS 안에서만 합니다. (시간이 다 되면 남은 기업은 건너뜀)
+
+끝나면 층별 예열 범위(coverage)를 출력합니다. "이미 있음"은 예열 전부터 캐시에 있던 비율, "예열 후"는 지금 캐시로
+바로 답할 수 있는 비율입니다. /stock 리포트는 Gemini 호출이 필요해 여기서 만들지 않고 범위만 보고합니다.
+(부족하면 precompute_reports.py)
+
+환경변수
+    WARMUP_TOP_N            예열할 기업 수 (기본 100, 최근 30일 /stock 요청 상위)
+    WARMUP_BUDGET_SECONDS   전체 시간 예산 (기본 60초, systemd TimeoutStartSec보다 짧게)
+
+사용 예)
+    python warmup.py
+    python warmup.py --top 300 --budget 120 --workers 8
+"""
+import os
+import sys
+import time
+import argparse
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+import metrics
+from data_cache import DataCache
+from report_store import ReportStore
+
+load_dotenv()
+WARMUP_TOP_N = int(os.getenv("WARMUP_TOP_N", "100"))
+WARMUP_BUDGET = float(os.getenv("WARMUP_BUDGET_SECONDS", "60"))
+
+# 봇과 같은 기준 (telegram_bot.REPORT_MAX_AGE — 봇 모듈을 불러오지 않도록 환경변수를 직접 읽음)
+REPORT_MAX_AGE = float(os.getenv("REPORT_MAX_AGE_HOURS", "36")) * 3600
+
+# 대시보드 주가 차트의 기본 분석 기간 (app.py 슬라이더 기본값: 올해 - 3년)
+PRICE_YEARS = 3
+
+LAYERS = ("financials", "prices", "report")
+LAYER_LABELS = {"financials": "재무·공시", "prices": "주가", "report": "/stock 리포트"}
+
+# 기업·층별 결과
+WARM, FILLED, MISSING, FAILED, SKIPPED = "warm", "filled", "missing", "failed", "skipped"
+
+
+class MissRecorder:
+    """
+    DataCache를 감싸, 현재 스레드에서 캐시에 없던 키(= 상류 API를 호출한 조회)를 기록합니다.
+    기업별 예열 전후로 take()를 불러 그 층이 이미 캐시에 있었는지 판단합니다.
+    """
+
+    def __init__(self, cache):
+        self._cache = cache
+        self._local = threading.local()
+
+    def __getattr__(self, name):
+        return getattr(self._cache, name)
+
+    def _misses(self) -> list:
+        if not hasattr(self._local, "misses"):
+            self._local.misses = []
+        return self._local.misses
+
+    def get(self, key: str, default=None):
+        value = self._cache.get(key)
+        if value is None:
+            self._misses().append(key)
+            return default
+        return value
+
+    def get_or_set(self, key: str, loader, ttl: float = None):
+        value = self.get(key)
+        if value is None:
+            value = loader()
+            self._cache.set(key, value, ttl)
+        return value
+
+    def take(self) -> list:
+        misses, self._local.misses = self._misses(), []
+        return misses
+
+
+def warm_company(dart, cache, reports, target: dict, deadline: float, price_loader=None) -> dict:
+    """한 기업의 층별 예열 결과 {층: warm/filled/missing/failed/skipped}"""
+    from context_builder import build_stock_context
+    from financials import load_latest_annual
+    from price_store import load_prices
+
+    price_loader = price_loader or load_prices
+    corp_code, corp_name = target["corp_code"], target["corp_name"]
+    result = {}
+
+    def step(layer, work):
+        if time.monotonic() > deadline:
+            result[layer] = SKIPPED
+            return
+        cache.take()
+        try:
+            work()
+        except Exception as e:
+            print(f"{corp_name} {LAYER_LABELS[layer]} 예열 오류: {e}")
+            result[layer] = FAILED
+            return
+        result[layer] = FILLED if cache.take() else WARM
+
+    step("financials", lambda: (load_latest_annual(dart, corp_code), build_stock_context(dart, corp_code, corp_name)))
+
+    stock_code = dart.find_stock_code(corp_code)
+    if stock_code:
+        start = f"{datetime.date.today().year - PRICE_YEARS}-01-01"
+        step("prices", lambda: price_loader(stock_code, start, None, cache))
+
+    # 리포트는 읽기만 (SQLite 페이지를 OS 캐시에 올림)
+    result["report"] = WARM if reports.get_report(corp_code, max_age=REPORT_MAX_AGE) else MISSING
+    return result
+
+
+def warm_datasets(cache) -> dict:
+    """밸류에이션 표·유사 기업 색인을 한 번 읽어 디스크 페이지를 OS 캐시에 올립니다. {데이터셋: 준비 여부}"""
+    from valuation import ValuationEngine
+    from similarity import SimilarityIndex
+    return {
+        "valuation": ValuationEngine(cache).load(),
+        "similarity": SimilarityIndex(cache).load(),
+    }
+
+
+def coverage(results: list) -> dict:
+    """층별 {"already": 예열 전 비율, "after": 예열 후 비율, "targets": 대상 수} (주가는 상장 기업만)"""
+    summary = {}
+    for layer in LAYERS:
+        statuses = [r[layer] for r in results if layer in r]
+        if not statuses:
+            continue
+        already = sum(s == WARM for s in statuses)
+        after = already + sum(s == FILLED for s in statuses)
+        summary[layer] = {"already": already / len(statuses), "after": after / len(statuses),
+                          "targets": len(statuses), "skipped": sum(s == SKIPPED for s in statuses)}
+    return summary
+
+
+def run_warmup(top_n: int = WARMUP_TOP_N, budget: float = WARMUP_BUDGET, workers: int = 4, days: int = 30,
+               cache=None, reports=None, dart=None, price_loader=None) -> dict:
+    """
+    예열을 실행하고 {"coverage": 층별 범위, "datasets": ..., "companies": 대상 수, "seconds": 걸린 시간}을 반환합니다.
+    dart를 넘기면 cache가 없을 때 그 핸들러의 캐시를 예열합니다. (끝나면 핸들러의 캐시를 원래대로 돌려놓음)
+    """
+    started = time.monotonic()
+    deadline = started + budget
+    reports = reports or ReportStore()
+
+    if dart is None:
+        # 기업 코드 목록은 핸들러를 만들 때 받음 (docs_cache/에 저장되어 봇이 재사용)
+        from dart_handler import DartHandler
+        dart = DartHandler(cache=cache if cache is not None else DataCache())
+    print(f"기업 코드 목록 준비 {time.monotonic() - started:.1f}초")
+
+    original = dart.cache
+    if cache is None:
+        cache = original if original is not None else DataCache()
+    cache = MissRecorder(cache)
+    dart.cache = cache
+    targets = reports.top_requested(top_n, days)
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(lambda t: warm_company(dart, cache, reports, t, deadline, price_loader), targets))
+    finally:
+        dart.cache = original
+
+    try:
+        datasets = warm_datasets(cache)
+    except Exception as e:
+        print(f"Error warming datasets: {e}")
+        datasets = {}
+
+    summary = coverage(results)
+    elapsed = time.monotonic() - started
+    for layer, stats in summary.items():
+        metrics.registry.observe("warmup_coverage_ratio", stats["after"], layer=layer)
+    metrics.registry.observe("warmup_seconds", elapsed)
+    return {"coverage": summary, "datasets": datasets, "companies": len(targets), "seconds": elapsed}
+
+
+def format_report(result: dict) -> str:
+    lines = [f"=== 캐시 예열: 기업 {result['companies']}개, {result['seconds']:.1f}초 ==="]
+    for layer, stats in result["coverage"].items():
+        skipped = f", 시간 초과로 건너뜀 {stats['skipped']}" if stats["skipped"] else ""
+        lines.append(f"{LAYER_LABELS[layer]:<10} 이미 있음 {stats['already']:6.1%} → 예열 후 {stats['after']:6.1%}"
+                     f" ({stats['targets']}개{skipped})")
+    for name, ready in result["datasets"].items():
+        lines.append(f"{name:<10} {'준비됨' if ready else '없음'}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="봇 시작 전 캐시를 예열하고 예열 범위를 보고합니다.")
+    parser.add_argument("--top", type=int, default=WARMUP_TOP_N, help="최근 요청 상위 기업 수")
+    parser.add_argument("--budget", type=float, default=WARMUP_BUDGET, help="전체 시간 예산 (초)")
+    parser.add_argument("--workers", type=int, default=4, help="동시 예열 스레드 수")
+    parser.add_argument("--days", type=int, default=30, help="요청 빈도 집계 기간 (일)")
+    args = parser.parse_args(argv)
+
+    result = run_warmup(args.top, args.budget, args.workers, args.days)
+    print(format_report(result))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())